@@ -0,0 +1,109 @@
+# Importamos las librerias de os y dotenv
+import os
+from dotenv import load_dotenv
+
+from logging.config import fileConfig
+
+# importamos create_engine de sqlalchemy
+from sqlalchemy import create_engine
+from sqlalchemy import pool
+
+from alembic import context
+
+
+# Cargamos las variables de entorno (antes de importar la app)
+load_dotenv()
+
+# Importamos la Base de SQLAlchemy
+from app.core.db import Base, DATABASE_URL
+
+# Importamos los modelos
+from app.api.user.models import UserORM
+from app.api.post.models import PostORM, post_tags
+from app.api.tag.models import TagORM
+from app.api.category.models import CategoryORM
+
+
+# this is the Alembic Config object, which provides
+# access to the values within the .ini file in use.
+config = context.config
+
+# Interpret the config file for Python logging.
+# This line sets up loggers basically.
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# Obtenemos el metadata de la base de datos
+target_metadata = Base.metadata
+
+
+# Se excluyen los objetos del índice de búsqueda de texto completo
+# (los crea app/services/search.py y no forman parte de los modelos)
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and name.startswith("posts_fts"):
+        return False
+    if type_ == "column" and name == "search_vector":
+        return False
+    if type_ == "index" and name == "ix_posts_search_vector":
+        return False
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Run migrations in 'offline' mode.
+
+    This configures the context with just a URL
+    and not an Engine, though an Engine is acceptable
+    here as well.  By skipping the Engine creation
+    we don't even need a DBAPI to be available.
+
+    Calls to context.execute() here emit the given string to the
+    script output.
+
+    """
+    # Obtenemos la URL de la base de datos de las variables de entorno
+    url = DATABASE_URL
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        compare_type=True,  # Comparamos el tipo de datos
+        compare_server_default=True,  # Comparamos el valor por defecto
+        include_object=include_object,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode.
+
+    In this scenario we need to create an Engine
+    and associate a connection with the context.
+
+    """
+    # Creamos el engine de la base de datos
+    connectable = create_engine(
+        DATABASE_URL,
+        poolclass=pool.NullPool,
+        future=True,  # Usamos el futuro de SQLAlchemy
+    )
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection, target_metadata=target_metadata,
+            compare_type=True,  # Comparamos el tipo de datos
+            compare_server_default=True,  # Comparamos el valor por defecto
+            include_object=include_object
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
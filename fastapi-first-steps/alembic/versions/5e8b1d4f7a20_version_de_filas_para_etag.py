@@ -0,0 +1,35 @@
+"""version de filas para etag
+
+Revision ID: 5e8b1d4f7a20
+Revises: cb5c3bfce045
+Create Date: 2026-10-17 13:20:11.482305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8b1d4f7a20'
+down_revision: Union[str, Sequence[str], None] = 'cb5c3bfce045'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Versión de la fila para los ETag (las filas existentes quedan en 1)
+    op.add_column('posts', sa.Column('version', sa.Integer(),
+                                     server_default='1', nullable=False))
+    op.add_column('tags', sa.Column('version', sa.Integer(),
+                                    server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Sin batch: en SQLite la tabla se recrearía y se perderían los índices por expresión
+    # (ix_*_lower_*_id). SQLite >= 3.35 soporta DROP COLUMN
+    op.drop_column('tags', 'version')
+    op.drop_column('posts', 'version')
@@ -0,0 +1,36 @@
+"""version de categorias y usuarios
+
+Revision ID: 9c4e2a7b3f61
+Revises: 5e8b1d4f7a20
+Create Date: 2026-10-17 13:55:42.118604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e2a7b3f61'
+down_revision: Union[str, Sequence[str], None] = '5e8b1d4f7a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Versión de la fila: PostPublic embebe la categoría y el autor, sus cambios
+    # tienen que cambiar el ETag de los posts (las filas existentes quedan en 1)
+    op.add_column('categories', sa.Column('version', sa.Integer(),
+                                          server_default='1', nullable=False))
+    op.add_column('users', sa.Column('version', sa.Integer(),
+                                     server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Sin batch: en SQLite la tabla se recrearía y se perderían los índices por expresión
+    # de categories (SQLite >= 3.35 soporta DROP COLUMN)
+    op.drop_column('users', 'version')
+    op.drop_column('categories', 'version')
@@ -0,0 +1,40 @@
+"""indices por expresion lower
+
+Revision ID: cb5c3bfce045
+Revises: d37fc7d071be
+Create Date: 2026-10-17 12:46:49.216594
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cb5c3bfce045'
+down_revision: Union[str, Sequence[str], None] = 'd37fc7d071be'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Índices por expresión lower(...) para los ordenamientos y búsquedas sin
+    # distinguir mayúsculas (autogenerate no los detecta en todos los motores)
+    op.create_index('ix_posts_lower_title_id', 'posts',
+                    [sa.text('lower(title)'), 'id'], unique=False)
+    op.create_index('ix_tags_lower_name_id', 'tags',
+                    [sa.text('lower(name)'), 'id'], unique=False)
+    op.create_index('ix_categories_lower_name_id', 'categories',
+                    [sa.text('lower(name)'), 'id'], unique=False)
+    op.create_index('ix_categories_lower_slug_id', 'categories',
+                    [sa.text('lower(slug)'), 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_categories_lower_slug_id', table_name='categories')
+    op.drop_index('ix_categories_lower_name_id', table_name='categories')
+    op.drop_index('ix_tags_lower_name_id', table_name='tags')
+    op.drop_index('ix_posts_lower_title_id', table_name='posts')
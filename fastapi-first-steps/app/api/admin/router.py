@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.api.admin.schemas import BlocklistUpdate
+from app.core.blocklist import ip_blocklist, parse_network
+from app.core.security import require_admin
+
+# Se crea el router para los endpoints de administración (solo administradores)
+router = APIRouter(prefix="/admin", tags=["Admin"],
+                   dependencies=[Depends(require_admin)])
+
+########### Endpoints ###########
+
+
+# Endpoint para ver el estado de la lista de IPs bloqueadas
+@router.get("/blocklist")
+def get_blocklist():
+    return ip_blocklist.status()
+
+
+# Endpoint para reemplazar la lista de IPs bloqueadas
+# (si hay un archivo configurado se escribe en él, así la recarga periódica no la pisa)
+@router.put("/blocklist")
+def replace_blocklist(payload: BlocklistUpdate):
+
+    # Se validan todas las entradas antes de reemplazar la lista
+    invalid = []
+    for entry in payload.entries:
+        try:
+            parse_network(entry)
+        except ValueError:
+            invalid.append(entry)
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail={"message": "Entradas no válidas", "invalid": invalid}
+        )
+
+    try:
+        ip_blocklist.save(payload.entries)
+    except OSError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"No se pudo guardar la lista de IPs bloqueadas: {e}"
+        )
+    return ip_blocklist.status()
+
+
+# Endpoint para recargar la lista de IPs bloqueadas desde el archivo
+@router.post("/blocklist/reload")
+def reload_blocklist():
+    if not ip_blocklist.path:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No hay un archivo de IPs bloqueadas configurado (IP_BLOCKLIST_FILE)"
+        )
+
+    try:
+        ip_blocklist.reload()
+    except OSError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"No se pudo leer la lista de IPs bloqueadas: {e}"
+        )
+    return ip_blocklist.status()
@@ -0,0 +1,7 @@
+from pydantic import BaseModel, Field
+
+
+# Se crea el modelo de Pydantic para reemplazar la lista de IPs bloqueadas
+class BlocklistUpdate(BaseModel):
+    entries: list[str] = Field(
+        default_factory=list, description="IPs o rangos CIDR (IPv4/IPv6) a bloquear")
@@ -2,10 +2,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from .schemas import TokenResponse
 from app.api.user.schemas import UserLogin, User
-from app.core.security import create_access_token, verify_password
-from app.core.db import get_db
-from app.api.user.repository import UserRepository
-from sqlalchemy.orm import Session
+from app.core.security import create_access_token, verify_password_async
+from app.core.async_db import AsyncDB, get_async_db
+from app.api.user.repository import AsyncUserRepository
+from app.services.rate_limit import auth_ip_limit, login_user_limit
 
 
 # Se crea el router para la autenticación
@@ -15,25 +15,30 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 # Endpoint para iniciar sesión
-@router.post("/login", response_model=TokenResponse)
-async def login(payload: UserLogin, db: Session = Depends(get_db)):
+# (límite por IP y por nombre de usuario antes de verificar la contraseña)
+@router.post("/login", response_model=TokenResponse, dependencies=[Depends(auth_ip_limit)])
+async def login(payload: UserLogin, db: AsyncDB = Depends(get_async_db)):
+
+    # Se limita la cantidad de intentos por nombre de usuario
+    login_user_limit.check(payload.username.lower())
 
     # Se crea el repositorio
-    repository = UserRepository(db)
+    repository = AsyncUserRepository(db)
 
     # Se busca el usuario por su nombre de usuario
-    user = repository.get_by_username(payload.username)
+    user = await repository.get_by_username(payload.username)
+
+    # Se verifica que el usuario exista y que la contraseña sea correcta
+    # (la verificación se ejecuta en el pool de hashing, sin bloquear el event loop)
+    if not user or not await verify_password_async(payload.password, user.password):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
 
     user_login = {
         "id": user.id,
         "username": user.username,
     }
 
-    # Se verifica que el usuario exista y que la contraseña sea correcta
-    if not user or not verify_password(payload.password, user.password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
-
     # Se crea el token
     token = create_access_token(user=user_login)
     return TokenResponse(access_token=token, user=User.model_validate(user))
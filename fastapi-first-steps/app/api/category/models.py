@@ -1,6 +1,6 @@
 
 from __future__ import annotations
-from sqlalchemy import Integer, String
+from sqlalchemy import Integer, String, Index, func, literal_column
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import List, TYPE_CHECKING
 
@@ -13,12 +13,18 @@ if TYPE_CHECKING:
 
 class CategoryORM(Base):
     __tablename__ = "categories"
+    # La versión nueva se obtiene en el mismo UPDATE (RETURNING), sin expirar el atributo
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(
         String(60), unique=True, index=True, nullable=False)
     slug: Mapped[str] = mapped_column(
         String(60), unique=True, index=True, nullable=False)
+    # Versión de la fila: se incrementa en cada UPDATE (se usa para los ETag de los posts)
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default="1",
+        onupdate=literal_column("version + 1"))
 
     # Se crea la relacion con el post
     posts: Mapped[List["PostORM"]] = relationship(
@@ -26,3 +32,8 @@ class CategoryORM(Base):
         lazy="selectin",  # lazy loading
         passive_deletes=True  # para que no se borren los posts al borrar una categoria
     )
+
+
+# Índices por expresión para ordenar por nombre y slug sin distinguir mayúsculas
+Index("ix_categories_lower_name_id", func.lower(CategoryORM.name), CategoryORM.id)
+Index("ix_categories_lower_slug_id", func.lower(CategoryORM.slug), CategoryORM.id)
@@ -4,6 +4,9 @@ from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 
 from app.services.pagination import paginate_query
+from app.services.response_cache import invalidate_on_commit
+from app.services.serialization import validate_items
+from app.core.async_db import AsyncDB
 from app.api.category.models import CategoryORM
 from app.api.category.schemas import CategoryPublic
 
@@ -16,13 +19,15 @@ class CategoryRepository:
         query = (select(CategoryORM).offset(skip).limit(limit))
         return self.db.execute(query).scalars().all()
 
-    def list_categories(
+    def list_categories_page(
         self,
         search: Optional[str],
         order_by: str = "id",
         direction: str = "asc",
         page: int = 1,
-        per_page: int = 10
+        per_page: int = 10,
+        mode: str = "offset",
+        cursor: Optional[str] = None
     ):
         # Se crea la query
         query = select(CategoryORM)
@@ -48,12 +53,29 @@ class CategoryRepository:
             per_page=per_page,
             order_by=order_by,
             direction=direction,
-            allowed_order=allowed_order
+            allowed_order=allowed_order,
+            mode=mode,
+            cursor=cursor
         )
 
+        # Se retorna el resultado
+        return result
+
+    def list_categories(
+        self,
+        search: Optional[str],
+        order_by: str = "id",
+        direction: str = "asc",
+        page: int = 1,
+        per_page: int = 10,
+        mode: str = "offset",
+        cursor: Optional[str] = None
+    ):
+        result = self.list_categories_page(search, order_by, direction, page,
+                                           per_page, mode, cursor)
+
         # Se mapea la query a CategoryPublic para que la respuesta sea un JSON
-        result["items"] = [CategoryPublic.model_validate(
-            item) for item in result["items"]]
+        result["items"] = validate_items(CategoryPublic, result["items"])
 
         # Se retorna el resultado
         return result
@@ -72,6 +94,7 @@ class CategoryRepository:
         category = CategoryORM(name=name, slug=slug)
         self.db.add(category)
         self.db.flush()
+        invalidate_on_commit(self.db, "categories")
         return category
 
     def update(self, category: CategoryORM, updates: dict) -> CategoryORM:
@@ -81,7 +104,45 @@ class CategoryRepository:
 
         self.db.add(category)
         self.db.flush()
+        invalidate_on_commit(self.db, "categories")
         return category
 
     def delete(self, category: CategoryORM) -> None:
         self.db.delete(category)
+        invalidate_on_commit(self.db, "categories")
+
+
+class AsyncCategoryRepository:
+    def __init__(self, db: AsyncDB) -> None:
+        self.db = db
+
+    # La paginación y la búsqueda se reutilizan del repositorio síncrono
+    async def list_categories_page(self, **params):
+        return await self.db.run_sync(lambda db: CategoryRepository(db).list_categories_page(**params))
+
+    async def get(self, category_id: int) -> CategoryORM | None:
+        return await self.db.get(CategoryORM, category_id)
+
+    async def get_by_slug(self, slug: str) -> CategoryORM | None:
+        query = select(CategoryORM).where(CategoryORM.slug == slug)
+        return (await self.db.execute(query)).scalars().first()
+
+    async def create(self, *, name: str, slug: str) -> CategoryORM:
+        category = CategoryORM(name=name, slug=slug)
+        self.db.add(category)
+        await self.db.flush()
+        invalidate_on_commit(self.db, "categories")
+        return category
+
+    async def update(self, category: CategoryORM, updates: dict) -> CategoryORM:
+        for key, value in updates.items():
+            setattr(category, key, value)
+
+        self.db.add(category)
+        await self.db.flush()
+        invalidate_on_commit(self.db, "categories")
+        return category
+
+    async def delete(self, category: CategoryORM) -> None:
+        await self.db.delete(category)
+        invalidate_on_commit(self.db, "categories")
@@ -1,9 +1,11 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from app.api.category.repository import CategoryRepository
-from app.core.db import get_db
+from app.api.category.repository import AsyncCategoryRepository
+from app.core.async_db import AsyncDB, get_async_db
 from app.core.security import get_current_user
+from app.services.etag import ConditionalRequest
+from app.services.response_cache import cached_listing
+from app.services.rate_limit import write_limit
 from app.api.category.schemas import CategoryCreate, CategoryUpdate, CategoryPublic
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
@@ -29,53 +31,62 @@ async def list_categories(
     order_by: str = Query("id", pattern="^(id|name|slug)$"),
     direction: str = Query("asc", pattern="^(asc|desc)$"),
     search: str | None = Query(None),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    cursor: str | None = Query(None),
     # Se inyecta la sesión de la base de datos
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     # Se valida que el usuario este autenticado
-    user=Depends(get_current_user)
+    user=Depends(get_current_user),
+    # Se valida el If-None-Match del cliente
+    conditional: ConditionalRequest = Depends()
 ):
-    repository = CategoryRepository(db)
-    return repository.list_categories(
-        page=page,
-        per_page=per_page,
-        order_by=order_by,
-        direction=direction,
-        search=search
+    repository = AsyncCategoryRepository(db)
+    params = dict(page=page, per_page=per_page, order_by=order_by,
+                  direction=direction, search=search, mode=pagination, cursor=cursor)
+
+    # Se responde desde el cache (se invalida al crear, editar o eliminar categorías)
+    return await cached_listing(
+        "categories",
+        params,
+        conditional,
+        load=lambda: repository.list_categories_page(**params),
+        schema=CategoryPublic
     )
 
 
 # Endpoint para crear una categoría
-@router.post("/", response_model=CategoryPublic, status_code=status.HTTP_201_CREATED)
-def create_category(
+@router.post("/", response_model=CategoryPublic, status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(write_limit)])
+async def create_category(
     data: CategoryCreate,
     # Se inyecta la sesión de la base de datos
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     # Se valida que el usuario este autenticado
     user=Depends(get_current_user)
 ):
-    repository = CategoryRepository(db)
-    exist = repository.get_by_slug(data.slug)
+    repository = AsyncCategoryRepository(db)
+    exist = await repository.get_by_slug(data.slug)
     if exist:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Slug en uso")
 
-    category = repository.create(name=data.name, slug=data.slug)
-    db.commit()
-    db.refresh(category)
+    category = await repository.create(name=data.name, slug=data.slug)
+    await db.commit()
+    await db.refresh(category)
     return category
 
 
 # Endpoint para obtener una categoría por ID
 @router.get("/{category_id}", response_model=CategoryPublic)
-def get_category(
+async def get_category(
     category_id: int,
     # Se inyecta la sesión de la base de datos
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     # Se valida que el usuario este autenticado
     user=Depends(get_current_user)
 ):
-    repository = CategoryRepository(db)
-    category = repository.get(category_id)
+    repository = AsyncCategoryRepository(db)
+    category = await repository.get(category_id)
     if not category:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Categoría no encontrada")
@@ -84,36 +95,37 @@ def get_category(
 
 
 # Endpoint para actualizar una categoría
-@router.put("/{category_id}", response_model=CategoryPublic)
-def update_category(
+@router.put("/{category_id}", response_model=CategoryPublic,
+            dependencies=[Depends(write_limit)])
+async def update_category(
     category_id: int,
     data: CategoryUpdate,
     # Se inyecta la sesión de la base de datos
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     # Se valida que el usuario este autenticado
     user=Depends(get_current_user)
 ):
-    repository = CategoryRepository(db)
-    category = repository.get(category_id)
+    repository = AsyncCategoryRepository(db)
+    category = await repository.get(category_id)
     if not category:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Categoría no encontrada")
 
-    updated = repository.update(category, data.model_dump(exclude_unset=True))
-    db.commit()
-    db.refresh(updated)
+    updated = await repository.update(category, data.model_dump(exclude_unset=True))
+    await db.commit()
+    await db.refresh(updated)
     return updated
 
 
 # Endpoint para eliminar una categoría
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_category(category_id: int, db: Session = Depends(get_db)):
-    repository = CategoryRepository(db)
-    category = repository.get(category_id)
+async def delete_category(category_id: int, db: AsyncDB = Depends(get_async_db)):
+    repository = AsyncCategoryRepository(db)
+    category = await repository.get(category_id)
     if not category:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Categoría no encontrada")
 
-    repository.delete(category)
-    db.commit()
+    await repository.delete(category)
+    await db.commit()
     return None
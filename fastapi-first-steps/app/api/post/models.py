@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List, Optional, TYPE_CHECKING
 
-from sqlalchemy import Integer, String, DateTime, Table, Column, ForeignKey, Text, UniqueConstraint
+from sqlalchemy import Integer, String, DateTime, Table, Column, ForeignKey, Text, UniqueConstraint, Index, func, literal_column
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.db import Base
@@ -30,12 +30,18 @@ post_tags = Table(
 class PostORM(Base):
     __tablename__ = "posts"
     __table_args__ = (UniqueConstraint("title", name="unique_post_title"),)
+    # La versión nueva se obtiene en el mismo UPDATE (RETURNING), sin expirar el atributo
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String(100), index=True)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.now())
+    # Versión de la fila: se incrementa en cada UPDATE (se usa para los ETag)
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default="1",
+        onupdate=literal_column("version + 1"))
 
     # Se crea la relacion con el post (lado Muchos)
     user_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"))
@@ -55,3 +61,8 @@ class PostORM(Base):
         lazy="selectin",  # lazy loading
         passive_deletes=True  # para que no se borren los tags al borrar un post
     )
+
+
+# Índice por expresión para ordenar por título sin distinguir mayúsculas
+# (el id se incluye para que la paginación por cursor también use el índice)
+Index("ix_posts_lower_title_id", func.lower(PostORM.title), PostORM.id)
@@ -1,16 +1,29 @@
 
 from fastapi import Depends
-from app.api.post.schemas import PostPublic
+from app.api.post.schemas import PostPublic, PostCreate
 from app.services.pagination import paginate_query
-from typing import List, Optional
-from sqlalchemy import select, func
+from app.services.search import apply_post_search
+from app.services.serialization import validate_items
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import insert, select, func
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, selectinload, joinedload
-from app.api.post.models import PostORM
+from app.api.post.models import PostORM, post_tags
+from app.api.category.models import CategoryORM
 from app.api.tag.models import TagORM
 from app.api.user.models import UserORM
 from app.api.user.repository import UserRepository
 from app.api.tag.repository import TagRepository
 from app.core.security import get_current_user
+from app.core.async_db import AsyncDB
+from app.core.replicas import mark_write
+from app.api.tag.repository import AsyncTagRepository
+
+# Cantidad de posts que se insertan por lote en la importación masiva
+BULK_CHUNK_SIZE = 500
+
+# Relaciones que necesita PostPublic (se cargan junto con los posts, sin lazy loading)
+POST_PUBLIC_OPTIONS = (joinedload(PostORM.user), joinedload(PostORM.category))
 
 
 class PostRepository:
@@ -24,24 +37,84 @@ class PostRepository:
     def get_by_id(self, id: int) -> Optional[PostORM]:
         return self.db.query(PostORM).filter_by(id=id).first()
 
-    ########### Metodo para buscar posts ###########
+    ########### Metodo para obtener la llave de versión de un post (sin cargarlo) ###########
 
-    def search(
+    def version_key(self, id: int) -> Optional[tuple]:
+        # Una sola consulta por clave primaria con las versiones del post, de su autor,
+        # de su categoría y de sus tags (todos se incluyen en PostPublic)
+        rows = self.db.execute(
+            select(PostORM.version, PostORM.user_id, UserORM.version,
+                   PostORM.category_id, CategoryORM.version,
+                   TagORM.id, TagORM.version)
+            .outerjoin(UserORM, UserORM.id == PostORM.user_id)
+            .outerjoin(CategoryORM, CategoryORM.id == PostORM.category_id)
+            .outerjoin(post_tags, post_tags.c.post_id == PostORM.id)
+            .outerjoin(TagORM, TagORM.id == post_tags.c.tag_id)
+            .where(PostORM.id == id)
+        ).all()
+
+        # Si no existe el post, se retorna None
+        if not rows:
+            return None
+
+        version, user_id, user_version, category_id, category_version = rows[0][:5]
+        tag_versions = tuple(sorted((tag_id, tag_version)
+                                    for *_, tag_id, tag_version in rows
+                                    if tag_id is not None))
+        return (id, version, (user_id, user_version), (category_id, category_version),
+                tag_versions)
+
+    ########### Metodo para armar la query de posts filtrada con su ranking ###########
+
+    def ranked_query(
+        self,
+        search: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        search_mode: str = "fulltext"
+    ):
+        query = select(PostORM)
+
+        # Se filtra por la búsqueda de texto (y se obtiene el ranking de relevancia)
+        query, rank = apply_post_search(query, PostORM, search, search_mode)
+
+        # Se filtra por las etiquetas (sin distinguir mayúsculas)
+        normalized_tag_names = [tag.strip().lower()
+                                for tag in tags or [] if tag.strip()]
+        if normalized_tag_names:
+            query = query.where(PostORM.tags.any(
+                func.lower(TagORM.name).in_(normalized_tag_names)))
+
+        return query, rank
+
+    ########### Metodo para armar la query de posts filtrada ###########
+
+    def filter_query(
+        self,
+        search: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        search_mode: str = "fulltext"
+    ):
+        query, _ = self.ranked_query(search, tags, search_mode)
+        return query
+
+    ########### Metodo para buscar posts (retorna la página con los objetos del ORM) ###########
+
+    def search_page(
             self,
             search: Optional[str],
             order_by: str,
             direction: str,
             page: int,
-            per_page: int
+            per_page: int,
+            mode: str = "offset",
+            cursor: Optional[str] = None,
+            search_mode: str = "fulltext"
     ):
 
         # Se retorna la lista de posts
         # results = self.db.query(PostORM).all()
-        query = select(PostORM)
-
-        # Se retorna la lista de posts filtrada por la búsqueda
-        if search:
-            query = query.where(PostORM.title.contains(search))
+        query, rank = self.ranked_query(search=search, search_mode=search_mode)
+        query = query.options(*POST_PUBLIC_OPTIONS)
 
         # Se definen los ordenamientos permitidos en la paginación
         allowed_order = {
@@ -49,6 +122,10 @@ class PostRepository:
             "title": func.lower(PostORM.title),
         }
 
+        # Si hay ranking de relevancia se permite ordenar por "rank"
+        if rank is not None:
+            allowed_order["rank"] = rank
+
         # Se ejecuta la query con la paginación
         result = paginate_query(
             db=self.db,
@@ -58,12 +135,32 @@ class PostRepository:
             per_page=per_page,
             order_by=order_by,
             direction=direction,
-            allowed_order=allowed_order
+            allowed_order=allowed_order,
+            mode=mode,
+            cursor=cursor
         )
 
+        # Se retorna el resultado
+        return result
+
+    ########### Metodo para buscar posts ###########
+
+    def search(
+            self,
+            search: Optional[str],
+            order_by: str,
+            direction: str,
+            page: int,
+            per_page: int,
+            mode: str = "offset",
+            cursor: Optional[str] = None,
+            search_mode: str = "fulltext"
+    ):
+        result = self.search_page(search, order_by, direction, page,
+                                  per_page, mode, cursor, search_mode)
+
         # Se mapea la query a PostPublic para que la respuesta sea un JSON
-        result["items"] = [PostPublic.model_validate(
-            item) for item in result["items"]]
+        result["items"] = validate_items(PostPublic, result["items"])
 
         # Se retorna el resultado
         return result
@@ -82,17 +179,32 @@ class PostRepository:
 
         # Se crea la query para obtener los posts filtrados por las etiquetas
         post_list = (
-            select(PostORM)
+            self.filter_query(tags=normalized_tag_names)
             .options(
                 selectinload(PostORM.tags),
-                joinedload(PostORM.user),
-            ).where(PostORM.tags.any(func.lower(TagORM.name).in_(normalized_tag_names)))
+                *POST_PUBLIC_OPTIONS,
+            )
             .order_by(PostORM.id.asc())
         )
 
         # Se ejecuta la query y se retorna la lista con los posts
         return list(self.db.execute(post_list).scalars().all())
 
+    ########### Metodo para armar la query de la exportación ###########
+
+    def export_query(
+        self,
+        search: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        search_mode: str = "fulltext"
+    ):
+        # Se ordena por id para que la exportación sea estable
+        return (
+            self.filter_query(search=search, tags=tags, search_mode=search_mode)
+            .options(selectinload(PostORM.tags))
+            .order_by(PostORM.id.asc())
+        )
+
     ########### Metodo para crear un post ###########
 
     def create(
@@ -101,12 +213,12 @@ class PostRepository:
         content: str,
         tags: List[dict],
         category_id: Optional[int],
-        user: UserORM
+        user_id: int
     ) -> PostORM:
 
         # Creamos el Objeto Post
         post = PostORM(title=title, content=content,
-                       user=user, category_id=category_id)
+                       user_id=user_id, category_id=category_id)
 
         # Asignamos las etiquetas al Objeto Post
         for tag in tags:
@@ -121,6 +233,119 @@ class PostRepository:
 
         return post
 
+    ########### Metodo para crear posts en lote (importación masiva) ###########
+
+    def bulk_create(
+        self,
+        rows: List[Tuple[int, PostCreate]],
+        user_id: int
+    ) -> Tuple[int, List[dict]]:
+
+        # Se reciben tuplas (índice de la fila, post) y se retornan los creados y los errores
+        errors: List[dict] = []
+
+        # Se descartan los títulos repetidos dentro del mismo lote
+        candidates: List[Tuple[int, PostCreate]] = []
+        titles = set()
+        for index, post in rows:
+            if post.title in titles:
+                errors.append(bulk_error(
+                    index, post.title, "Título duplicado en el lote"))
+                continue
+            # Las etiquetas se resuelven por su nombre normalizado: un nombre en blanco no tiene clave
+            if any(not tag.name.strip() for tag in post.tags):
+                errors.append(bulk_error(
+                    index, post.title, "Nombre de etiqueta vacío"))
+                continue
+            titles.add(post.title)
+            candidates.append((index, post))
+
+        # Se obtienen en una sola consulta los títulos que ya existen
+        existing = set()
+        if titles:
+            existing = set(self.db.execute(
+                select(PostORM.title).where(PostORM.title.in_(titles))
+            ).scalars())
+
+        # Se obtienen en una sola consulta las categorías que existen
+        category_ids = {post.category_id for _, post in candidates
+                        if post.category_id is not None}
+        categories = set()
+        if category_ids:
+            categories = set(self.db.execute(
+                select(CategoryORM.id).where(CategoryORM.id.in_(category_ids))
+            ).scalars())
+
+        # Se validan las filas contra la base de datos
+        valid: List[Tuple[int, PostCreate]] = []
+        for index, post in candidates:
+            if post.title in existing:
+                errors.append(bulk_error(
+                    index, post.title, "Ya existe un post con ese título"))
+            elif post.category_id is not None and post.category_id not in categories:
+                errors.append(bulk_error(
+                    index, post.title, "La categoría no existe"))
+            else:
+                valid.append((index, post))
+
+        if not valid:
+            return 0, errors
+
+        # Se intenta insertar el lote completo dentro de un savepoint
+        try:
+            with self.db.begin_nested():
+                self._insert_batch(valid, user_id)
+            return len(valid), errors
+        except SQLAlchemyError:
+            pass
+
+        # Si el lote falla, se inserta fila por fila para aislar los errores
+        created = 0
+        for index, post in valid:
+            try:
+                with self.db.begin_nested():
+                    self._insert_batch([(index, post)], user_id)
+                created += 1
+            except SQLAlchemyError as e:
+                errors.append(bulk_error(
+                    index, post.title, str(getattr(e, "orig", None) or e)))
+
+        errors.sort(key=lambda error: error["index"])
+        return created, errors
+
+    ########### Metodo para insertar un lote de posts con sus tags ###########
+
+    def _insert_batch(self, rows: List[Tuple[int, PostCreate]], user_id: int) -> None:
+
+        # Se resuelven todas las etiquetas del lote en una sola consulta
+        tag_ids: Dict[str, int] = TagRepository(self.db).resolve_names(
+            tag.name for _, post in rows for tag in post.tags)
+
+        # Los INSERT masivos no pasan por el flush: se marca la escritura para read-your-writes
+        mark_write(self.db)
+
+        # Se insertan los posts con executemany y se obtienen sus IDs en orden
+        post_ids = self.db.execute(
+            insert(PostORM).returning(
+                PostORM.id, sort_by_parameter_order=True),
+            [{
+                "title": post.title,
+                "content": post.content,
+                "category_id": post.category_id,
+                "user_id": user_id
+            } for _, post in rows]
+        ).scalars().all()
+
+        # Se insertan las relaciones post_tags en lote
+        links = []
+        for post_id, (_, post) in zip(post_ids, rows):
+            post_tag_ids = dict.fromkeys(
+                tag_ids[tag.name.strip().lower()] for tag in post.tags)
+            links.extend({"post_id": post_id, "tag_id": tag_id}
+                         for tag_id in post_tag_ids)
+        if links:
+            self.db.execute(insert(post_tags), links)
+
     ########### Metodo para actualizar un post ###########
 
     def update(self, post: PostORM, update_data: dict) -> PostORM:
@@ -133,3 +358,109 @@ class PostRepository:
 
     def delete(self, post: PostORM) -> None:
         self.db.delete(post)
+
+
+class AsyncPostRepository:
+
+    ########### Constructor ###########
+    def __init__(self, db: AsyncDB):
+        self.db = db
+
+    ########### Metodo para obtener un post por su ID (con autor, categoría y tags) ###########
+
+    async def get_by_id(self, id: int) -> Optional[PostORM]:
+        query = (
+            select(PostORM)
+            .options(*POST_PUBLIC_OPTIONS)
+            .where(PostORM.id == id)
+            # Se recargan los atributos aunque el post ya esté en la sesión
+            .execution_options(populate_existing=True)
+        )
+        return (await self.db.execute(query)).scalars().first()
+
+    ########### Metodo para obtener la llave de versión de un post ###########
+
+    async def version_key(self, id: int) -> Optional[tuple]:
+        return await self.db.run_sync(lambda db: PostRepository(db).version_key(id))
+
+    ########### Metodo para buscar posts (la paginación y la búsqueda se reutilizan) ###########
+
+    async def search_page(self, **params):
+        return await self.db.run_sync(lambda db: PostRepository(db).search_page(**params))
+
+    ########### Metodo para buscar posts por tags ###########
+
+    async def by_tags(self, tags: List[str]) -> List[PostORM]:
+        return await self.db.run_sync(lambda db: PostRepository(db).by_tags(tags))
+
+    ########### Metodo para crear un post ###########
+
+    async def create(
+        self,
+        title: str,
+        content: str,
+        tags: List[dict],
+        category_id: Optional[int],
+        user_id: int
+    ) -> PostORM:
+
+        # Creamos el Objeto Post
+        post = PostORM(title=title, content=content,
+                       user_id=user_id, category_id=category_id)
+
+        # Asignamos las etiquetas al Objeto Post
+        tag_repository = AsyncTagRepository(self.db)
+        for tag in tags:
+            post.tags.append(await tag_repository.get_by_name(tag["name"]))
+
+        # Guardamos el Objeto Post
+        self.db.add(post)
+        await self.db.flush()
+
+        return post
+
+    ########### Metodo para actualizar un post ###########
+
+    async def update(self, post: PostORM, update_data: dict) -> PostORM:
+        for key, value in update_data.items():
+            setattr(post, key, value)
+
+        return post
+
+    ########### Metodo para eliminar un post ###########
+
+    async def delete(self, post: PostORM) -> None:
+        await self.db.delete(post)
+
+
+# Llave de versión de un post cargado (la misma que arma version_key)
+# Incluye las versiones del autor y de la categoría porque PostPublic los embebe
+def post_version(post: PostORM) -> tuple:
+    tag_versions = tuple(sorted((tag.id, tag.version) for tag in post.tags))
+    user_version = post.user.version if post.user is not None else None
+    category_version = post.category.version if post.category is not None else None
+    return (post.id, post.version, (post.user_id, user_version),
+            (post.category_id, category_version), tag_versions)
+
+
+# Columnas de la exportación de posts
+EXPORT_FIELDS = ["id", "title", "content", "created_at",
+                 "user_id", "category_id", "tags"]
+
+
+# Se serializa un lote de posts para la exportación
+def export_rows(db: Session, posts: List[PostORM]) -> List[dict]:
+    return [{
+        "id": post.id,
+        "title": post.title,
+        "content": post.content,
+        "created_at": post.created_at,
+        "user_id": post.user_id,
+        "category_id": post.category_id,
+        "tags": [tag.name for tag in post.tags]
+    } for post in posts]
+
+
+# Se arma el error de una fila de la importación masiva
+def bulk_error(index: int, title: Optional[str], detail: str) -> dict:
+    return {"index": index, "title": title, "detail": detail}
@@ -1,13 +1,26 @@
-from fastapi import APIRouter, Query, Depends, HTTPException, Path, status
-from typing import Union, List
+from fastapi import APIRouter, Query, Depends, HTTPException, Path, Request, status
+from fastapi.concurrency import run_in_threadpool
+from typing import Union, List, Tuple
 from sqlalchemy.orm import Session
 from math import ceil
+from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
-from app.core.db import get_db
-from app.core.security import get_current_user
-from .schemas import (PostPublic, PostCreate, PostUpdate, PostSummary)
-from .repository import PostRepository
+from app.core.db import get_db, SessionLocal
+from app.core.async_db import AsyncDB, get_async_db
+from app.core.security import get_async_read_db, get_current_user
+from app.services.counting import invalidate_counts
+from app.services.importing import read_records
+from app.services.export import export_response, stream_export
+from app.services.etag import ConditionalRequest, etag_headers, page_version
+from app.services.rate_limit import write_limit
+from app.services.serialization import page_response
+from app.api.post.models import PostORM
+from app.api.tag.models import TagORM
+from .schemas import (PostPublic, PostCreate, PostUpdate, PostSummary,
+                      PostBulkResult, PostBulkError)
+from .repository import (PostRepository, AsyncPostRepository, BULK_CHUNK_SIZE, EXPORT_FIELDS,
+                         bulk_error, export_rows, post_version)
 
 
 # Se crea el router para los endpoints de posts y se le asigna un prefijo y un tag para la documentación
@@ -24,44 +37,86 @@ router = APIRouter(prefix="/posts", tags=["Posts"])
 async def get_posts(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
-    order_by: str = Query("id", pattern="^(id|title)$"),
+    order_by: str = Query("id", pattern="^(id|title|rank)$",
+                          description="rank: ordena por relevancia (requiere search, ascendente = más relevante primero)"),
     direction: str = Query("asc", pattern="^(asc|desc)$"),
     search: str | None = Query(None),
-    # Se inyecta la sesión de la base de datos
-    db: Session = Depends(get_db),
+    search_mode: str = Query("fulltext", pattern="^(fulltext|prefix|contains)$"),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    cursor: str | None = Query(None),
+    # Se inyecta la sesión de lectura (réplica o primaria)
+    db: AsyncDB = Depends(get_async_read_db),
     # Se valida que el usuario este autenticado
-    user=Depends(get_current_user)
+    user=Depends(get_current_user),
+    # Se valida el If-None-Match del cliente
+    conditional: ConditionalRequest = Depends()
 ):
-    repository = PostRepository(db)
-    return repository.search(
+    repository = AsyncPostRepository(db)
+    result = await repository.search_page(
         page=page,
         per_page=per_page,
         order_by=order_by,
         direction=direction,
-        search=search
+        search=search,
+        mode=pagination,
+        cursor=cursor,
+        search_mode=search_mode
     )
 
+    # Si la página no cambió se responde 304 antes de armar la respuesta
+    etag = conditional.check("posts", page_version(result, post_version))
+
+    # Se mapea la página a PostPublic (una sola validación de la lista) y se serializa
+    # directo, sin volver a validar contra response_model
+    return page_response(result, PostPublic, headers=etag_headers(etag))
+
 
 # Endpoint para obtener posts filtrados por etiquetas
 @router.get("/by-tags",
             response_model=List[PostPublic]
             )
-def filter_by_tags(
+async def filter_by_tags(
     tags: List[str] = Query(
         ...,
         min_length=1,
         description="Una o más etiquetas. Ejemplo: ?tags=python&tags=fastapi"
     ),
-    # Se inyecta la sesión de la base de datos
-    db: Session = Depends(get_db),
+    # Se inyecta la sesión de lectura (réplica o primaria)
+    db: AsyncDB = Depends(get_async_read_db),
     # Se valida que el usuario este autenticado
     user=Depends(get_current_user)
 ):
     # Se crea el repositorio
-    repository = PostRepository(db)
+    repository = AsyncPostRepository(db)
 
     # Obtenemos los posts filtrados por las etiquetas
-    return repository.by_tags(tags)
+    return await repository.by_tags(tags)
+
+
+# Endpoint para exportar posts en streaming (NDJSON o CSV)
+@router.get("/export",
+            response_description="Posts exportados"
+            )
+def export_posts(
+    search: str | None = Query(None),
+    search_mode: str = Query("fulltext", pattern="^(fulltext|prefix|contains)$"),
+    tags: List[str] | None = Query(
+        None, description="Filtra por una o más etiquetas"),
+    export_format: str = Query(
+        "ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    # Se inyecta la sesión de la base de datos
+    db: Session = Depends(get_db),
+    # Se valida que el usuario este autenticado
+    user=Depends(get_current_user)
+):
+    # Se arma la query con los mismos filtros que el listado
+    query = PostRepository(db).export_query(
+        search=search, tags=tags, search_mode=search_mode)
+
+    # Se recorren los posts por lotes en una sesión propia del stream
+    chunks = stream_export(SessionLocal, query, export_rows,
+                           export_format, EXPORT_FIELDS)
+    return export_response(chunks, export_format, "posts")
 
 
 # Endpoint para obtener un post por su ID
@@ -79,19 +134,32 @@ async def get_post(post_id: int = Path(
     # Query parameter
     include_content: bool = Query(
         default=True, description="Incluir contenido del post"),
-    # Se inyecta la sesión de la base de datos
-    db: Session = Depends(get_db),
+    # Se inyecta la sesión de lectura (réplica o primaria)
+    db: AsyncDB = Depends(get_async_read_db),
     # Se valida que el usuario este autenticado
-    user=Depends(get_current_user)
+    user=Depends(get_current_user),
+    # Se valida el If-None-Match del cliente
+    conditional: ConditionalRequest = Depends()
 ):
 
     # Se crea el repositorio
-    repository = PostRepository(db)
+    repository = AsyncPostRepository(db)
 
-    # Obtenemos el post
-    post = repository.get_by_id(post_id)
+    # Se obtiene solo la versión del post (una consulta por clave primaria)
+    version = await repository.version_key(post_id)
 
     # Si no se encuentra el post, se lanza una excepción
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Post no encontrado")
+
+    # Si el cliente ya tiene esta versión se responde 304 sin cargar el post
+    conditional.check("post", include_content, version)
+
+    # Obtenemos el post
+    post = await repository.get_by_id(post_id)
+
+    # Si el post se eliminó entre ambas consultas, se lanza una excepción
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Post no encontrado")
@@ -106,6 +174,7 @@ async def get_post(post_id: int = Path(
 
 # Endpoint para crear un nuevo post
 @router.post("/",
+             dependencies=[Depends(write_limit)],
              response_model=PostPublic,
              response_description="Post creado exitosamente",
              status_code=status.HTTP_201_CREATED
@@ -113,44 +182,119 @@ async def get_post(post_id: int = Path(
 # Se recibe el post como un objeto de la clase PostBase
 async def create_post(post: PostCreate,
                       # Se inyecta la sesión de la base de datos
-                      db: Session = Depends(get_db),
+                      db: AsyncDB = Depends(get_async_db),
                       # Se valida que el usuario este autenticado
                       user=Depends(get_current_user)):
     # Se crea el repositorio
-    repository = PostRepository(db)
+    repository = AsyncPostRepository(db)
 
     try:
 
-        created_post = repository.create(
+        created_post = await repository.create(
             title=post.title,
             content=post.content,
             tags=[tag.model_dump() for tag in post.tags],
             category_id=post.category_id,
-            user=user
+            user_id=user.id
         )
 
         # Se guardan los cambios en la base de datos
-        db.commit()
-
-        # Se refresca el post
-        db.refresh(created_post)
+        await db.commit()
 
-        # Se retorna el post
-        return created_post
+        # Se obtiene el post con su autor, categoría y tags
+        return await repository.get_by_id(created_post.id)
 
     # Si ocurre un error, se lanza una excepción
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+# Endpoint para importar posts en lote (NDJSON o arreglo JSON)
+@router.post("/bulk",
+             dependencies=[Depends(write_limit)],
+             response_model=PostBulkResult,
+             response_description="Resumen de la importación"
+             )
+async def bulk_create_posts(
+    request: Request,
+    # Se inyecta la sesión de la base de datos
+    db: Session = Depends(get_db),
+    # Se valida que el usuario este autenticado
+    user=Depends(get_current_user)
+):
+    # Se crea el repositorio
+    repository = PostRepository(db)
+    result = PostBulkResult()
+    chunk: List[Tuple[int, PostCreate]] = []
+
+    # Se importa un lote (en el threadpool para no bloquear el event loop)
+    async def flush():
+        created, errors = await run_in_threadpool(
+            import_chunk, db, repository, list(chunk), user.id)
+        result.created += created
+        result.errors.extend(PostBulkError(**error) for error in errors)
+        chunk.clear()
+
+    # Se leen las filas a medida que llegan y se validan
+    async for index, data, error in read_records(request):
+        result.received += 1
+        if error:
+            result.errors.append(PostBulkError(index=index, detail=error))
+            continue
+
+        try:
+            chunk.append((index, PostCreate.model_validate(data)))
+        except ValidationError as e:
+            title = data.get("title") if isinstance(data, dict) else None
+            result.errors.append(PostBulkError(
+                index=index, title=title if isinstance(title, str) else None,
+                detail=validation_detail(e)))
+            continue
+
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await flush()
+
+    if chunk:
+        await flush()
+
+    # Se invalidan los totales guardados de la paginación
+    if result.created:
+        invalidate_counts(PostORM)
+        invalidate_counts(TagORM)
+
+    # Se retorna el resumen de la importación
+    result.errors.sort(key=lambda error: error.index)
+    result.failed = len(result.errors)
+    return result
+
+
+# Se importa un lote de posts y se guardan los cambios (un commit por lote)
+def import_chunk(db: Session, repository: PostRepository, chunk: List[Tuple[int, PostCreate]], user_id: int):
+    try:
+        created, errors = repository.bulk_create(chunk, user_id)
+        db.commit()
+        return created, errors
+    except SQLAlchemyError as e:
+        db.rollback()
+        return 0, [bulk_error(index, post.title, str(e)) for index, post in chunk]
+
+
+# Se arma el detalle de los errores de validación de una fila
+def validation_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in item['loc'])}: {item['msg']}"
+        for item in error.errors())
+
+
 # Endpoint para actualizar un post existente
 @router.put("/{post_id}",
+            dependencies=[Depends(write_limit)],
             response_model=PostPublic,
             response_description="Post actualizado exitosamente"
             )
@@ -159,16 +303,16 @@ async def update_post(
     post_id: int,
     data: PostUpdate,
     # Se inyecta la sesión de la base de datos
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     # Se valida que el usuario este autenticado
     user=Depends(get_current_user)
 ):
 
     # Se crea el repositorio
-    repository = PostRepository(db)
+    repository = AsyncPostRepository(db)
 
     # Obtenemos el post
-    post = repository.get_by_id(post_id)
+    post = await repository.get_by_id(post_id)
 
     # Si no se encuentra el post, se lanza una excepción
     if not post:
@@ -178,24 +322,21 @@ async def update_post(
     # Se intenta actualizar el post
     try:
         updates = data.model_dump(exclude_unset=True)
-        post = repository.update(post, updates)
+        post = await repository.update(post, updates)
 
         # Se guardan los cambios en la base de datos
-        db.commit()
+        await db.commit()
 
-        # Se refresca el post
-        db.refresh(post)
-
-        # Se retorna el post
-        return post
+        # Se obtiene el post actualizado con su autor, categoría y tags
+        return await repository.get_by_id(post.id)
 
     # Si ocurre un error, se lanza una excepción
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
@@ -206,16 +347,16 @@ async def update_post(
                )
 async def delete_post(post_id: int,
                       # Se inyecta la sesión de la base de datos
-                      db: Session = Depends(get_db),
+                      db: AsyncDB = Depends(get_async_db),
                       # Se valida que el usuario este autenticado
                       user=Depends(get_current_user)
                       ):
 
     # Se crea el repositorio
-    repository = PostRepository(db)
+    repository = AsyncPostRepository(db)
 
     # Obtenemos el post
-    post = repository.get_by_id(post_id)
+    post = await repository.get_by_id(post_id)
 
     # Si no se encuentra el post, se lanza una excepción
     if not post:
@@ -224,17 +365,17 @@ async def delete_post(post_id: int,
 
     # Se intenta eliminar el post
     try:
-        repository.delete(post)
+        await repository.delete(post)
 
         # Se guardan los cambios en la base de datos
-        db.commit()
+        await db.commit()
 
     # Si ocurre un error, se lanza una excepción
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
@@ -68,3 +68,18 @@ class PostPublic(PostBase):
 class PostSummary(BaseModel):
     id: int
     title: str
+
+
+# Se crea la clase PostBulkError para informar el error de una fila de la importación
+class PostBulkError(BaseModel):
+    index: int
+    title: Optional[str] = None
+    detail: str
+
+
+# Se crea la clase PostBulkResult con el resumen de la importación masiva
+class PostBulkResult(BaseModel):
+    received: int = 0
+    created: int = 0
+    failed: int = 0
+    errors: List[PostBulkError] = []
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List, TYPE_CHECKING
 
-from sqlalchemy import Integer, String, DateTime
+from sqlalchemy import Integer, String, DateTime, Index, func, literal_column
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.db import Base
@@ -16,11 +16,17 @@ if TYPE_CHECKING:
 # Se crea la clase TagORM para manejar los tags en la base de datos
 class TagORM(Base):
     __tablename__ = "tags"
+    # La versión nueva se obtiene en el mismo UPDATE (RETURNING), sin expirar el atributo
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(30), unique=True, index=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.now())
+    # Versión de la fila: se incrementa en cada UPDATE (se usa para los ETag)
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default="1",
+        onupdate=literal_column("version + 1"))
 
     # Se crea la relacion con el post (lado Uno)
     posts: Mapped[List["PostORM"]] = relationship(
@@ -28,3 +34,7 @@ class TagORM(Base):
         back_populates="tags",  # relacion con el post
         lazy="selectin",  # lazy loading
     )
+
+
+# Índice por expresión para buscar y ordenar por nombre sin distinguir mayúsculas
+Index("ix_tags_lower_name_id", func.lower(TagORM.name), TagORM.id)
@@ -1,11 +1,14 @@
 
-from typing import Optional
-from sqlalchemy import func, select
+from typing import Dict, Iterable, Optional
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
 
 from app.api.tag.schemas import TagPublic
 from app.api.tag.models import TagORM
 from app.services.pagination import paginate_query
+from app.services.response_cache import invalidate_on_commit
+from app.services.serialization import validate_items
+from app.core.async_db import AsyncDB
 
 
 class TagRepository:
@@ -17,32 +20,68 @@ class TagRepository:
     ########### Metodo para obtener una tag por su ID ###########
 
     def get_by_id(self, id: int) -> Optional[TagORM]:
-        return self.db.query(TagORM).filter(TagORM.id.ilike(id)).first()
+        return self.db.get(TagORM, id)
 
     ########### Metodo para obtener una tag por su nombre ###########
 
     def get_by_name(self, name: str) -> TagORM:
+        # Se compara con lower(name) para usar el índice ix_tags_lower_name_id
         tag_obj = self.db.execute(
-            select(TagORM).where(TagORM.name.ilike(name))
-        ).scalar_one_or_none()
+            select(TagORM).where(func.lower(TagORM.name) == name.strip().lower())
+        ).scalars().first()
 
         if tag_obj:
             return tag_obj
 
         tag_obj = TagORM(name=name)
         self.db.add(tag_obj)
+        invalidate_on_commit(self.db, "tags")
         # self.db.flush()
         return tag_obj
 
-    ########### Metodo para listar las tags ###########
-
-    def list_tags(
+    ########### Metodo para resolver muchos nombres de tags en una sola consulta ###########
+
+    def resolve_names(self, names: Iterable[str]) -> Dict[str, int]:
+        # La comparación es sin distinguir mayúsculas: el nombre en minúsculas es solo la clave
+        # y se guarda la primera escritura de cada nombre (sin espacios en los extremos)
+        # para insertar las faltantes
+        spellings: Dict[str, str] = {}
+        for name in names:
+            if name and name.strip():
+                spellings.setdefault(name.strip().lower(), name.strip())
+        if not spellings:
+            return {}
+
+        # Se obtienen las etiquetas existentes en una sola consulta
+        query = select(func.lower(TagORM.name), TagORM.id).where(
+            func.lower(TagORM.name).in_(spellings))
+        resolved = {name: tag_id for name, tag_id in self.db.execute(query)}
+
+        # Se insertan las etiquetas faltantes en lote (executemany) con su escritura original
+        missing = sorted(spellings.keys() - resolved.keys())
+        if missing:
+            rows = self.db.execute(
+                insert(TagORM).returning(func.lower(TagORM.name), TagORM.id,
+                                         sort_by_parameter_order=True),
+                [{"name": spellings[name]} for name in missing]
+            )
+            resolved.update({name: tag_id for name, tag_id in rows})
+            invalidate_on_commit(self.db, "tags")
+
+        # Se retorna el diccionario nombre normalizado -> id
+        return resolved
+
+    ########### Metodo para listar las tags (retorna la página con los objetos del ORM) ###########
+
+    def list_tags_page(
         self,
         search: Optional[str],
         order_by: str = "id",
         direction: str = "asc",
         page: int = 1,
-        per_page: int = 10
+        per_page: int = 10,
+        mode: str = "offset",
+        cursor: Optional[str] = None
     ):
         # Se crea la query
         query = select(TagORM)
@@ -67,12 +106,31 @@ class TagRepository:
             per_page=per_page,
             order_by=order_by,
             direction=direction,
-            allowed_order=allowed_order
+            allowed_order=allowed_order,
+            mode=mode,
+            cursor=cursor
         )
 
+        # Se retorna el resultado
+        return result
+
+    ########### Metodo para listar las tags ###########
+
+    def list_tags(
+        self,
+        search: Optional[str],
+        order_by: str = "id",
+        direction: str = "asc",
+        page: int = 1,
+        per_page: int = 10,
+        mode: str = "offset",
+        cursor: Optional[str] = None
+    ):
+        result = self.list_tags_page(search, order_by, direction, page,
+                                     per_page, mode, cursor)
+
         # Se mapea la query a TagPublic para que la respuesta sea un JSON
-        result["items"] = [TagPublic.model_validate(
-            item) for item in result["items"]]
+        result["items"] = validate_items(TagPublic, result["items"])
 
         # Se retorna el resultado
         return result
@@ -89,6 +147,7 @@ class TagRepository:
 
         # Se agrega la etiqueta a la base de datos
         self.db.add(tag)
+        invalidate_on_commit(self.db, "tags")
 
         # Se guardan los cambios en la base de datos
         self.db.flush()
@@ -105,6 +164,7 @@ class TagRepository:
         for key, value in update_data.items():
             setattr(tag, key, value)
 
+        invalidate_on_commit(self.db, "tags")
         print(tag)
         return tag
 
@@ -112,3 +172,66 @@ class TagRepository:
 
     def delete(self, tag: TagORM) -> None:
         self.db.delete(tag)
+        invalidate_on_commit(self.db, "tags")
+
+
+class AsyncTagRepository:
+
+    ########### Constructor ###########
+    def __init__(self, db: AsyncDB):
+        self.db = db
+
+    ########### Metodo para obtener una tag por su ID ###########
+
+    async def get_by_id(self, id: int) -> Optional[TagORM]:
+        return await self.db.get(TagORM, id)
+
+    ########### Metodo para obtener una tag por su nombre (se crea si no existe) ###########
+
+    async def get_by_name(self, name: str) -> TagORM:
+        # Se compara con lower(name) para usar el índice ix_tags_lower_name_id
+        tag_obj = (await self.db.execute(
+            select(TagORM).where(func.lower(TagORM.name) == name.strip().lower())
+        )).scalars().first()
+
+        if tag_obj:
+            return tag_obj
+
+        tag_obj = TagORM(name=name)
+        self.db.add(tag_obj)
+        invalidate_on_commit(self.db, "tags")
+        return tag_obj
+
+    ########### Metodo para listar las tags (la paginación se reutiliza) ###########
+
+    async def list_tags_page(self, **params):
+        return await self.db.run_sync(lambda db: TagRepository(db).list_tags_page(**params))
+
+    ########### Metodo para crear un tag ###########
+
+    async def create_tag(self, name: str) -> TagORM:
+        # Se normaliza el nombre de la etiqueta
+        tag = TagORM(name=name.strip().lower())
+
+        # Se agrega la etiqueta a la base de datos
+        self.db.add(tag)
+        invalidate_on_commit(self.db, "tags")
+        await self.db.flush()
+
+        # Se retorna la etiqueta
+        return tag
+
+    ########### Metodo para actualizar un tag ###########
+
+    async def update(self, tag: TagORM, update_data: dict) -> TagORM:
+        for key, value in update_data.items():
+            setattr(tag, key, value)
+
+        invalidate_on_commit(self.db, "tags")
+        return tag
+
+    ########### Metodo para eliminar un tag ###########
+
+    async def delete(self, tag: TagORM) -> None:
+        await self.db.delete(tag)
+        invalidate_on_commit(self.db, "tags")
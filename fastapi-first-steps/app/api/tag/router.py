@@ -1,13 +1,15 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
-from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from operator import ge
 
-from app.api.tag.repository import TagRepository
+from app.api.tag.repository import AsyncTagRepository
 from app.api.tag.schemas import TagCreate, TagPublic, TagUpdate
-from app.core.db import get_db
+from app.core.async_db import AsyncDB, get_async_db
 from app.core.security import get_current_user
+from app.services.etag import ConditionalRequest, row_version
+from app.services.response_cache import cached_listing
+from app.services.rate_limit import write_limit
 
 # Se crea el router para los endpoints de tags y se le asigna un prefijo y un tag para la documentación
 router = APIRouter(prefix="/tags", tags=["Tags"])
@@ -26,18 +28,27 @@ async def list_tags(
     order_by: str = Query("id", pattern="^(id|name)$"),
     direction: str = Query("asc", pattern="^(asc|desc)$"),
     search: str | None = Query(None),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    cursor: str | None = Query(None),
     # Se inyecta la sesión de la base de datos
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     # Se valida que el usuario este autenticado
-    user=Depends(get_current_user)
+    user=Depends(get_current_user),
+    # Se valida el If-None-Match del cliente
+    conditional: ConditionalRequest = Depends()
 ):
-    repository = TagRepository(db)
-    return repository.list_tags(
-        page=page,
-        per_page=per_page,
-        order_by=order_by,
-        direction=direction,
-        search=search
+    repository = AsyncTagRepository(db)
+    params = dict(page=page, per_page=per_page, order_by=order_by,
+                  direction=direction, search=search, mode=pagination, cursor=cursor)
+
+    # Se responde desde el cache (se invalida al crear, editar o eliminar tags)
+    return await cached_listing(
+        "tags",
+        params,
+        conditional,
+        load=lambda: repository.list_tags_page(**params),
+        schema=TagPublic,
+        item_version=row_version
     )
 
 
@@ -54,26 +65,32 @@ async def get_tag(tag_id: int = Path(
         description="Identificador del tag. Debe ser mayor o igual a 1",
         example=1),
     # Se inyecta la sesión de la base de datos
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     # Se valida que el usuario este autenticado
-    user=Depends(get_current_user)
+    user=Depends(get_current_user),
+    # Se valida el If-None-Match del cliente
+    conditional: ConditionalRequest = Depends()
 ):
     # Se crea el repositorio
-    repository = TagRepository(db)
+    repository = AsyncTagRepository(db)
 
     # Obtenemos el tag
-    tag = repository.get_by_id(tag_id)
+    tag = await repository.get_by_id(tag_id)
 
     # Si no se encuentra el tag, se lanza una excepción
     if not tag:
         raise HTTPException(status_code=404, detail="Tag no encontrado")
 
+    # Si el cliente ya tiene esta versión se responde 304
+    conditional.check("tag", tag.id, tag.version)
+
     # Se retorna el tag
     return tag
 
 
 # Endpoint para crear una nueva etiqueta
 @router.post("/",
+             dependencies=[Depends(write_limit)],
              response_model=TagPublic,
              response_description="Etiqueta creada exitosamente",
              status_code=status.HTTP_201_CREATED
@@ -81,42 +98,43 @@ async def get_tag(tag_id: int = Path(
 # Crear una nueva etiqueta con validación de usuario autenticado
 async def create_tag(tag: TagCreate,
                      # Se inyecta la sesión de la base de datos
-                     db: Session = Depends(get_db),
+                     db: AsyncDB = Depends(get_async_db),
                      # Se valida que el usuario este autenticado
                      user=Depends(get_current_user)
                      ):
 
     # Se crea el repositorio
-    repository = TagRepository(db)
+    repository = AsyncTagRepository(db)
 
     # Se intenta crear el tag
     try:
-        tag_created = repository.create_tag(
+        tag_created = await repository.create_tag(
             name=tag.name
         )
 
         # Se guardan los cambios en la base de datos
-        db.commit()
+        await db.commit()
 
         # Se refresca el tag
-        db.refresh(tag_created)
+        await db.refresh(tag_created)
 
         # Se retorna el tag creado
         return tag_created
 
     # Si ocurre un error, se lanza una excepción
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
 # Endpoint para actualizar una etiqueta
 @router.put("/{tag_id}",
+            dependencies=[Depends(write_limit)],
             response_model=TagPublic,
             response_description="Etiqueta actualizada exitosamente"
             )
@@ -125,15 +143,15 @@ async def update_tag(
     tag_id: int,
     payload: TagUpdate,
     # Se inyecta la sesión de la base de datos
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     # Se valida que el usuario este autenticado
     user=Depends(get_current_user)
 ):
     # Se crea el repositorio
-    repository = TagRepository(db)
+    repository = AsyncTagRepository(db)
 
     # Obtenemos el tag
-    tag = repository.get_by_id(tag_id)
+    tag = await repository.get_by_id(tag_id)
 
     # Si no se encuentra el tag, se lanza una excepción
     if not tag:
@@ -143,24 +161,24 @@ async def update_tag(
     # Se intenta actualizar el tag
     try:
         updates = payload.model_dump(exclude_unset=True)
-        tag = repository.update(tag, updates)
+        tag = await repository.update(tag, updates)
 
         # Se guardan los cambios en la base de datos
-        db.commit()
+        await db.commit()
 
         # Se refresca el tag
-        db.refresh(tag)
+        await db.refresh(tag)
 
         # Se retorna el tag
         return tag
 
     # Si ocurre un error, se lanza una excepción
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
@@ -172,15 +190,15 @@ async def update_tag(
 )
 async def delete_tag(tag_id: int,
                      # Se inyecta la sesión de la base de datos
-                     db: Session = Depends(get_db),
+                     db: AsyncDB = Depends(get_async_db),
                      # Se valida que el usuario este autenticado
                      user=Depends(get_current_user)):
 
     # Se crea el repositorio
-    repository = TagRepository(db)
+    repository = AsyncTagRepository(db)
 
     # Obtenemos el tag
-    tag = repository.get_by_id(tag_id)
+    tag = await repository.get_by_id(tag_id)
 
     # Si no se encuentra el tag, se lanza una excepción
     if not tag:
@@ -189,17 +207,17 @@ async def delete_tag(tag_id: int,
 
     # Se intenta eliminar el tag
     try:
-        repository.delete(tag)
+        await repository.delete(tag)
 
         # Se guardan los cambios en la base de datos
-        db.commit()
+        await db.commit()
 
     # Si ocurre un error, se lanza una excepción
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
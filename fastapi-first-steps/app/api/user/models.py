@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List, Literal, TYPE_CHECKING
 
-from sqlalchemy import Boolean, Enum, Integer, String, DateTime
+from sqlalchemy import Boolean, Enum, Integer, String, DateTime, literal_column
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.db import Base
@@ -19,6 +19,8 @@ Role = Literal["user", "editor", "admin"]
 # Se crea la clase UserORM para manejar los usuarios en la base de datos
 class UserORM(Base):
     __tablename__ = "users"
+    # La versión nueva se obtiene en el mismo UPDATE (RETURNING), sin expirar el atributo
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     surname: Mapped[str] = mapped_column(String(100), index=True)
@@ -31,5 +33,9 @@ class UserORM(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.now())
+    # Versión de la fila: se incrementa en cada UPDATE (se usa para los ETag de los posts)
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default="1",
+        onupdate=literal_column("version + 1"))
     # Se crea la relacion con el post (lado Uno)
     posts: Mapped[List["PostORM"]] = relationship(back_populates="user")
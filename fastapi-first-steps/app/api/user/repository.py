@@ -2,6 +2,7 @@
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.api.user.models import UserORM
+from app.core.async_db import AsyncDB
 
 
 class UserRepository:
@@ -56,3 +57,57 @@ class UserRepository:
 
     def delete(self, user: UserORM) -> None:
         self.db.delete(user)
+
+
+class AsyncUserRepository:
+
+    ########### Constructor ###########
+    def __init__(self, db: AsyncDB):
+        self.db = db
+
+    ########### Metodo para obtener un usuario por su id ###########
+
+    async def get(self, user_id: int) -> UserORM | None:
+        return await self.db.get(UserORM, user_id)
+
+    ########### Metodo para obtener un usuario por su email ###########
+
+    async def get_by_email(self, email: str) -> UserORM | None:
+        query = select(UserORM).where(UserORM.email == email)
+        return (await self.db.execute(query)).scalar_one_or_none()
+
+    ########### Metodo para obtener un usuario por su username ###########
+
+    async def get_by_username(self, username: str) -> UserORM | None:
+        query = select(UserORM).where(UserORM.username == username)
+        return (await self.db.execute(query)).scalar_one_or_none()
+
+    ########### Metodo para crear un usuario ###########
+
+    async def create(self, email: str, password: str, name: str, surname: str, username: str) -> UserORM:
+        db_user = UserORM(
+            email=email,
+            password=password,
+            name=name,
+            surname=surname,
+            username=username
+        )
+
+        # Guardamos el Objeto Usuario
+        self.db.add(db_user)
+        await self.db.flush()
+        await self.db.refresh(db_user)
+        return db_user
+
+    ########### Metodo para actualizar un usuario ###########
+
+    async def update(self, user: UserORM, update_data: dict) -> UserORM:
+        for key, value in update_data.items():
+            setattr(user, key, value)
+
+        return user
+
+    ########### Metodo para eliminar un usuario ###########
+
+    async def delete(self, user: UserORM) -> None:
+        await self.db.delete(user)
@@ -3,10 +3,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from .schemas import UserPublic
 from app.api.user.schemas import User
-from app.core.db import get_db
-from app.api.user.repository import UserRepository
-from app.core.security import get_current_user, hash_password
-from sqlalchemy.orm import Session
+from app.core.async_db import AsyncDB, get_async_db
+from app.api.user.repository import AsyncUserRepository
+from app.core.security import get_current_user, hash_password_async
+from app.services.rate_limit import auth_ip_limit
 
 router = APIRouter(prefix="/user", tags=["User"])
 
@@ -15,39 +15,41 @@ router = APIRouter(prefix="/user", tags=["User"])
 
 
 # Endpoint para registrar un nuevo usuario
-@router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
-def register(payload: User, db: Session = Depends(get_db)):
+# (limitado por IP: cada registro calcula el hash de la contraseña)
+@router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(auth_ip_limit)])
+async def register(payload: User, db: AsyncDB = Depends(get_async_db)):
 
     # Se crea el repositorio
-    repository = UserRepository(db)
+    repository = AsyncUserRepository(db)
 
     # Si el usuario ya existe, se lanza una excepción
-    if repository.get_by_email(payload.email):
+    if await repository.get_by_email(payload.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Ya existe un usuario con el email seleccionado, intente con otro"
         )
 
-    if repository.get_by_username(payload.username):
+    if await repository.get_by_username(payload.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Ya existe un usuario con el nombre de usuario seleccionado, intente con otro"
         )
 
     # Se crea el usuario
-    user = repository.create(
+    user = await repository.create(
         surname=payload.surname,
         name=payload.name,
         email=payload.email,
         username=payload.username,
-        password=hash_password(payload.password)
+        password=await hash_password_async(payload.password)
     )
 
     # Se guardan los cambios en la base de datos
-    db.commit()
+    await db.commit()
 
     # Se refresca el usuario
-    db.refresh(user)
+    await db.refresh(user)
 
     # Se retorna el usuario
     return User.model_validate(user)
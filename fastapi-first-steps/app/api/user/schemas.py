@@ -1,5 +1,20 @@
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, WithJsonSchema
+from pydantic.networks import validate_email
 from datetime import datetime
+from functools import lru_cache
+from typing import Annotated
+
+
+# Se valida y normaliza un email (igual que EmailStr) guardando el resultado:
+# en los listados el mismo autor se repite en cada post y email-validator es lento
+@lru_cache(maxsize=4096)
+def _validate_email(value: str) -> str:
+    return validate_email(value)[1]
+
+
+# Email validado (se documenta como EmailStr en OpenAPI)
+Email = Annotated[str, AfterValidator(_validate_email),
+                  WithJsonSchema({"type": "string", "format": "email"})]
 
 
 # Se crea el modelo de Pydantic para los autores
@@ -10,7 +25,7 @@ class User(BaseModel):
                          description="Apellido del usuario")
     name: str = Field(min_length=3, max_length=50,
                       description="Nombre del usuario")
-    email: EmailStr
+    email: Email
     username: str = Field(min_length=3, max_length=50,
                           description="Nombre de usuario")
     password: str = Field(min_length=6, max_length=255,
@@ -27,7 +42,7 @@ class User(BaseModel):
 # Se crea el modelo de Pydantic para la publicacion de usuarios
 class UserPublic(BaseModel):
     id: int
-    email: EmailStr
+    email: Email
     username: str
     model_config = ConfigDict(from_attributes=True)
 
@@ -0,0 +1,213 @@
+
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.profiler import RequestProfile
+
+# Logger del access log (no se propaga al logger raíz)
+logger = logging.getLogger("app.access")
+
+# Ids de request recibidos del cliente que se aceptan (si no, se genera uno)
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+# Formato JSON: una línea por request con los campos del access log
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = getattr(record, "access", None)
+        if entry is None:
+            entry = {"message": record.getMessage()}
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+# Handler que solo encola el registro: el formato y la escritura los hace el hilo del listener
+# Si la cola está llena se descarta la entrada en vez de bloquear el event loop
+class DroppingQueueHandler(QueueHandler):
+
+    ########### Constructor ###########
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# Datos del request que se completan durante el procesamiento (usuario autenticado)
+class RequestLog:
+
+    ########### Constructor ###########
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.user_id: Optional[int] = None
+
+
+# Datos del request actual (se propaga al threadpool con el contexto)
+current_request: ContextVar[Optional[RequestLog]] = ContextVar(
+    "current_request", default=None)
+
+
+# Se asocia el usuario autenticado al request actual
+def set_request_user(user_id: int) -> None:
+    request_log = current_request.get()
+    if request_log is not None:
+        request_log.user_id = user_id
+
+
+# Límite de entradas por segundo para cada ruta (las rutas con mucho tráfico no inundan el log)
+class RouteRateLimiter:
+
+    ########### Constructor ###########
+    def __init__(self, per_second: int):
+        self.per_second = per_second
+        # Ruta -> [inicio de la ventana, entradas escritas, entradas descartadas]
+        self._windows: Dict[str, list] = {}
+        self._lock = Lock()
+
+    ########### Metodo para verificar si se puede escribir (retorna las entradas descartadas antes) ###########
+
+    def allow(self, route: str) -> tuple[bool, int]:
+        if self.per_second <= 0:
+            return True, 0
+
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(route)
+            if window is None or now - window[0] >= 1.0:
+                suppressed = window[2] if window is not None else 0
+                self._windows[route] = [now, 1, 0]
+                return True, suppressed
+            if window[1] < self.per_second:
+                window[1] += 1
+                return True, 0
+            window[2] += 1
+            return False, 0
+
+
+# Access log estructurado: escribe en un hilo aparte a través de una cola
+class AccessLog:
+
+    ########### Constructor ###########
+    def __init__(self, sample_rate: float, slow_ms: float, route_rate: int,
+                 queue_size: int, path: str = ""):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.limiter = RouteRateLimiter(route_rate)
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+        self.path = path
+        self._listener: Optional[QueueListener] = None
+
+    ########### Metodo para iniciar el hilo que escribe el log ###########
+
+    def start(self) -> None:
+        if self._listener is not None:
+            return
+        output = logging.FileHandler(self.path, encoding="utf-8") if self.path \
+            else logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter())
+
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(self.handler)
+
+        self._listener = QueueListener(self.queue, output)
+        self._listener.start()
+
+    ########### Metodo para detener el hilo (escribe lo que quedó en la cola) ###########
+
+    def stop(self) -> None:
+        if self._listener is None:
+            return
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+        self._listener = None
+        logger.removeHandler(self.handler)
+
+    ########### Metodo para decidir si se escribe la entrada ###########
+
+    def should_log(self, status: int, latency_ms: float) -> bool:
+        # Los errores y los requests lentos se escriben siempre
+        if status >= 400 or latency_ms >= self.slow_ms:
+            return True
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    ########### Metodo para escribir la entrada de un request ###########
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        if not self.should_log(entry["status"], entry["latency_ms"]):
+            return
+        # Los requests sin ruta (404) se agrupan en una sola clave: con el path el diccionario
+        # de ventanas crecería sin límite con URLs aleatorias
+        allowed, suppressed = self.limiter.allow(entry["route"] or "unmatched")
+        # Los errores del servidor no se limitan
+        if not allowed and entry["status"] < 500:
+            return
+        if suppressed:
+            entry["suppressed"] = suppressed
+        logger.info("access", extra={"access": entry})
+
+
+# Se crea el access log de la aplicación
+access_log = AccessLog(
+    sample_rate=settings.ACCESS_LOG_SAMPLE_RATE,
+    slow_ms=settings.ACCESS_LOG_SLOW_MS,
+    route_rate=settings.ACCESS_LOG_ROUTE_RATE,
+    queue_size=settings.ACCESS_LOG_QUEUE_SIZE,
+    path=settings.ACCESS_LOG_FILE,
+)
+
+
+# Se obtiene el id del request (el del cliente si es válido, si no se genera uno)
+def request_id_from(scope) -> str:
+    request_id = _header(scope, b"x-request-id")
+    if request_id is None or not REQUEST_ID_PATTERN.match(request_id):
+        request_id = uuid.uuid4().hex
+    return request_id
+
+
+# Se arma la entrada del access log de un request terminado
+def access_entry(scope, request_log: RequestLog, status: int, elapsed: float,
+                 profile: RequestProfile) -> Dict[str, Any]:
+    route = scope.get("route")
+    return {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "request_id": request_log.request_id,
+        "method": scope["method"],
+        "route": getattr(route, "path", None),
+        "path": scope["path"],
+        "status": status,
+        "latency_ms": round(elapsed * 1000, 3),
+        "db_ms": round(profile.db_time * 1000, 3),
+        "queries": profile.queries,
+        "user_id": request_log.user_id,
+        "client": scope["client"][0] if scope.get("client") else None,
+    }
+
+
+# Se obtiene un header del request
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
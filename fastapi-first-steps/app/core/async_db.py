@@ -0,0 +1,146 @@
+
+import asyncio
+import os
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Union
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import DATABASE_URL, SessionLocal, engine
+from app.core.engine import create_async_db_engine
+
+# Drivers asíncronos por motor (psycopg 3 soporta async con el mismo dialecto)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+psycopg",
+    "postgresql+psycopg2": "postgresql+psycopg",
+}
+
+
+# Se obtiene la URL asíncrona a partir de la URL de la base de datos
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# Engine y sesiones asíncronas (solo se crean si se activa el modo async)
+async_engine: Optional[AsyncEngine] = None
+AsyncSessionLocal: Optional[async_sessionmaker[AsyncSession]] = None
+
+if settings.DATABASE_ASYNC:
+    # Se puede definir ASYNC_DATABASE_URL para usar otro driver, por ejemplo asyncpg
+    async_engine = create_async_db_engine(
+        os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL))
+    # Sin expirar al hacer commit: en async no se pueden cargar atributos de forma implícita
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False)
+
+
+# Cantidad de conexiones que puede entregar el pool de un engine síncrono
+def pool_capacity(bind: Engine = engine) -> int:
+    pool = bind.pool
+    size = pool.size() if hasattr(pool, "size") else 1
+    return max(1, size + max(getattr(pool, "_max_overflow", 0), 0))
+
+
+# Turnos de conexión por event loop y por engine para las sesiones del modo sync
+_pool_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[int, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def pool_slots(bind: Engine = engine) -> asyncio.Semaphore:
+    slots = _pool_slots.setdefault(asyncio.get_running_loop(), {})
+    if id(bind) not in slots:
+        slots[id(bind)] = asyncio.Semaphore(pool_capacity(bind))
+    return slots[id(bind)]
+
+
+# Sesión con la misma interfaz que AsyncSession sobre una Session síncrona
+# Cada operación se ejecuta en el threadpool, así el modo sync tampoco bloquea el event loop
+# La sesión espera su turno de conexión en el event loop (sin ocupar un hilo): si los hilos
+# esperaran conexión, bloquearían a las sesiones que ya tienen una y el pool se agotaría
+class ThreadedSession:
+
+    ########### Constructor ###########
+    def __init__(self, session: Session):
+        self.sync_session = session
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    ########### Metodo para ejecutar una operación de la sesión en el threadpool ###########
+
+    async def _call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if self._slots is None:
+            slots = pool_slots(self.sync_session.get_bind())
+            await slots.acquire()
+            self._slots = slots
+        return await run_in_threadpool(fn, *args, **kwargs)
+
+    @property
+    def info(self) -> dict:
+        return self.sync_session.info
+
+    def add(self, instance: Any) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances) -> None:
+        self.sync_session.add_all(instances)
+
+    async def run_sync(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return await self._call(fn, self.sync_session, *args, **kwargs)
+
+    async def execute(self, statement, *args: Any, **kwargs: Any):
+        return await self._call(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args: Any, **kwargs: Any):
+        return await self._call(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs: Any):
+        return await self._call(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance: Any) -> None:
+        await self._call(self.sync_session.delete, instance)
+
+    async def flush(self) -> None:
+        await self._call(self.sync_session.flush)
+
+    async def refresh(self, instance: Any, attribute_names=None) -> None:
+        await self._call(self.sync_session.refresh, instance, attribute_names)
+
+    async def commit(self) -> None:
+        await self._call(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await self._call(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        try:
+            await run_in_threadpool(self.sync_session.close)
+        finally:
+            # Se libera el turno de conexión
+            if self._slots is not None:
+                self._slots.release()
+                self._slots = None
+
+
+# Tipo de la sesión que reciben los repositorios asíncronos
+AsyncDB = Union[AsyncSession, ThreadedSession]
+
+
+# Conexión asíncrona con la base de datos (AsyncSession o Session en el threadpool)
+async def get_async_db() -> AsyncIterator[AsyncDB]:
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    db = ThreadedSession(SessionLocal(expire_on_commit=False))
+    try:
+        yield db
+    finally:
+        await db.close()
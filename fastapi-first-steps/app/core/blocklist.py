@@ -0,0 +1,209 @@
+
+import ipaddress
+import logging
+import os
+import tempfile
+import time
+from functools import lru_cache
+from threading import Event, Lock, Thread
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+# Se convierte una IP en (versión, entero) (None si no es una IP válida)
+# Las IPv6 con una IPv4 mapeada (::ffff:a.b.c.d) se tratan como IPv4
+@lru_cache(maxsize=4096)
+def parse_address(host: str) -> Optional[Tuple[int, int]]:
+    try:
+        address = ipaddress.ip_address(host.split("%", 1)[0])
+    except ValueError:
+        return None
+    if address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    return address.version, int(address)
+
+
+# Se convierte una entrada (IP o rango CIDR) en una red (ValueError si no es válida)
+def parse_network(entry: str) -> IPNetwork:
+    network = ipaddress.ip_network(entry.strip(), strict=False)
+    if network.version == 6 and network.network_address.ipv4_mapped is not None \
+            and network.prefixlen >= 96:
+        network = ipaddress.ip_network(
+            f"{network.network_address.ipv4_mapped}/{network.prefixlen - 96}")
+    return network
+
+
+# Tabla de prefijos inmutable: un set por largo de prefijo con las redes desplazadas
+# La búsqueda hace a lo sumo una consulta O(1) por cada largo de prefijo cargado
+# (máximo 33 en IPv4 y 129 en IPv6), sin importar cuántos rangos haya
+class PrefixTable:
+
+    ########### Constructor ###########
+    def __init__(self, networks: Iterable[IPNetwork] = ()):
+        tables: Dict[int, Dict[int, set]] = {4: {}, 6: {}}
+        self.size = 0
+        for network in networks:
+            bits = network.max_prefixlen - network.prefixlen
+            prefixes = tables[network.version].setdefault(bits, set())
+            before = len(prefixes)
+            prefixes.add(int(network.network_address) >> bits)
+            self.size += len(prefixes) - before
+
+        # (bits desplazados, prefijos) de los rangos más grandes a los más chicos
+        self._lookup: Dict[int, List[Tuple[int, frozenset]]] = {
+            version: [(bits, frozenset(prefixes))
+                      for bits, prefixes in sorted(table.items(), reverse=True)]
+            for version, table in tables.items()
+        }
+
+    ########### Metodo para verificar si una IP está en la tabla ###########
+
+    def contains(self, version: int, value: int) -> bool:
+        for bits, prefixes in self._lookup[version]:
+            if value >> bits in prefixes:
+                return True
+        return False
+
+    ########### Metodo para obtener los largos de prefijo cargados ###########
+
+    def prefix_lengths(self) -> Dict[str, List[int]]:
+        return {f"ipv{version}": [(32 if version == 4 else 128) - bits for bits, _ in lookup]
+                for version, lookup in self._lookup.items()}
+
+
+# Lista de IPs bloqueadas: se carga desde un archivo (una IP o rango CIDR por línea,
+# los comentarios empiezan con #) o desde el endpoint de administración
+# Al recargar se arma una tabla nueva y se reemplaza de una sola vez (los requests en
+# curso siguen usando la anterior, nunca ven una tabla a medio cargar)
+class IPBlocklist:
+
+    ########### Constructor ###########
+    def __init__(self, path: str = "", reload_interval: float = 5):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._table = PrefixTable()
+        self._mtime: Optional[float] = None
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        self.loaded_at: Optional[float] = None
+        self.invalid: List[str] = []
+        self.blocked = 0
+
+    ########### Metodo para verificar si una IP está bloqueada ###########
+
+    def __contains__(self, host: Optional[str]) -> bool:
+        if not host:
+            return False
+        address = parse_address(host)
+        if address is None or not self._table.contains(*address):
+            return False
+        self.blocked += 1
+        return True
+
+    ########### Metodo para reemplazar las entradas (retorna las que no son válidas) ###########
+
+    def replace(self, entries: Iterable[str]) -> List[str]:
+        networks, invalid = [], []
+        for entry in entries:
+            try:
+                networks.append(parse_network(entry))
+            except ValueError:
+                invalid.append(entry)
+
+        table = PrefixTable(networks)
+        with self._lock:
+            self._table = table
+            self.invalid = invalid
+            self.loaded_at = time.time()
+        logger.info("Lista de IPs bloqueadas cargada: %d rangos", table.size)
+        return invalid
+
+    ########### Metodo para recargar la lista desde el archivo ###########
+
+    def reload(self) -> List[str]:
+        if not self.path:
+            return []
+        with open(self.path, encoding="utf-8") as file:
+            mtime = os.fstat(file.fileno()).st_mtime
+            entries = [line.split("#", 1)[0].strip() for line in file]
+        invalid = self.replace(entry for entry in entries if entry)
+        self._mtime = mtime
+        for entry in invalid:
+            logger.warning("Entrada no válida en %s: %s", self.path, entry)
+        return invalid
+
+    ########### Metodo para guardar las entradas (en el archivo si hay uno configurado) ###########
+
+    def save(self, entries: List[str]) -> List[str]:
+        if not self.path:
+            return self.replace(entries)
+
+        # Se escribe un archivo temporal y se reemplaza el original de forma atómica
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".blocklist-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                file.writelines(f"{entry.strip()}\n" for entry in entries)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+        return self.reload()
+
+    ########### Metodo para recargar si el archivo cambió ###########
+
+    def reload_if_changed(self) -> None:
+        try:
+            if os.stat(self.path).st_mtime != self._mtime:
+                self.reload()
+        except OSError as e:
+            # Se mantiene la lista cargada hasta que el archivo se pueda leer
+            logger.warning("No se pudo leer la lista de IPs bloqueadas %s: %s", self.path, e)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.reload_interval):
+            self.reload_if_changed()
+
+    ########### Metodo para iniciar la recarga periódica del archivo ###########
+
+    def start(self) -> None:
+        if not self.path or self._thread is not None:
+            return
+        self.reload_if_changed()
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name="ip-blocklist", daemon=True)
+        self._thread.start()
+
+    ########### Metodo para detener la recarga periódica ###########
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.reload_interval)
+            self._thread = None
+
+    ########### Metodo para obtener el estado de la lista ###########
+
+    def status(self) -> Dict[str, Any]:
+        table = self._table
+        return {
+            "path": self.path or None,
+            "ranges": table.size,
+            "prefix_lengths": table.prefix_lengths(),
+            "invalid": self.invalid,
+            "loaded_at": self.loaded_at,
+            "blocked": self.blocked,
+        }
+
+
+# Se crea la lista de IPs bloqueadas de la aplicación
+ip_blocklist = IPBlocklist(
+    path=settings.IP_BLOCKLIST_FILE,
+    reload_interval=settings.IP_BLOCKLIST_RELOAD_SECONDS,
+)
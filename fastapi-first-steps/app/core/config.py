@@ -1,8 +1,103 @@
 import os
+from dotenv import load_dotenv
+
+# Se cargan las variables de entorno antes de leer la configuración
+load_dotenv()
 
 
 class settings():
+    # Modo de acceso a la base de datos: sesiones síncronas (por defecto) o AsyncSession
+    DATABASE_ASYNC: bool = os.getenv(
+        "DATABASE_ASYNC", "false").lower() in ("1", "true", "yes")
+
+    # Configuración del pool de conexiones (PostgreSQL)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv(
+        "DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+    # Configuración de las réplicas de lectura (URLs separadas por coma, segundos)
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    REPLICA_HEALTH_INTERVAL: float = float(
+        os.getenv("REPLICA_HEALTH_INTERVAL", "10"))
+    REPLICA_STICKY_SECONDS: float = float(
+        os.getenv("REPLICA_STICKY_SECONDS", "5"))
+    REPLICA_STICKY_SIZE: int = int(os.getenv("REPLICA_STICKY_SIZE", "10000"))
+
+    # Configuración del access log en JSON (ACCESS_LOG_FILE vacío = stdout)
+    ACCESS_LOG: bool = os.getenv(
+        "ACCESS_LOG", "true").lower() in ("1", "true", "yes")
+    ACCESS_LOG_FILE: str = os.getenv("ACCESS_LOG_FILE", "")
+    ACCESS_LOG_SAMPLE_RATE: float = float(
+        os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+    ACCESS_LOG_SLOW_MS: float = float(os.getenv("ACCESS_LOG_SLOW_MS", "1000"))
+    ACCESS_LOG_ROUTE_RATE: int = int(os.getenv("ACCESS_LOG_ROUTE_RATE", "100"))
+    ACCESS_LOG_QUEUE_SIZE: int = int(
+        os.getenv("ACCESS_LOG_QUEUE_SIZE", "10000"))
+
+    # Métricas en formato Prometheus (GET /metrics)
+    METRICS: bool = os.getenv("METRICS", "true").lower() in ("1", "true", "yes")
+
+    # Lista de IPs bloqueadas (archivo con una IP o rango CIDR por línea, se recarga al cambiar)
+    IP_BLOCKLIST_FILE: str = os.getenv("IP_BLOCKLIST_FILE", "")
+    IP_BLOCKLIST_RELOAD_SECONDS: float = float(
+        os.getenv("IP_BLOCKLIST_RELOAD_SECONDS", "5"))
+
+    # Configuración del perfilador de queries por request (solo para desarrollo)
+    SQL_PROFILER: bool = os.getenv(
+        "SQL_PROFILER", "false").lower() in ("1", "true", "yes")
+    SQL_QUERY_BUDGET: int = int(os.getenv("SQL_QUERY_BUDGET", "20"))
+    SQL_DUPLICATE_THRESHOLD: int = int(
+        os.getenv("SQL_DUPLICATE_THRESHOLD", "3"))
+    SQL_PROFILER_HISTORY: int = int(os.getenv("SQL_PROFILER_HISTORY", "100"))
+
+    # Configuración de SQLite (PRAGMA aplicados en cada conexión)
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT: int = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", "268435456"))
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", "-64000"))
+
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "change-me-in-prod")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = int(
         os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+
+    # Configuración del conteo de la paginación (exact | estimated | cached)
+    PAGINATION_COUNT_STRATEGY: str = os.getenv(
+        "PAGINATION_COUNT_STRATEGY", "exact")
+    PAGINATION_COUNT_TTL: int = int(os.getenv("PAGINATION_COUNT_TTL", "30"))
+    PAGINATION_COUNT_CACHE_SIZE: int = int(
+        os.getenv("PAGINATION_COUNT_CACHE_SIZE", "1024"))
+
+    # Configuración del cache de identidades (token -> usuario autenticado)
+    IDENTITY_CACHE_TTL: int = int(os.getenv("IDENTITY_CACHE_TTL", "60"))
+    IDENTITY_CACHE_SIZE: int = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+
+    # Configuración del pool de hashing de contraseñas (0 = según cantidad de CPUs)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    PASSWORD_HASH_MAX_PENDING: int = int(
+        os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+    # Configuración de idioma de la búsqueda de texto completo en PostgreSQL
+    SEARCH_TS_CONFIG: str = os.getenv("SEARCH_TS_CONFIG", "spanish")
+
+    # Configuración del cache de respuestas de los listados (memory | redis)
+    RESPONSE_CACHE_BACKEND: str = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+    RESPONSE_CACHE_TTL: int = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+    RESPONSE_CACHE_REDIS_URL: str = os.getenv(
+        "RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # Configuración del limitador de requests (memory | redis, límites "N/second|minute|hour|day")
+    RATE_LIMIT: bool = os.getenv(
+        "RATE_LIMIT", "true").lower() in ("1", "true", "yes")
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_REDIS_URL: str = os.getenv(
+        "RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+    RATE_LIMIT_SIZE: int = int(os.getenv("RATE_LIMIT_SIZE", "100000"))
+    RATE_LIMIT_AUTH_IP: str = os.getenv("RATE_LIMIT_AUTH_IP", "20/minute")
+    RATE_LIMIT_LOGIN_USER: str = os.getenv("RATE_LIMIT_LOGIN_USER", "5/minute")
+    RATE_LIMIT_WRITE: str = os.getenv("RATE_LIMIT_WRITE", "60/minute")
@@ -1,8 +1,9 @@
 from dotenv import load_dotenv
 import os
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
+from app.core.engine import create_db_engine
+
 
 load_dotenv()
 
@@ -15,18 +16,10 @@ else:
     print("Conectado a SQLite")
 
 
-# Se crea el engine de la base de datos
-engine_kwargs = {}
-
-
-# Si la base de datos es sqlite, se agrega el parametro check_same_thread
-if DATABASE_URL.startswith("sqlite"):
-    engine_kwargs["connect_args"] = {"check_same_thread": False}
-
-
 # se asocia el engine con la base de datos
-engine = create_engine(DATABASE_URL, **engine_kwargs)
-# engine = create_engine(DATABASE_URL, echo=True, future=True, **engine_kwargs)
+# (pool según la configuración y PRAGMA de WAL/busy_timeout en SQLite)
+engine = create_db_engine(DATABASE_URL)
+# engine = create_db_engine(DATABASE_URL, echo=True)
 
 
 # Se configuracion de la sesión de la base de datos
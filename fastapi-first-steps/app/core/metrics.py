@@ -0,0 +1,315 @@
+
+import math
+from bisect import bisect_left
+from threading import Lock, local
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from app.core.async_db import async_engine
+from app.core.db import engine
+from app.core.engine import pool_metrics, pool_status
+from app.core.profiler import RequestProfile
+from app.core.replicas import replica_router
+from app.services.hashing import password_hasher
+from app.services.rate_limit import rate_limiter
+from app.services.response_cache import response_cache
+
+# Límites (segundos) del histograma de latencia de los requests
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Tipo de contenido del formato de texto de Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Muestra de una métrica: (sufijo del nombre, etiquetas, valor)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+# Se escapa el valor de una etiqueta para el formato de texto
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Se formatea un número (enteros sin decimales, infinito como +Inf)
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+# Valores de las métricas de un hilo: solo ese hilo los modifica, así los incrementos no
+# necesitan lock (al exportar se copian los diccionarios, copia atómica bajo el GIL)
+class _Shard:
+    __slots__ = ("values", "histograms")
+
+    def __init__(self):
+        self.values: Dict[Tuple[str, tuple], float] = {}
+        self.histograms: Dict[Tuple[str, tuple], list] = {}
+
+
+# Métrica base: nombre, descripción y nombres de las etiquetas
+class Metric:
+    kind = "untyped"
+
+    ########### Constructor ###########
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str,
+                 labelnames: Tuple[str, ...] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _label_dict(self, labels: tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, labels))
+
+
+# Contador (solo aumenta)
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        values = self.registry.shard().values
+        key = (self.name, labels)
+        values[key] = values.get(key, 0) + amount
+
+    def samples(self, shards: List[dict]) -> List[Sample]:
+        totals: Dict[tuple, float] = {}
+        for values in shards:
+            for (name, labels), value in values.items():
+                if name == self.name:
+                    totals[labels] = totals.get(labels, 0) + value
+        return [("", self._label_dict(labels), value) for labels, value in sorted(totals.items())]
+
+
+# Gauge (sube y baja): cada hilo guarda su diferencia y al exportar se suman
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+# Histograma con límites fijos (se exporta acumulado, como espera Prometheus)
+class Histogram(Metric):
+    kind = "histogram"
+
+    ########### Constructor ###########
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str,
+                 labelnames: Tuple[str, ...] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels: tuple, value: float) -> None:
+        histograms = self.registry.shard().histograms
+        key = (self.name, labels)
+        counts = histograms.get(key)
+        if counts is None:
+            # Un contador por límite, uno para +Inf, la suma y la cantidad
+            counts = histograms[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+    def samples(self, shards: List[dict]) -> List[Sample]:
+        totals: Dict[tuple, list] = {}
+        for histograms in shards:
+            for (name, labels), counts in histograms.items():
+                if name != self.name:
+                    continue
+                total = totals.setdefault(labels, [0] * len(counts))
+                for index, count in enumerate(counts):
+                    total[index] += count
+        return [sample for labels, counts in sorted(totals.items())
+                for sample in histogram_samples(self._label_dict(labels), self.buckets,
+                                                counts[:-2], counts[-2], counts[-1])]
+
+
+# Muestras de un histograma a partir de los contadores por límite (no acumulados)
+def histogram_samples(labels: Dict[str, str], buckets: Iterable[float], counts: List[int],
+                      total: float, count: int) -> List[Sample]:
+    samples: List[Sample] = []
+    cumulative = 0
+    for bound, bucket_count in zip([*buckets, math.inf], counts):
+        cumulative += bucket_count
+        samples.append(("_bucket", {**labels, "le": _number(bound)}, cumulative))
+    samples.append(("_sum", labels, total))
+    samples.append(("_count", labels, count))
+    return samples
+
+
+# Registro de métricas del proceso: una parte (shard) por hilo y colectores que se
+# consultan al exportar (pool de conexiones, cache, etc.)
+class MetricsRegistry:
+
+    ########### Constructor ###########
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[tuple]]] = []
+        self._shards: List[_Shard] = []
+        self._local = local()
+        self._lock = Lock()
+
+    ########### Metodo para obtener el shard del hilo actual ###########
+
+    def shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            # Solo se toma el lock la primera vez que un hilo registra un valor
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _add(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    ########### Metodos para crear métricas ###########
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(self, name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(self, name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(self, name, help, labelnames, buckets))
+
+    ########### Metodo para registrar un colector ###########
+    # El colector retorna tuplas (nombre, tipo, descripción, [(sufijo, etiquetas, valor)])
+
+    def collector(self, fn: Callable[[], Iterable[tuple]]) -> Callable[[], Iterable[tuple]]:
+        self._collectors.append(fn)
+        return fn
+
+    ########### Metodo para exportar las métricas en formato de texto de Prometheus ###########
+
+    def render(self) -> str:
+        with self._lock:
+            shards = list(self._shards)
+        values = [dict(shard.values) for shard in shards]
+        histograms = [dict(shard.histograms) for shard in shards]
+
+        families = []
+        for metric in self._metrics:
+            data = histograms if metric.kind == "histogram" else values
+            families.append((metric.name, metric.kind, metric.help, metric.samples(data)))
+        for collect in self._collectors:
+            families.extend(collect())
+
+        lines = []
+        for name, kind, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Registro de métricas de la aplicación
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter(
+    "http_requests_total", "Requests atendidos", ("method", "route", "status"))
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "Latencia de los requests por ruta", ("method", "route"))
+IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "Requests en curso")
+DB_QUERIES = registry.counter(
+    "db_queries_total", "Queries ejecutadas por ruta", ("route",))
+DB_TIME = registry.counter(
+    "db_query_seconds_total", "Tiempo total en la base de datos por ruta", ("route",))
+
+
+# Plantilla de la ruta del request (los requests sin ruta se agrupan en una sola etiqueta)
+def route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+# Se registra un request terminado: cantidad, latencia y queries por ruta
+def record_request(method: str, route: str, status: int, elapsed: float,
+                   profile: RequestProfile) -> None:
+    REQUESTS.inc((method, route, str(status)))
+    REQUEST_LATENCY.observe((method, route), elapsed)
+    if profile.queries:
+        DB_QUERIES.inc((route,), profile.queries)
+        DB_TIME.inc((route,), profile.db_time)
+
+
+# Colector del estado de los pools de conexiones (primaria, async y réplicas)
+@registry.collector
+def collect_pools():
+    pools = [("primary", pool_status(engine))]
+    if async_engine is not None:
+        pools.append(("primary_async", pool_status(async_engine.sync_engine)))
+    for replica in replica_router.replicas:
+        pools.append((replica.name, pool_status(replica.engine)))
+
+    families = []
+    for key, help in (("size", "Tamaño del pool"),
+                      ("checked_out", "Conexiones en uso"),
+                      ("checked_in", "Conexiones libres en el pool"),
+                      ("overflow", "Conexiones de overflow abiertas")):
+        samples = [("", {"pool": name}, status[key])
+                   for name, status in pools if status and key in status]
+        families.append((f"db_pool_{key}", "gauge", help, samples))
+
+    wait = pool_metrics.stats()
+    families.append(("db_pool_checkout_wait_seconds", "histogram",
+                     "Espera para obtener una conexión del pool",
+                     histogram_samples({}, pool_metrics.buckets, list(wait["buckets"].values()),
+                                       wait["wait_total"], wait["checkouts"])))
+    families.append(("db_pool_checkout_timeouts_total", "counter",
+                     "Checkouts que superaron DB_POOL_TIMEOUT", [("", {}, wait["timeouts"])]))
+    families.append(("replica_healthy", "gauge", "Estado de las réplicas (1 = sana)",
+                     [("", {"replica": replica.name}, int(replica.healthy))
+                      for replica in replica_router.replicas]))
+    return families
+
+
+# Colector del cache de respuestas
+@registry.collector
+def collect_response_cache():
+    stats = response_cache.stats()
+    return [
+        ("response_cache_hits_total", "counter", "Aciertos del cache de respuestas",
+         [("", {"backend": stats["backend"]}, stats["hits"])]),
+        ("response_cache_misses_total", "counter", "Fallos del cache de respuestas",
+         [("", {"backend": stats["backend"]}, stats["misses"])]),
+    ]
+
+
+# Colector de los requests rechazados por el limitador
+@registry.collector
+def collect_rate_limits():
+    stats = rate_limiter.stats()
+    return [
+        ("rate_limited_total", "counter", "Requests rechazados por el limitador (429)",
+         [("", {"limit": name}, count) for name, count in sorted(stats["limited"].items())]),
+    ]
+
+
+# Colector del pool de hashing de contraseñas
+@registry.collector
+def collect_password_hasher():
+    stats = password_hasher.stats()
+    return [
+        ("password_hash_pending", "gauge", "Hashes en ejecución o en cola",
+         [("", {}, stats["active"] + stats["queued"])]),
+        ("password_hash_completed_total", "counter", "Hashes y verificaciones terminados",
+         [("", {}, stats["completed"])]),
+        ("password_hash_rejected_total", "counter", "Hashes rechazados por la cola llena (503)",
+         [("", {}, stats["rejected"])]),
+        ("password_hash_wait_seconds_total", "counter", "Tiempo total en la cola del pool",
+         [("", {}, stats["wait_seconds_total"])]),
+        ("password_hash_work_seconds_total", "counter", "Tiempo total de hashing",
+         [("", {}, stats["work_seconds_total"])]),
+    ]
@@ -1,11 +1,76 @@
 
 import time
-from urllib import response
-import uuid
-from fastapi import FastAPI, HTTPException, Request
+from typing import Optional
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
 
-BLACKLIST = {}
+from app.core.config import settings
+from app.core.access_log import (
+    AccessLog, RequestLog, access_entry, access_log, current_request, request_id_from)
+from app.core.blocklist import IPBlocklist, ip_blocklist
+from app.core.metrics import IN_FLIGHT, record_request, route_template
+from app.core.profiler import ensure_profile
+
+# Middleware ASGI de la aplicación: en una sola pasada por request
+# - bloquea las IPs y rangos de la lista de bloqueo (responde 403 sin llegar a la aplicación)
+# - agrega los headers X-Request-ID y X-Process-Time
+# - registra el request en el access log y en las métricas
+class RequestMiddleware:
+
+    ########### Constructor ###########
+    def __init__(self, app, blocklist: IPBlocklist = ip_blocklist,
+                 log: Optional[AccessLog] = access_log, metrics: bool = True):
+        self.app = app
+        self.blocklist = blocklist
+        self.log = log
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        request_log = RequestLog(request_id_from(scope))
+        request_token = current_request.set(request_log)
+        request_id = request_log.request_id.encode()
+
+        status = 500
+
+        async def send_with_headers(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Tiempo de procesamiento en segundos (numérico)
+                elapsed = time.perf_counter() - started_at
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id))
+                headers.append((b"x-process-time", f"{elapsed:.6f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        client_ip = scope["client"][0] if scope.get("client") else None
+        app = _forbidden if client_ip in self.blocklist else self.app
+
+        if self.metrics:
+            IN_FLIGHT.inc()
+        # Si el perfilador no abrió un perfil, se abre uno liviano para medir el tiempo de BD
+        with ensure_profile(scope) as profile:
+            try:
+                await app(scope, receive, send_with_headers)
+            finally:
+                current_request.reset(request_token)
+                elapsed = time.perf_counter() - started_at
+                if self.metrics:
+                    IN_FLIGHT.dec()
+                    record_request(scope["method"], route_template(scope), status, elapsed, profile)
+                if self.log is not None:
+                    self.log.write(access_entry(scope, request_log, status, elapsed, profile))
+
+
+# Respuesta para las IPs bloqueadas (se envía directo, sin lanzar HTTPException desde el middleware)
+_forbidden = JSONResponse({"detail": "Acceso denegado a esta IP"}, status_code=403)
 
 
 def register_middleware(app: FastAPI):
@@ -18,42 +83,9 @@ def register_middleware(app: FastAPI):
         allow_headers=["*"]
     )
 
-    # Middleware para medir el tiempo de respuesta
-    @app.middleware("http")
-    async def add_process_time_header(request: Request, call_next):
-        start = time.perf_counter()
-        response = await call_next(request)
-        # Se agrega el tiempo de respuesta en la cabecera
-        process_time = time.perf_counter() - start
-        response.headers["X-Process-Time"] = f"{process_time:.4f} segundos"
-        return response
-
-    # Middleware para registrar las peticiones
-    @app.middleware("http")
-    async def log_request(request: Request, call_next):
-        # Se imprimen los datos de la peticion
-        print(f"**ENTRADA: {request.method} {request.url} **")
-        response = await call_next(request)
-        # Se imprimen los datos de la respuesta
-        print(f"**SALIDA: {response.status_code} **")
-        return response
-
-    # Middleware para agregar un id a la peticion
-    @app.middleware("http")
-    async def add_request_id_header(request: Request, call_next):
-        # Se agrega un id a la peticion
-        request_id = str(uuid.uuid4())
-        response = await call_next(request)
-        # Se agrega el id a la cabecera de la respuesta
-        response.headers["X-Request-ID"] = request_id
-        return response
-
-    # Middleware para bloquear IPs
-    @app.middleware("http")
-    async def block_ip_middleware(request: Request, call_next):
-        # Se verifica si la IP esta en la lista negra
-        client_ip = request.client.host
-        if client_ip in BLACKLIST:
-            raise HTTPException(
-                status_code=403, detail="Acceso denegado a esta IP")
-        return await call_next(request)
+    # Middleware para bloquear IPs, agregar el id y el tiempo de respuesta y registrar las peticiones
+    app.add_middleware(
+        RequestMiddleware,
+        log=access_log if settings.ACCESS_LOG else None,
+        metrics=settings.METRICS,
+    )
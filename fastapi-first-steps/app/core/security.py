@@ -1,18 +1,22 @@
 
 from app.api.user.repository import UserRepository
 from datetime import datetime, timedelta, timezone
-from typing import Literal, Optional
+from typing import AsyncIterator, Literal, Optional
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi import Depends, HTTPException, status
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 import jwt
 from jwt.exceptions import ExpiredSignatureError, InvalidTokenError, PyJWTError
-from pwdlib import PasswordHash
 from app.core.config import settings
 from app.core.db import get_db
+from app.core.async_db import AsyncDB, get_async_db
+from app.core.replicas import bind_user, replica_router
+from app.core.access_log import set_request_user
 from app.api.user.models import UserORM
+from app.services.hashing import password_hasher
+from app.core.identity import UserSnapshot, identity_cache, token_expiration
 
-password_hash = PasswordHash.recommended()
 oauth2 = OAuth2PasswordBearer(tokenUrl="login")
 
 
@@ -56,15 +60,34 @@ def raise_forbidden():
     )
 
 
+# El hashing se ejecuta en un pool de hilos dedicado (ver app/services/hashing.py)
 def hash_password(plain: str) -> str:
-    return password_hash.hash(plain)
+    return password_hasher.hash(plain)
 
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return password_hash.verify(plain, hashed)
+    return password_hasher.verify(plain, hashed)
 
 
-async def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2)) -> UserORM:
+# Versiones asíncronas para endpoints "async def" (no bloquean el event loop)
+async def hash_password_async(plain: str) -> str:
+    return await password_hasher.hash_async(plain)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await password_hasher.verify_async(plain, hashed)
+
+
+async def get_current_user(db: AsyncDB = Depends(get_async_db), token: str = Depends(oauth2)) -> UserSnapshot:
+
+    # Si el token ya fue verificado, se retorna la identidad guardada en cache
+    # (evita decodificar el JWT y consultar la base de datos en cada request)
+    cached = identity_cache.get(token)
+    if cached is not None:
+        # Se asocia la sesión al usuario (si escribe, lee de la primaria por un tiempo)
+        bind_user(db, cached.user.id)
+        set_request_user(cached.user.id)
+        return cached.user
 
     # Se intenta decodificar el token
     try:
@@ -84,21 +107,52 @@ async def get_current_user(db: Session = Depends(get_db), token: str = Depends(o
     except PyJWTError:
         raise raise_invalid_credentials()
 
-    # Se obtiene el usuario
-    user = db.get(UserORM, user_id)
+    # Se valida el vencimiento del token (claim "expire")
+    expire = token_expiration(payload)
+    if expire is not None and expire <= datetime.now(timezone.utc):
+        raise raise_expired_token()
+
+    # Se obtiene el usuario (la generación se lee antes para no cachear una fila vieja)
+    generation = identity_cache.generation(user_id)
+    user = await db.get(UserORM, user_id)
 
     # Si no se encuentra el usuario o el usuario no esta activo, se lanza una excepcion
     if not user or not user.is_active:
         raise raise_invalid_credentials()
 
-    # Se retorna el usuario
-    return user
+    # Se guarda la identidad en cache y se retorna el snapshot del usuario
+    snapshot = UserSnapshot.from_orm(user)
+    identity_cache.set(token, payload, snapshot, generation)
+    bind_user(db, snapshot.id)
+    set_request_user(snapshot.id)
+    return snapshot
+
+
+# Conexión de solo lectura para el usuario autenticado
+# Se usa una réplica (round-robin entre las sanas) salvo que no haya réplicas
+# o que el usuario haya escrito hace poco (read-your-writes), en ese caso la primaria
+async def get_async_read_db(db: AsyncDB = Depends(get_async_db),
+                            user: UserSnapshot = Depends(get_current_user)) -> AsyncIterator[AsyncDB]:
+    replica = replica_router.pick(user.id)
+    if replica is None:
+        yield db
+        return
+
+    session = replica.async_session()
+    try:
+        yield session
+    except OperationalError:
+        # Si la réplica falla se saca de la rotación hasta el próximo chequeo
+        replica.mark_down()
+        raise
+    finally:
+        await session.close()
 
 
 async def auth2_token(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     repository = UserRepository(db)
     user = repository.get_by_email(form.username)
-    if not user or not verify_password(form.password, user.password):
+    if not user or not await verify_password_async(form.password, user.password):
         raise raise_invalid_credentials()
     token = create_access_token(subject=str(user.id))
     return {"access_token": token, "token_type": "bearer"}
@@ -107,8 +161,8 @@ async def auth2_token(form: OAuth2PasswordRequestForm = Depends(), db: Session =
 def require_role(min_role: Literal["user", "editor", "admin"]):
     order = {"user": 0, "editor": 1, "admin": 2}
 
-    def evaluation(user: UserORM = Depends(get_current_user)) -> UserORM:
-        if order[user["role"]] < order[min_role]:
+    def evaluation(user: UserSnapshot = Depends(get_current_user)) -> UserSnapshot:
+        if order.get(user.role, 0) < order[min_role]:
             raise raise_forbidden()
         return user
 
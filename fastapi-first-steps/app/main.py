@@ -1,6 +1,20 @@
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Response
+from sqlalchemy import text
+from app.core.config import settings
 from app.core.db import Base, engine
+from app.core.async_db import async_engine
+from app.core.engine import pool_metrics, pool_status
+from app.core.replicas import replica_router
+from app.core.profiler import SQLProfilerMiddleware, install_query_hooks, sql_profiler
+from app.core.access_log import access_log
+from app.core.security import require_admin
+from app.core.blocklist import ip_blocklist
+from app.core.metrics import CONTENT_TYPE, registry
+from app.core.middleware import register_middleware
+from app.services.hashing import password_hasher
+from app.services.search import setup_search
 from dotenv import load_dotenv
 
 # Routers
@@ -9,30 +23,93 @@ from app.api.user.router import router as user_router
 from app.api.post.router import router as post_router
 from app.api.tag.router import router as tag_router
 from app.api.category.router import router as category_router
+from app.api.admin.router import router as admin_router
 
 # Se cargan las variables de entorno
 load_dotenv()
 
 
+# Ciclo de vida de la aplicacion: chequeo de las réplicas, hilo del access log y cierre de las conexiones
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    replica_router.start()
+    ip_blocklist.start()
+    if settings.ACCESS_LOG:
+        access_log.start()
+    yield
+    await replica_router.stop()
+    ip_blocklist.stop()
+    access_log.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
 # Metodo para crear la aplicacion
 def create_app() -> FastAPI:
-    app = FastAPI(title="Mini Blog")
+    app = FastAPI(title="Mini Blog", lifespan=lifespan)
 
     # Se crean las tablas en la base de datos si no existen (solo en desarrollo)
     Base.metadata.create_all(bind=engine)
 
+    # Se crea el índice de búsqueda de texto completo (FTS5 o tsvector)
+    setup_search(engine)
+
+    # Middleware de la aplicación: CORS y una sola pasada por request con el bloqueo de IPs,
+    # el id del request, X-Process-Time, el access log en JSON y las métricas
+    # (se agrega antes que el perfilador para usar su tiempo de BD)
+    if settings.ACCESS_LOG or settings.METRICS:
+        install_query_hooks()
+    register_middleware(app)
+
+    # Perfilador de queries por request (Server-Timing y endpoint de debug)
+    if settings.SQL_PROFILER:
+        install_query_hooks()
+        app.add_middleware(SQLProfilerMiddleware)
+
+        # Endpoint para ver las queries de los últimos requests
+        # (flagged: solo los que superaron el presupuesto o repitieron sentencias)
+        # Solo para administradores: las sentencias pueden incluir datos de otros usuarios
+        @app.get("/debug/queries", include_in_schema=False, dependencies=[Depends(require_admin)])
+        def debug_queries(flagged: bool = False):
+            return {
+                "budget": sql_profiler.budget,
+                "duplicate_threshold": sql_profiler.duplicate_threshold,
+                "requests": sql_profiler.recent(only_flagged=flagged),
+            }
+
     # Se agregan los routers
     app.include_router(auth_router)
     app.include_router(user_router)
     app.include_router(post_router)
     app.include_router(tag_router)
     app.include_router(category_router)
+    app.include_router(admin_router)
 
     # Endpoint para la pagina de inicio
     @app.get("/")
     def home():
         return {"message": "Hola Mundo!"}
 
+    # Endpoint para verificar la base de datos y ver el estado del pool de conexiones
+    @app.get("/health/db")
+    def health_db():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return {
+            "status": "ok",
+            "pool": pool_status(engine),
+            "async_pool": pool_status(async_engine.sync_engine) if async_engine else None,
+            "checkout_wait": pool_metrics.stats(),
+            "replicas": replica_router.status(),
+            "password_hasher": password_hasher.stats(),
+        }
+
+    # Endpoint de métricas en formato de texto de Prometheus
+    if settings.METRICS:
+        @app.get("/metrics", include_in_schema=False)
+        def metrics():
+            return Response(registry.render(), media_type=CONTENT_TYPE)
+
     # Se retorna la aplicacion
     return app
 
@@ -0,0 +1,70 @@
+
+import hashlib
+from typing import Any, Callable, Optional, Tuple
+from fastapi import HTTPException, Request, Response, status
+
+# Los recursos son privados (requieren token): el cliente guarda la respuesta
+# pero debe revalidarla con If-None-Match antes de usarla
+CACHE_CONTROL = "private, no-cache"
+
+
+# Se arma un ETag débil a partir de las versiones de las filas
+# (el valor es un hash corto de la llave, no expone los datos)
+def weak_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+# Se compara el ETag con el header If-None-Match (comparación débil, RFC 9110)
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/")
+                  for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+# Headers que acompañan al ETag (en la respuesta completa y en el 304)
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+# Llave de versión de un item: (id, versión)
+def row_version(item) -> Tuple[int, int]:
+    return item.id, item.version
+
+
+# Llave de versión de una página: metadatos de la paginación + versión de cada item
+def page_version(result: dict, item_version: Callable[[Any], Any] = row_version) -> tuple:
+    meta = tuple(sorted((key, value)
+                 for key, value in result.items() if key != "items"))
+    return meta, tuple(item_version(item) for item in result["items"])
+
+
+# Request condicional: se inyecta como dependencia en los endpoints de lectura
+class ConditionalRequest:
+
+    ########### Constructor ###########
+    def __init__(self, request: Request, response: Response):
+        self.request = request
+        self.response = response
+
+    ########### Metodo para validar el ETag del recurso ###########
+
+    def check(self, *parts: Any) -> str:
+        return self.check_etag(weak_etag(*parts))
+
+    ########### Metodo para validar un ETag ya calculado ###########
+
+    def check_etag(self, etag: str) -> str:
+        # Si el cliente ya tiene esta versión se responde 304 sin armar el cuerpo
+        if etag_matches(self.request.headers.get("if-none-match"), etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers=etag_headers(etag))
+
+        # Si cambió, se envía el ETag nuevo junto con la respuesta completa
+        self.response.headers.update(etag_headers(etag))
+        return etag
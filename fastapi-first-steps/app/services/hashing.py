@@ -0,0 +1,125 @@
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict
+from fastapi import HTTPException, status
+from pwdlib import PasswordHash
+
+from app.core.config import settings
+
+
+# Servicio de hashing de contraseñas sobre un pool de hilos dedicado
+# Argon2 libera el GIL, por lo que los hilos del pool trabajan en paralelo
+# sin bloquear el event loop ni el threadpool de FastAPI
+class PasswordHasher:
+
+    ########### Constructor ###########
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._hasher = PasswordHash.recommended()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hash")
+        self._lock = Lock()
+        # Métricas del pool
+        self._pending = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._work_total = 0.0
+
+    ########### Metodo para reservar un lugar en la cola (503 si está llena) ###########
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Servicio de autenticación saturado, intente nuevamente",
+                    headers={"Retry-After": "1"}
+                )
+            self._pending += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+
+    ########### Metodo para envolver la tarea y medir espera y ejecución ###########
+
+    def _task(self, fn: Callable[..., Any], *args) -> Callable[[], Any]:
+        queued_at = time.perf_counter()
+
+        def run():
+            started_at = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished_at = time.perf_counter()
+                with self._lock:
+                    self._pending -= 1
+                    self._completed += 1
+                    self._wait_total += started_at - queued_at
+                    self._work_total += finished_at - started_at
+
+        return run
+
+    ########### Metodo para ejecutar una tarea desde código sincrónico ###########
+
+    def _run(self, fn: Callable[..., Any], *args) -> Any:
+        self._acquire()
+        return self._executor.submit(self._task(fn, *args)).result()
+
+    ########### Metodo para ejecutar una tarea sin bloquear el event loop ###########
+
+    async def _run_async(self, fn: Callable[..., Any], *args) -> Any:
+        self._acquire()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._task(fn, *args))
+
+    ########### Metodos para hashear y verificar contraseñas ###########
+
+    def hash(self, plain: str) -> str:
+        return self._run(self._hasher.hash, plain)
+
+    def verify(self, plain: str, hashed: str) -> bool:
+        return self._run(self._hasher.verify, plain, hashed)
+
+    async def hash_async(self, plain: str) -> str:
+        return await self._run_async(self._hasher.hash, plain)
+
+    async def verify_async(self, plain: str, hashed: str) -> bool:
+        return await self._run_async(self._hasher.verify, plain, hashed)
+
+    ########### Metodo para obtener las métricas del pool ###########
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self._completed
+            active = min(self._pending, self.max_workers)
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "active": active,
+                "queued": self._pending - active,
+                "peak_pending": self._peak_pending,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_total / completed * 1000, 3) if completed else 0.0,
+                "avg_work_ms": round(self._work_total / completed * 1000, 3) if completed else 0.0,
+                "wait_seconds_total": self._wait_total,
+                "work_seconds_total": self._work_total,
+            }
+
+    ########### Metodo para cerrar el pool ###########
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+# Se crea el servicio de hashing de la aplicación
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS or min(4, os.cpu_count() or 1),
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
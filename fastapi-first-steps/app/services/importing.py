@@ -0,0 +1,57 @@
+
+import json
+from typing import Any, AsyncIterator, Optional, Tuple
+from fastapi import HTTPException, Request, status
+
+# Tipos de contenido que se leen como NDJSON (un objeto JSON por línea)
+NDJSON_CONTENT_TYPES = {
+    "application/x-ndjson",
+    "application/ndjson",
+    "application/jsonl",
+    "application/json-lines",
+}
+
+
+# Se parsea una línea NDJSON y se retorna (objeto, error)
+def parse_line(line: bytes) -> Tuple[Any, Optional[str]]:
+    try:
+        return json.loads(line), None
+    except ValueError as e:
+        return None, f"JSON inválido: {e}"
+
+
+# Se leen los registros del body como NDJSON o como un arreglo JSON
+# Se retornan tuplas (índice, objeto, error) para poder informar errores por fila
+# NDJSON se procesa a medida que llega, sin cargar todo el body en memoria
+async def read_records(request: Request) -> AsyncIterator[Tuple[int, Any, Optional[str]]]:
+    content_type = request.headers.get(
+        "content-type", "").split(";")[0].strip().lower()
+
+    if content_type in NDJSON_CONTENT_TYPES:
+        index = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield (index, *parse_line(line))
+                    index += 1
+        if buffer.strip():
+            yield (index, *parse_line(buffer))
+        return
+
+    # Si no es NDJSON se espera un arreglo JSON
+    try:
+        data = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="JSON inválido")
+
+    if not isinstance(data, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Se esperaba un arreglo JSON o NDJSON")
+
+    for index, item in enumerate(data):
+        yield index, item, None
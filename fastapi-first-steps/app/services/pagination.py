@@ -1,9 +1,15 @@
 
+import base64
+import json
 from math import ceil
 from typing import Any, Optional, Dict
-from sqlalchemy import func, select
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, select
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.services.counting import count_query
+
 DEFAULT_PER_PAGE = 10
 MAX_PER_PAGE = 100
 
@@ -18,6 +24,34 @@ def sanitize_pagination(page: int = 1, per_page: int = DEFAULT_PER_PAGE):
     return page, per_page
 
 
+# Se codifica el cursor como un string opaco (base64 de un JSON)
+def encode_cursor(data: Dict[str, Any]) -> str:
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+# Se decodifica el cursor recibido desde el cliente
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        if not isinstance(data, dict) or not isinstance(data.get("id"), int):
+            raise ValueError(cursor)
+        return data
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+
+
+# Se obtiene la columna de ordenamiento permitida (con "id" como fallback)
+def resolve_order(model, order_by: Optional[str], allowed_order: Optional[Dict[str, Any]]):
+    if allowed_order and order_by in allowed_order:
+        return order_by, allowed_order[order_by]
+    if allowed_order and allowed_order.get("id") is not None:
+        return "id", allowed_order["id"]
+    return "id", model.id
+
+
 # Función para obtener los resultados paginados
 def paginate_query(
     db: Session,
@@ -27,17 +61,34 @@ def paginate_query(
     per_page: int = DEFAULT_PER_PAGE,
     order_by: Optional[str] = None,
     direction: str = "asc",
-    allowed_order: Optional[Dict[str, Any]] = None
+    allowed_order: Optional[Dict[str, Any]] = None,
+    mode: str = "offset",
+    cursor: Optional[str] = None,
+    count_strategy: Optional[str] = None
 ) -> Dict[str, Any]:
     page, per_page = sanitize_pagination(page, per_page)
     # Se crea la consulta base
     query = base_query if base_query is not None else select(model)
 
-    # Se obtiene el total de registros
-    total = db.scalar(select(func.count()).select_from(model)) or 0
+    # Si se pide el modo cursor (o se envía un cursor), se pagina por keyset
+    if mode == "cursor" or cursor:
+        return paginate_keyset(
+            db=db,
+            model=model,
+            base_query=query,
+            per_page=per_page,
+            order_by=order_by,
+            direction=direction,
+            allowed_order=allowed_order,
+            cursor=cursor
+        )
+
+    # Se obtiene el total de registros de la query filtrada
+    total = count_query(db, model, query, count_strategy)
 
     # Si no hay registros, se retorna un diccionario con la información de la paginación
-    if total == 0:
+    # (un total estimado o en cache puede estar desactualizado, por eso no se corta)
+    if total == 0 and (count_strategy or settings.PAGINATION_COUNT_STRATEGY) == "exact":
         return {"total": 0, "pages": 0, "page": page, "per_page": per_page, "items": []}
 
     # Si se especifica un ordenamiento y se permite el ordenamiento
@@ -69,3 +120,97 @@ def paginate_query(
         "per_page": per_page,
         "items": items
     }
+
+
+# Función para obtener los resultados paginados por cursor (keyset)
+# El costo es el mismo en la primera página y en la página 10.000,
+# porque se filtra por la última fila vista en vez de usar OFFSET
+def paginate_keyset(
+    db: Session,
+    model,
+    base_query=None,
+    per_page: int = DEFAULT_PER_PAGE,
+    order_by: Optional[str] = None,
+    direction: str = "asc",
+    allowed_order: Optional[Dict[str, Any]] = None,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    _, per_page = sanitize_pagination(1, per_page)
+    query = base_query if base_query is not None else select(model)
+    direction = "desc" if direction == "desc" else "asc"
+
+    # Se obtiene la columna de ordenamiento y el id como desempate
+    order_key, col = resolve_order(model, order_by, allowed_order)
+    pk = model.id
+    by_pk = order_key == "id"
+
+    # Se decodifica el cursor y se valida que corresponda al mismo ordenamiento
+    state = decode_cursor(cursor) if cursor else None
+    if state and (state.get("o") != order_key or state.get("d") != direction):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+    backwards = bool(state and state.get("b"))
+
+    # Si se recorre hacia atrás se invierte el orden y luego se reordena el resultado
+    descending = (direction == "desc") != backwards
+
+    # Se filtra a partir de la fila ancla del cursor
+    # El cursor guarda el valor de ordenamiento de la fila ancla: si esa fila se elimina
+    # o deja de cumplir el filtro, la página siguiente sigue siendo correcta
+    if state:
+        last_id = state["id"]
+        if by_pk:
+            query = query.where(pk < last_id if descending else pk > last_id)
+        else:
+            anchor = state.get("v")
+            if not isinstance(anchor, (str, int, float)) or isinstance(anchor, bool):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+            if descending:
+                query = query.where(
+                    or_(col < anchor, and_(col == anchor, pk < last_id)))
+            else:
+                query = query.where(
+                    or_(col > anchor, and_(col == anchor, pk > last_id)))
+
+    # Se ordena por la columna y por el id para que el orden sea estable
+    orders = [] if by_pk else [col.desc() if descending else col.asc()]
+    orders.append(pk.desc() if descending else pk.asc())
+
+    # Se pide un elemento extra para saber si existe otra página
+    # El valor de ordenamiento se obtiene junto con cada fila (se guarda en el cursor)
+    query = query.order_by(None).order_by(*orders).limit(per_page + 1)
+    if by_pk:
+        rows = [(item, item.id) for item in db.execute(query).scalars().all()]
+    else:
+        rows = [tuple(row) for row in db.execute(query.add_columns(col)).all()]
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+    items = [item for item, _ in rows]
+
+    # Se arman los cursores de la página siguiente y de la anterior
+    def make_cursor(row, back: bool) -> str:
+        item, value = row
+        data = {"o": order_key, "d": direction, "id": item.id, "b": back}
+        if not by_pk:
+            data["v"] = value
+        return encode_cursor(data)
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or backwards:
+            next_cursor = make_cursor(rows[-1], False)
+        if state and (has_more or not backwards):
+            prev_cursor = make_cursor(rows[0], True)
+
+    # Se retorna la información de la paginación
+    return {
+        "per_page": per_page,
+        "order_by": order_key,
+        "direction": direction,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        "items": items
+    }
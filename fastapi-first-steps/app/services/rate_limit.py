@@ -0,0 +1,269 @@
+
+import logging
+import math
+import time
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+from fastapi import Depends, HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.identity import UserSnapshot
+from app.core.security import get_current_user
+from app.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Períodos válidos en los límites ("5/minute", "100/hour")
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Algoritmos disponibles
+# - token_bucket: permite ráfagas de hasta N requests y repone N por período
+# - sliding_window: como mucho N requests en cualquier ventana del período (aproximada
+#   con el contador de la ventana actual y el de la anterior ponderado)
+ALGORITHMS = ("token_bucket", "sliding_window")
+
+
+# Se convierte un límite "N/período" en (cantidad, segundos)
+def parse_rate(spec: str) -> Tuple[int, float]:
+    amount, _, period = spec.partition("/")
+    if period not in PERIODS:
+        raise ValueError(f"Límite no válido: {spec!r} (se espera N/second|minute|hour|day)")
+    return int(amount), float(PERIODS[period])
+
+
+# Segundos a esperar en una ventana deslizante (0 si el request está permitido)
+def sliding_window_wait(current: int, previous: int, elapsed: float,
+                        rate: int, per: float) -> float:
+    if previous * (1 - elapsed / per) + current + 1 <= rate:
+        return 0.0
+    if current + 1 > rate:
+        # Hay que esperar a la próxima ventana, donde la actual pasa a ser la anterior
+        return per - elapsed + max(0.0, per * (1 - (rate - 1) / current))
+    # Momento en que el peso de la ventana anterior baja lo suficiente
+    return per * (1 - (rate - 1 - current) / previous) - elapsed
+
+
+# Backend en memoria del proceso (cada worker lleva su propia cuenta)
+# El estado de cada llave se descarta al vencer el período o por LRU si hay demasiadas
+class MemoryBackend:
+    name = "memory"
+
+    ########### Constructor ###########
+    def __init__(self, maxsize: int):
+        self._state = TTLCache(maxsize=maxsize)
+        self._lock = Lock()
+
+    ########### Metodo para consumir un token del bucket (retorna los segundos a esperar) ###########
+
+    def token_bucket(self, key: str, rate: int, per: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None:
+                tokens = float(rate)
+            else:
+                tokens, updated_at = state
+                tokens = min(float(rate), tokens + (now - updated_at) * rate / per)
+
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) * per / rate
+            self._state.set(key, (tokens, now), ttl=per)
+        return wait
+
+    ########### Metodo para contar un request en la ventana deslizante (retorna los segundos a esperar) ###########
+
+    def sliding_window(self, key: str, rate: int, per: float) -> float:
+        now = time.time()
+        window = int(now // per)
+        with self._lock:
+            state = self._state.get(key)
+            current, previous = 0, 0
+            if state is not None:
+                if state[0] == window:
+                    current, previous = state[1], state[2]
+                elif state[0] == window - 1:
+                    previous = state[1]
+
+            wait = sliding_window_wait(current, previous, now - window * per, rate, per)
+            # Los requests rechazados no se cuentan
+            if not wait:
+                self._state.set(key, (window, current + 1, previous), ttl=2 * per)
+        return wait
+
+    def clear(self) -> None:
+        self._state.clear()
+
+
+# Token bucket en Redis: el estado (tokens, última actualización) en un hash por llave
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local per = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+if tokens == nil then
+    tokens = rate
+else
+    tokens = math.min(rate, tokens + (now - tonumber(state[2])) * rate / per)
+end
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) * per / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(per * 1000))
+return tostring(wait)
+"""
+
+# Ventana deslizante en Redis: un contador por ventana fija (llave:número de ventana)
+SLIDING_WINDOW_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local per = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local window = math.floor(now / per)
+local elapsed = now - window * per
+local current_key = KEYS[1] .. ':' .. window
+local current = tonumber(redis.call('GET', current_key) or '0')
+local previous = tonumber(redis.call('GET', KEYS[1] .. ':' .. (window - 1)) or '0')
+if previous * (1 - elapsed / per) + current + 1 <= rate then
+    redis.call('INCR', current_key)
+    redis.call('PEXPIRE', current_key, math.ceil(per * 2000))
+    return '0'
+end
+if current + 1 > rate then
+    return tostring(per - elapsed + math.max(0, per * (1 - (rate - 1) / current)))
+end
+return tostring(per * (1 - (rate - 1 - current) / previous) - elapsed)
+"""
+
+
+# Backend Redis (o compatible): la cuenta se comparte entre workers e instancias
+# Cada operación es un script Lua (atómico, con el reloj del servidor)
+# Si Redis no responde se deja pasar el request (no se bloquea el servicio por el limitador)
+class RedisBackend:
+    name = "redis"
+
+    ########### Constructor ###########
+    def __init__(self, url: str, prefix: str = "rate-limit"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._token_bucket = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._sliding_window = self.client.register_script(SLIDING_WINDOW_SCRIPT)
+        self._errors = redis.RedisError
+
+    def _run(self, script, key: str, rate: int, per: float) -> float:
+        try:
+            return float(script(keys=[f"{self.prefix}:{key}"], args=[rate, per]))
+        except self._errors as e:
+            logger.warning("No se pudo consultar el limitador de requests: %s", e)
+            return 0.0
+
+    def token_bucket(self, key: str, rate: int, per: float) -> float:
+        return self._run(self._token_bucket, key, rate, per)
+
+    def sliding_window(self, key: str, rate: int, per: float) -> float:
+        return self._run(self._sliding_window, key, rate, per)
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(f"{self.prefix}:*"):
+            self.client.delete(key)
+
+
+# Limitador de requests: aplica los límites sobre el backend y cuenta los rechazos
+class RateLimiter:
+
+    ########### Constructor ###########
+    def __init__(self, backend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.limited: Dict[str, int] = {}
+        self._lock = Lock()
+
+    ########### Metodo para registrar un request (retorna los segundos a esperar, 0 = permitido) ###########
+
+    def hit(self, name: str, key: str, rate: int, per: float, algorithm: str) -> float:
+        if not self.enabled or rate <= 0:
+            return 0.0
+        check = getattr(self.backend, algorithm)
+        wait = check(f"{name}:{key}", rate, per)
+        if wait > 0:
+            with self._lock:
+                self.limited[name] = self.limited.get(name, 0) + 1
+        return wait
+
+    ########### Metodo para obtener las estadísticas ###########
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            limited = dict(self.limited)
+        return {"backend": self.backend.name, "enabled": self.enabled, "limited": limited}
+
+
+# Se crea el backend configurado (si Redis no está disponible se usa memoria)
+def create_backend():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        try:
+            return RedisBackend(settings.RATE_LIMIT_REDIS_URL)
+        except ImportError:
+            logger.warning(
+                "El paquete redis no está instalado, se usa el limitador en memoria")
+    return MemoryBackend(maxsize=settings.RATE_LIMIT_SIZE)
+
+
+# Se crea el limitador de requests de la aplicación
+rate_limiter = RateLimiter(create_backend(), enabled=settings.RATE_LIMIT)
+
+
+# Límite de requests por IP del cliente: se usa como dependencia
+# (Depends(limite)) o se llama a check() con otra llave (por ejemplo el usuario del login)
+class RateLimit:
+
+    ########### Constructor ###########
+    def __init__(self, name: str, spec: str, algorithm: str = "token_bucket",
+                 limiter: RateLimiter = rate_limiter):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Algoritmo no válido: {algorithm!r}")
+        self.name = name
+        self.rate, self.per = parse_rate(spec)
+        self.algorithm = algorithm
+        self.limiter = limiter
+
+    ########### Metodo para verificar el límite (lanza 429 con Retry-After si se superó) ###########
+
+    def check(self, key: Optional[str]) -> None:
+        wait = self.limiter.hit(self.name, key or "unknown", self.rate, self.per, self.algorithm)
+        if wait > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Demasiadas solicitudes, intente nuevamente más tarde",
+                headers={"Retry-After": str(max(1, math.ceil(wait)))}
+            )
+
+    async def __call__(self, request: Request) -> None:
+        self.check(request.client.host if request.client else None)
+
+
+# Límite de requests por usuario autenticado
+class UserRateLimit(RateLimit):
+
+    async def __call__(self, user: UserSnapshot = Depends(get_current_user)) -> None:
+        self.check(str(user.id))
+
+
+# Límites de la aplicación
+# - auth_ip_limit: login y registro por IP (cada intento cuesta un hash de contraseña)
+# - login_user_limit: intentos de login por nombre de usuario (ataques desde muchas IPs)
+# - write_limit: creación y edición por usuario
+auth_ip_limit = RateLimit("auth-ip", settings.RATE_LIMIT_AUTH_IP)
+login_user_limit = RateLimit("login-user", settings.RATE_LIMIT_LOGIN_USER,
+                             algorithm="sliding_window")
+write_limit = UserRateLimit("write", settings.RATE_LIMIT_WRITE)
@@ -0,0 +1,260 @@
+
+import json
+import logging
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Optional, Type
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.cache import TTLCache
+from app.services.etag import ConditionalRequest, etag_headers, page_version, weak_etag
+from app.services.serialization import render_page
+
+logger = logging.getLogger(__name__)
+
+# Llave de session.info con los namespaces a invalidar cuando la sesión hace commit
+PENDING_KEY = "response_cache_pending"
+
+
+# Respuesta guardada en el cache: ETag + cuerpo JSON ya serializado
+@dataclass(frozen=True)
+class CachedResponse:
+    etag: str
+    body: bytes
+
+    ########### Metodo para empaquetar la respuesta (para backends de bytes) ###########
+
+    def pack(self) -> bytes:
+        return self.etag.encode() + b"\n" + self.body
+
+    ########### Metodo para desempaquetar una respuesta guardada ###########
+
+    @classmethod
+    def unpack(cls, raw: bytes) -> "CachedResponse":
+        etag, _, body = raw.partition(b"\n")
+        return cls(etag=etag.decode(), body=body)
+
+
+# Backend en memoria del proceso (LRU con TTL)
+class MemoryBackend:
+    name = "memory"
+
+    ########### Constructor ###########
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, namespace: str, key: str) -> Optional[CachedResponse]:
+        return self._cache.get((namespace, key))
+
+    def set(self, namespace: str, key: str, value: CachedResponse) -> None:
+        self._cache.set((namespace, key), value)
+
+    def invalidate(self, namespace: str) -> None:
+        self._cache.delete_where(lambda key: key[0] == namespace)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def size(self) -> int:
+        return len(self._cache)
+
+
+# Backend Redis (o compatible): un hash por namespace, así invalidar es un solo DEL
+# El tamaño lo limita la política de memoria del servidor (maxmemory-policy)
+class RedisBackend:
+    name = "redis"
+
+    ########### Constructor ###########
+    def __init__(self, url: str, ttl: float, prefix: str = "response-cache"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = int(ttl)
+        self.prefix = prefix
+        self._errors = redis.RedisError
+
+    def _key(self, namespace: str) -> str:
+        return f"{self.prefix}:{namespace}"
+
+    def get(self, namespace: str, key: str) -> Optional[CachedResponse]:
+        try:
+            raw = self.client.hget(self._key(namespace), key)
+        except self._errors as e:
+            logger.warning("No se pudo leer el cache de respuestas: %s", e)
+            return None
+        return CachedResponse.unpack(raw) if raw is not None else None
+
+    def set(self, namespace: str, key: str, value: CachedResponse) -> None:
+        try:
+            # El vencimiento se fija al crear el hash (nx) para que el TTL no se renueve
+            pipe = self.client.pipeline()
+            pipe.hset(self._key(namespace), key, value.pack())
+            pipe.expire(self._key(namespace), self.ttl, nx=True)
+            pipe.execute()
+        except self._errors as e:
+            logger.warning("No se pudo guardar en el cache de respuestas: %s", e)
+
+    def invalidate(self, namespace: str) -> None:
+        try:
+            self.client.delete(self._key(namespace))
+        except self._errors as e:
+            logger.warning("No se pudo invalidar el cache de respuestas: %s", e)
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(f"{self.prefix}:*"):
+            self.client.delete(key)
+
+    def size(self) -> int:
+        return sum(self.client.hlen(key)
+                   for key in self.client.scan_iter(f"{self.prefix}:*"))
+
+
+# Cache de respuestas por (namespace, parámetros normalizados) con contadores de aciertos
+class ResponseCache:
+
+    ########### Constructor ###########
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        # Generación por namespace: evita guardar una respuesta armada antes de una invalidación
+        self._generations: Dict[str, int] = {}
+        self._lock = Lock()
+
+    ########### Metodo para normalizar los parámetros en una llave ###########
+
+    @staticmethod
+    def make_key(params: Dict[str, Any]) -> str:
+        # Se descartan los parámetros vacíos y la búsqueda se compara sin mayúsculas
+        normalized = {key: value for key, value in params.items()
+                      if value is not None and value != ""}
+        if isinstance(normalized.get("search"), str):
+            normalized["search"] = normalized["search"].strip().lower()
+        return json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+
+    ########### Metodo para obtener la generación actual de un namespace ###########
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    ########### Metodo para obtener una respuesta del cache ###########
+
+    def get(self, namespace: str, params: Dict[str, Any]) -> Optional[CachedResponse]:
+        value = self.backend.get(namespace, self.make_key(params))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    ########### Metodo para guardar una respuesta (si no hubo invalidación mientras se armaba) ###########
+
+    def set(self, namespace: str, params: Dict[str, Any], value: CachedResponse,
+            generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self.generation(namespace):
+            return
+        self.backend.set(namespace, self.make_key(params), value)
+
+    ########### Metodo para invalidar uno o más namespaces ###########
+
+    def invalidate(self, *namespaces: str) -> None:
+        for namespace in namespaces:
+            with self._lock:
+                self._generations[namespace] = self.generation(namespace) + 1
+            self.backend.invalidate(namespace)
+
+    ########### Metodo para vaciar el cache ###########
+
+    def clear(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+        self.backend.clear()
+
+    ########### Metodo para obtener las estadísticas del cache ###########
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "size": self.backend.size(),
+        }
+
+
+# Se crea el backend configurado (si Redis no está disponible se usa memoria)
+def create_backend():
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        try:
+            return RedisBackend(settings.RESPONSE_CACHE_REDIS_URL,
+                                ttl=settings.RESPONSE_CACHE_TTL)
+        except ImportError:
+            logger.warning(
+                "El paquete redis no está instalado, se usa el cache en memoria")
+    return MemoryBackend(maxsize=settings.RESPONSE_CACHE_SIZE,
+                         ttl=settings.RESPONSE_CACHE_TTL)
+
+
+# Se crea el cache de respuestas de la aplicación
+response_cache = ResponseCache(create_backend())
+
+
+# Se marcan namespaces para invalidar cuando la sesión confirme la transacción
+# (si se invalida antes del commit, otro request podría volver a cachear datos viejos)
+def invalidate_on_commit(db: Session, *namespaces: str) -> None:
+    db.info.setdefault(PENDING_KEY, set()).update(namespaces)
+
+
+# Se invalidan los namespaces marcados después de cada commit de cualquier sesión
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    namespaces = session.info.pop(PENDING_KEY, None)
+    if namespaces:
+        response_cache.invalidate(*namespaces)
+
+
+# Se responde un listado desde el cache o se arma, se guarda y se responde
+# - load: obtiene la página con los objetos del ORM
+# - schema: schema público de los items
+# - item_version: si el modelo tiene versión, el ETag se valida antes de mapear la página
+async def cached_listing(
+    namespace: str,
+    params: Dict[str, Any],
+    conditional: ConditionalRequest,
+    load: Callable[[], Awaitable[dict]],
+    schema: Type[BaseModel],
+    item_version: Optional[Callable[[Any], Any]] = None
+) -> Response:
+    entry = response_cache.get(namespace, params)
+
+    if entry is None:
+        generation = response_cache.generation(namespace)
+        result = await load()
+
+        # Con versiones se responde 304 antes de mapear la página
+        etag = None
+        if item_version is not None:
+            etag = conditional.check(namespace, page_version(result, item_version))
+
+        # Se mapea y se serializa la página una sola vez
+        body = render_page(result, schema)
+
+        # Sin versiones el ETag se calcula con el cuerpo de la respuesta
+        if etag is None:
+            etag = weak_etag(namespace, body)
+
+        entry = CachedResponse(etag=etag, body=body)
+        response_cache.set(namespace, params, entry, generation=generation)
+
+    # Si el cliente ya tiene esta versión se responde 304
+    conditional.check_etag(entry.etag)
+
+    return Response(content=entry.body, media_type="application/json",
+                    headers=etag_headers(entry.etag))
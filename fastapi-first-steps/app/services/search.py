@@ -0,0 +1,164 @@
+
+import logging
+import re
+from typing import List, Optional, Tuple
+from sqlalchemy import Engine, false, func, literal_column, or_, select, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Modos de búsqueda soportados
+# - fulltext: todas las palabras (índice de texto completo)
+# - prefix: todas las palabras como prefijo ("fast" encuentra "fastapi")
+# - contains: LIKE sobre el título (modo anterior, sin índice)
+SEARCH_MODES = ("fulltext", "prefix", "contains")
+
+# Motor de búsqueda activo ("fts5", "postgres" o None si no hay índice)
+search_backend: Optional[str] = None
+
+
+# Índice FTS5 con contenido externo: los textos se leen desde la tabla posts
+# y los triggers mantienen el índice sincronizado con cada INSERT/UPDATE/DELETE
+SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        title, content,
+        content='posts', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF title, content ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO posts_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+]
+
+
+# Columna tsvector generada por PostgreSQL (se mantiene sola) con índice GIN
+# El título pesa más que el contenido en el ranking
+def postgres_fts_ddl(config: str) -> List[str]:
+    return [
+        f"""
+        ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('{config}'::regconfig, coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('{config}'::regconfig, coalesce(content, '')), 'B')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING GIN (search_vector)",
+    ]
+
+
+# Configuración de idioma de PostgreSQL (solo se aceptan identificadores)
+def ts_config() -> str:
+    config = settings.SEARCH_TS_CONFIG
+    return config if re.fullmatch(r"\w+", config) else "simple"
+
+
+# Se crea el índice de texto completo según el motor de la base de datos
+def setup_search(engine: Engine) -> Optional[str]:
+    global search_backend
+    dialect = engine.dialect.name
+
+    try:
+        with engine.begin() as conn:
+            if dialect == "sqlite":
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'posts_fts'"
+                )).first()
+                for statement in SQLITE_FTS_DDL:
+                    conn.execute(text(statement))
+                # Si el índice es nuevo, se indexan los posts existentes
+                if not exists:
+                    conn.execute(
+                        text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"))
+                search_backend = "fts5"
+
+            elif dialect == "postgresql":
+                for statement in postgres_fts_ddl(ts_config()):
+                    conn.execute(text(statement))
+                search_backend = "postgres"
+
+            else:
+                search_backend = None
+    except SQLAlchemyError as e:
+        # Si el motor no soporta el índice, se usa la búsqueda con LIKE
+        logger.warning("No se pudo crear el índice de búsqueda: %s", e)
+        search_backend = None
+
+    return search_backend
+
+
+# Se separan las palabras de la búsqueda (se descartan los operadores)
+def search_terms(search: str) -> List[str]:
+    return re.findall(r"\w+", search, flags=re.UNICODE)
+
+
+# Se arma la consulta MATCH de FTS5 (cada palabra entre comillas)
+def fts5_query(terms: List[str], prefix: bool) -> str:
+    return " ".join(f'"{term}"*' if prefix else f'"{term}"' for term in terms)
+
+
+# Se arma la consulta to_tsquery de PostgreSQL
+def tsquery_text(terms: List[str], prefix: bool) -> str:
+    return " & ".join(f"{term}:*" if prefix else term for term in terms)
+
+
+# Se aplica la búsqueda a una query de posts
+# Retorna la query filtrada y la expresión de ranking (None si no hay ranking)
+# El ranking es "menor es más relevante" para que el orden ascendente muestre primero
+# los mejores resultados
+def apply_post_search(query, model, search: Optional[str], mode: str = "fulltext") -> Tuple[object, Optional[object]]:
+    if not search:
+        return query, None
+
+    # Modo anterior o sin índice disponible: LIKE sobre título y contenido
+    if mode == "contains" or search_backend is None:
+        if mode == "contains":
+            return query.where(model.title.contains(search)), None
+        return query.where(or_(model.title.contains(search),
+                               model.content.contains(search))), None
+
+    terms = search_terms(search)
+    if not terms:
+        return query.where(false()), None
+
+    prefix = mode == "prefix"
+
+    if search_backend == "fts5":
+        # Se unen los posts con las coincidencias del índice (rank = bm25, negativo)
+        matches = (
+            select(literal_column("rowid").label("post_id"),
+                   literal_column("rank").label("rank"))
+            .select_from(text("posts_fts"))
+            .where(text("posts_fts MATCH :fts_query").bindparams(
+                fts_query=fts5_query(terms, prefix)))
+            .subquery("fts")
+        )
+        query = query.join(matches, matches.c.post_id == model.id)
+        return query, matches.c.rank
+
+    # PostgreSQL: tsvector @@ tsquery usando el índice GIN
+    vector = literal_column(f"{model.__tablename__}.search_vector")
+    config = literal_column(f"'{ts_config()}'::regconfig")
+    tsquery = func.to_tsquery(config, tsquery_text(terms, prefix))
+    query = query.where(vector.op("@@")(tsquery))
+    return query, -func.ts_rank(vector, tsquery)
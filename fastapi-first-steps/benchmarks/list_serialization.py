@@ -0,0 +1,143 @@
+
+# Benchmark de la serialización de una página de posts (GET /posts)
+# - antes: PostPublic.model_validate por item (con EmailStr en el autor), retorno de un dict
+#   con response_model=dict (FastAPI lo vuelve a validar y serializar) y JSONResponse (json)
+# - email con cache: lo mismo con el schema actual (el email del autor se valida una vez)
+# - después: page_response (TypeAdapter de List[PostPublic] y FastJSONResponse con orjson)
+#
+# Uso (desde fastapi-first-steps): python -m benchmarks.list_serialization [requests] [items]
+# Los posts son objetos del ORM armados una vez en memoria y los requests se envían
+# directo a la aplicación ASGI, igual que en middleware_overhead
+
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Optional
+
+# Base de datos en memoria: el benchmark no ejecuta queries
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi import FastAPI  # noqa: E402
+from pydantic import EmailStr  # noqa: E402
+
+from app.api.category.models import CategoryORM  # noqa: E402
+from app.api.post.models import PostORM  # noqa: E402
+from app.api.post.schemas import PostPublic  # noqa: E402
+from app.api.tag.models import TagORM  # noqa: E402
+from app.api.user.models import UserORM  # noqa: E402
+from app.api.user.schemas import User  # noqa: E402
+from app.services import serialization  # noqa: E402
+from app.services.serialization import page_response  # noqa: E402
+from benchmarks.middleware_overhead import call  # noqa: E402
+
+
+# Schemas anteriores (el email del autor se validaba con email-validator en cada post)
+class LegacyUser(User):
+    email: EmailStr
+
+
+class LegacyPostPublic(PostPublic):
+    user: Optional[LegacyUser] = None
+
+
+# Posts del ORM (con usuario, categoría y tags) como los retorna el repositorio
+def build_posts(items: int) -> list:
+    user = UserORM(id=1, surname="Pérez", name="Ana", email="ana@example.com",
+                   username="ana", password="x" * 60, role="user", is_active=True,
+                   created_at=datetime(2024, 1, 1))
+    category = CategoryORM(id=1, name="Backend", slug="backend")
+    tags = [TagORM(id=1, name="python"), TagORM(id=2, name="fastapi")]
+    return [PostORM(id=index, title=f"Post {index}", content="Contenido del post " * 20,
+                    user=user, category=category, tags=tags)
+            for index in range(1, items + 1)]
+
+
+# Aplicación con el endpoint de antes, el de ahora y uno sin items (referencia)
+def create_bench_app(items: int) -> FastAPI:
+    app = FastAPI()
+    posts = build_posts(items)
+
+    def page(items: list) -> dict:
+        return {"total": len(items) * 10, "pages": 10, "page": 1, "per_page": len(items),
+                "items": list(items)}
+
+    @app.get("/before", response_model=dict)
+    async def before():
+        result = page(posts)
+        result["items"] = [LegacyPostPublic.model_validate(item) for item in result["items"]]
+        return result
+
+    @app.get("/cached-email", response_model=dict)
+    async def cached_email():
+        result = page(posts)
+        result["items"] = [PostPublic.model_validate(item) for item in result["items"]]
+        return result
+
+    @app.get("/after", response_model=dict)
+    async def after():
+        return page_response(page(posts), PostPublic)
+
+    @app.get("/empty", response_model=dict)
+    async def empty():
+        return page([])
+
+    return app
+
+
+# Cuerpo de la respuesta de un request
+async def body(app, path: str) -> bytes:
+    chunks = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    await app(scope, receive, send)
+    return b"".join(chunks)
+
+
+# Microsegundos promedio por request
+async def measure(app, path: str, requests: int) -> float:
+    for _ in range(min(requests, 50)):
+        await call(app, path)
+    started_at = time.perf_counter()
+    for _ in range(requests):
+        await call(app, path)
+    return (time.perf_counter() - started_at) / requests * 1_000_000
+
+
+async def main(requests: int, items: int) -> None:
+    app = create_bench_app(items)
+
+    # Las dos versiones tienen que responder el mismo JSON
+    assert json.loads(await body(app, "/before")) == json.loads(await body(app, "/after"))
+
+    base = await measure(app, "/empty", requests)
+    before = await measure(app, "/before", requests)
+    cached_email = await measure(app, "/cached-email", requests)
+    after = await measure(app, "/after", requests)
+
+    encoder = "orjson" if serialization.orjson is not None else "json (orjson no instalado)"
+    print(f"{requests} requests por caso, {items} posts por página, {encoder}")
+    print(f"{'sin items':<16} {base:10.1f} µs/request")
+    for name, micros in (("antes", before), ("email con cache", cached_email),
+                         ("después", after)):
+        print(f"{name:<16} {micros:10.1f} µs/request   serialización {micros - base:10.1f} µs")
+    print(f"mejora: {(before - base) / (after - base):.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+                     int(sys.argv[2]) if len(sys.argv) > 2 else 100))
@@ -0,0 +1,140 @@
+
+# Benchmark del costo por request de los middlewares
+# - sin middleware: la aplicación sola (referencia)
+# - antes: los cuatro @app.middleware("http") (BaseHTTPMiddleware) de register_middleware
+# - después: RequestMiddleware (ASGI puro, una sola pasada)
+#
+# Uso (desde fastapi-first-steps): python -m benchmarks.middleware_overhead [requests]
+# Los requests se envían directo a la aplicación ASGI, sin servidor ni cliente HTTP
+
+import asyncio
+import contextlib
+import os
+import sys
+import time
+import uuid
+
+# Base de datos en memoria: el benchmark no ejecuta queries
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi import FastAPI, HTTPException, Request  # noqa: E402
+
+from app.core.access_log import AccessLog  # noqa: E402
+from app.core.blocklist import IPBlocklist  # noqa: E402
+from app.core.middleware import RequestMiddleware  # noqa: E402
+
+BLACKLIST = {"10.0.0.1"}
+
+
+# Aplicación mínima con una sola ruta
+def create_bench_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    return app
+
+
+# Middlewares anteriores (tiempo, log, id del request y bloqueo de IPs)
+def add_legacy_middleware(app: FastAPI) -> None:
+
+    @app.middleware("http")
+    async def add_process_time_header(request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        process_time = time.perf_counter() - start
+        response.headers["X-Process-Time"] = f"{process_time:.4f} segundos"
+        return response
+
+    @app.middleware("http")
+    async def log_request(request: Request, call_next):
+        print(f"**ENTRADA: {request.method} {request.url} **")
+        response = await call_next(request)
+        print(f"**SALIDA: {response.status_code} **")
+        return response
+
+    @app.middleware("http")
+    async def add_request_id_header(request: Request, call_next):
+        request_id = str(uuid.uuid4())
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+    @app.middleware("http")
+    async def block_ip_middleware(request: Request, call_next):
+        if request.client.host in BLACKLIST:
+            raise HTTPException(status_code=403, detail="Acceso denegado a esta IP")
+        return await call_next(request)
+
+
+# Se envía un request GET directo a la aplicación ASGI y se retorna el estado
+async def call(app, path: str = "/ping", client: str = "127.0.0.1") -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"bench")],
+        "client": (client, 50000), "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+# Microsegundos promedio por request
+async def measure(app, requests: int) -> float:
+    for _ in range(min(requests, 200)):
+        await call(app)
+    started_at = time.perf_counter()
+    for _ in range(requests):
+        await call(app)
+    return (time.perf_counter() - started_at) / requests * 1_000_000
+
+
+async def main(requests: int) -> None:
+    plain = create_bench_app()
+
+    legacy = create_bench_app()
+    add_legacy_middleware(legacy)
+
+    # El access log escribe en /dev/null desde su hilo, igual que en producción
+    log = AccessLog(sample_rate=1.0, slow_ms=1000, route_rate=0,
+                    queue_size=requests * 2, path=os.devnull)
+    log.start()
+    blocklist = IPBlocklist()
+    blocklist.replace(BLACKLIST)
+    pipeline = create_bench_app()
+    pipeline.add_middleware(RequestMiddleware, blocklist=blocklist, log=log)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = [(name, await measure(app, requests)) for name, app in
+                   (("sin middleware", plain), ("antes", legacy), ("después", pipeline))]
+    log.stop()
+
+    base = results[0][1]
+    print(f"{requests} requests por caso")
+    for name, micros in results:
+        print(f"{name:<16} {micros:8.1f} µs/request   overhead {micros - base:8.1f} µs")
+
+    # IP bloqueada: el pipeline responde 403, el middleware anterior lanza HTTPException
+    # fuera de los manejadores de excepciones (el servidor responde 500)
+    try:
+        legacy_status = await call(legacy, client="10.0.0.1")
+    except Exception as e:
+        legacy_status = type(e).__name__
+    print(f"IP bloqueada: antes {legacy_status}, "
+          f"después {await call(pipeline, client='10.0.0.1')}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
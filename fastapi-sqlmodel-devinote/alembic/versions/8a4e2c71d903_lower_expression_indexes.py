@@ -0,0 +1,37 @@
+"""Lower expression indexes
+
+Revision ID: 8a4e2c71d903
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-17 12:50:00.000000
+
+"""
+from typing import Sequence, Union
+
+# Se importa sqlmodel para que se pueda usar en el script
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4e2c71d903'
+down_revision: Union[str, Sequence[str], None] = '3f1c9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Índices por expresión lower(...) para los ordenamientos sin distinguir
+    # mayúsculas (autogenerate no los detecta en todos los motores)
+    op.create_index('ix_note_lower_title_id', 'note',
+                    [sa.text('lower(title)'), 'id'], unique=False)
+    op.create_index('ix_label_lower_name_id', 'label',
+                    [sa.text('lower(name)'), 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_label_lower_name_id', table_name='label')
+    op.drop_index('ix_note_lower_title_id', table_name='note')
@@ -0,0 +1,38 @@
+"""Row version columns
+
+Revision ID: c71e5a9b3f08
+Revises: 8a4e2c71d903
+Create Date: 2026-10-17 13:35:00.000000
+
+"""
+from typing import Sequence, Union
+
+# Se importa sqlmodel para que se pueda usar en el script
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71e5a9b3f08'
+down_revision: Union[str, Sequence[str], None] = '8a4e2c71d903'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Versión de la fila para los ETag (las filas existentes quedan en 1)
+    op.add_column('note', sa.Column('version', sa.Integer(),
+                                    server_default='1', nullable=False))
+    op.add_column('label', sa.Column('version', sa.Integer(),
+                                     server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Sin batch: en SQLite la tabla se recrearía y se perderían los índices por expresión
+    # (ix_*_lower_*_id). SQLite >= 3.35 soporta DROP COLUMN
+    op.drop_column('label', 'version')
+    op.drop_column('note', 'version')
@@ -6,36 +6,47 @@ from app.core.dependencies import DBSession
 from app.api.auth.repository import UserRepository
 from app.api.auth.service import AuthService
 from app.api.auth.model import UserCreate, UserRead
+from app.services.rate_limit import auth_ip_limit, login_user_limit
 
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
-@router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
+# Registro (limitado por IP: cada registro calcula el hash de la contraseña)
+@router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(auth_ip_limit)])
 def register(payload: UserCreate, db: DBSession):
     service = AuthService(UserRepository(db))
     return service.register(payload)
 
 
-@router.post("/login")
+# Login (límite por IP y por nombre de usuario antes de verificar la contraseña)
+@router.post("/login", dependencies=[Depends(auth_ip_limit)])
 def login(username: str, password: str, db: DBSession):
+    login_user_limit.check(username.lower())
     try:
         service = AuthService(UserRepository(db))
         token = service.login(username, password)
         return {"access_token": token, "token_type": "bearer"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
 
 
-@router.post("/token")
+# Login con formulario OAuth2 (mismos límites que /login)
+@router.post("/token", dependencies=[Depends(auth_ip_limit)])
 def login(db: DBSession, form: OAuth2PasswordRequestForm = Depends()):
+    login_user_limit.check(form.username.lower())
     try:
         username = form.username
         password = form.password
         service = AuthService(UserRepository(db))
         token = service.login(username, password)
         return {"access_token": token, "token_type": "bearer"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
@@ -45,17 +45,17 @@ class AuthService:
         # Verificar si el usuario existe
         user = self.repo.get_by_username(username)
 
-        # Se genera el payload del usuario
-        user_login = {
-            "id": user.id,  # type: ignore
-            "username": user.username,  # type: ignore
-        }
-
         # Se verifica que el usuario exista y que la contraseña sea correcta
         if not user or not verify_password(password, user.password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
 
+        # Se genera el payload del usuario
+        user_login = {
+            "id": user.id,
+            "username": user.username,
+        }
+
         # Generar el token
         token = create_access_token(data=user_login)
         return token
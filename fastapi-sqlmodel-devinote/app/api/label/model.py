@@ -1,7 +1,7 @@
 
 
 from datetime import datetime
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index, UniqueConstraint, func, literal_column
 from sqlmodel import SQLModel, Field
 
 
@@ -17,10 +17,17 @@ class Label(SQLModel, table=True):
     id: int = Field(default=None, primary_key=True)
     name: str = Field(index=True, min_length=1, max_length=50)
     created_at: datetime = Field(default=datetime.now())
+    # Versión de la fila: se incrementa en cada UPDATE (se usa para los ETag)
+    version: int = Field(default=1, sa_column_kwargs={
+        "server_default": "1", "onupdate": literal_column("version + 1")})
     # Relación con el usuario
     owner_id: int = Field(foreign_key="user.id", index=True)
 
 
+# Índice por expresión para ordenar por nombre sin distinguir mayúsculas
+Index("ix_label_lower_name_id", func.lower(Label.name), Label.id)
+
+
 # Modelo de etiqueta de nota (tabla intermedia)
 class NoteLabelLink(SQLModel, table=True):
 
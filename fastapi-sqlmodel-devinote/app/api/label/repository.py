@@ -1,12 +1,21 @@
 from __future__ import annotations
 
 from app.api.label.model import NoteLabelLink
-from sqlmodel import Session, select, delete
+from sqlmodel import Session, select, delete, func, update
+from app.api.note.model import Note
 from app.api.label.model import Label, LabelRead
 from app.api.share.model import LabelShare
 from app.services.pagination import paginate_query
+from app.services.serialization import validate_items
+from app.services.trigram import apply_trigram_search, trigram_index
 from typing import Optional
 
+# Cantidad máxima de IDs por consulta IN
+IN_BATCH_SIZE = 500
+
+# Índice de trigramas de los nombres (se usa solo si el motor no tiene pg_trgm)
+trigram_index(Label, "name")
+
 
 # Repositorio de etiquetas
 class LabelRepository:
@@ -15,12 +24,18 @@ class LabelRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    # Listar las etiquetas de un usuario
-    def list_by_user(self, owner_id: int) -> list[Label]:
+    # Listar las etiquetas de un usuario (opcionalmente filtradas por similitud)
+    def list_by_user(self, owner_id: int, search: Optional[str] = None) -> list[Label]:
+        query = select(Label).where(Label.owner_id == owner_id)
+        query, rank = apply_trigram_search(query, Label, "name", search, db=self.db)
+
+        # Si hay búsqueda se ordena por similitud, si no por nombre
+        if rank is not None:
+            query = query.order_by(rank, Label.name.asc())  # type: ignore
+        else:
+            query = query.order_by(Label.name.asc())  # type: ignore
+
         # Se retorna la lista de etiquetas
-        query = select(Label).where(
-            Label.owner_id == owner_id).order_by(
-                Label.name.asc())  # type: ignore
         return self.db.exec(query).all()  # type: ignore
 
     # Obtiene una etiqueta por su ID
@@ -42,22 +57,24 @@ class LabelRepository:
             order_by: str,
             direction: str,
             page: int,
-            per_page: int
+            per_page: int,
+            mode: str = "offset",
+            cursor: Optional[str] = None
     ):
 
-        # Se retorna la lista de notas
-        query = select(Label)
-
-        # Se retorna la lista de notas filtrada por la búsqueda
-        if search:
-            query = query.where(Label.name.startswith(search))
+        # Se retorna la lista de etiquetas filtrada por similitud del nombre
+        query, rank = apply_trigram_search(select(Label), Label, "name", search)
 
         # Se definen los ordenamientos permitidos en la paginación
         allowed_order = {
             "id": Label.id,
-            "name": Label.name.lower(),
+            "name": func.lower(Label.name),
         }
 
+        # Si hay ranking de similitud se permite ordenar por "rank"
+        if rank is not None:
+            allowed_order["rank"] = rank
+
         # Se ejecuta la query con la paginación
         result = paginate_query(
             db=self.db,
@@ -67,12 +84,13 @@ class LabelRepository:
             per_page=per_page,
             order_by=order_by,
             direction=direction,
-            allowed_order=allowed_order
+            allowed_order=allowed_order,
+            mode=mode,
+            cursor=cursor
         )
 
         # Se mapea la query a LabelRead para que la respuesta sea un JSON
-        result["items"] = [LabelRead.model_validate(
-            item) for item in result["items"]]
+        result["items"] = validate_items(LabelRead, result["items"])
 
         # Se retorna el resultado
         return result
@@ -99,6 +117,10 @@ class LabelRepository:
 
     # Elimina una etiqueta
     def delete(self, label: Label) -> None:
+        # Se incrementa la versión de las notas que pierden la etiqueta (cambia su ETag)
+        self.db.exec(update(Note).where(Note.id.in_(  # type: ignore
+            select(NoteLabelLink.note_id).where(NoteLabelLink.label_id == label.id)
+        )).values(version=Note.version + 1))
         self.db.exec(delete(NoteLabelLink).where(
             NoteLabelLink.label_id == label.id))  # type: ignore
         self.db.exec(delete(LabelShare).where(
@@ -130,6 +152,25 @@ class LabelRepository:
                 NoteLabelLink.note_id == note_id)  # type: ignore
         ).all()
 
+    # Obtiene los IDs de etiquetas de varias notas en una sola consulta (por lotes)
+    def map_label_ids_for_notes(self, note_ids: list[int]) -> dict[int, list[int]]:
+        # Se inicializa el mapa con todas las notas (aunque no tengan etiquetas)
+        label_map: dict[int, list[int]] = {note_id: [] for note_id in note_ids}
+
+        # Se consulta por lotes para no superar el límite de parámetros del motor
+        ids = list(label_map)
+        for start in range(0, len(ids), IN_BATCH_SIZE):
+            rows = self.db.exec(
+                select(NoteLabelLink.note_id, NoteLabelLink.label_id)
+                .where(NoteLabelLink.note_id.in_(ids[start:start + IN_BATCH_SIZE]))  # type: ignore
+                .order_by(NoteLabelLink.note_id, NoteLabelLink.label_id)
+            ).all()
+            for note_id, label_id in rows:
+                label_map[note_id].append(label_id)
+
+        # Retorna el mapa nota -> etiquetas
+        return label_map
+
     # Obtiene una lista de IDs de notas para una etiqueta
     def list_note_ids_by_label_ids(self,
                                    label_ids: list[int]) -> list[int]:  # type: ignore
@@ -1,8 +1,10 @@
 
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Depends, Query, status
 
-from app.core.dependencies import CurrentUser, DBSession
+from app.core.dependencies import Conditional, CurrentUser, DBSession
+from app.services.rate_limit import write_limit
+from app.services.serialization import list_response
 from app.api.label.model import LabelCreate, LabelRead
 from app.api.label.service import LabelService
 
@@ -12,24 +14,29 @@ router = APIRouter(prefix="/labels", tags=["Labels"])
 
 # listar etiquetas
 @router.get("/", response_model=list[LabelRead])
-def list_labels(db: DBSession, user: CurrentUser):
-    return LabelService(db).list_labels(user.id)
+def list_labels(db: DBSession, user: CurrentUser, conditional: Conditional,
+                search: str | None = Query(None)):
+    labels = LabelService(db).list_labels(user.id, search=search, conditional=conditional)
+    # Se serializa la lista directo (una sola validación), con el ETag del listado
+    return list_response(labels, LabelRead, headers=conditional.response.headers)
 
 
 # Obtener una etiqueta
 @router.get("/{label_id}", response_model=LabelRead)
-def get_label(label_id: int, db: DBSession, user: CurrentUser):
-    return LabelService(db).get_label(user.id, label_id)
+def get_label(label_id: int, db: DBSession, user: CurrentUser, conditional: Conditional):
+    return LabelService(db).get_label(user.id, label_id, conditional=conditional)
 
 
 # Crear etiqueta
-@router.post("/", response_model=LabelRead, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=LabelRead, status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(write_limit)])
 def create_label(payload: LabelCreate, db: DBSession, user: CurrentUser):
     return LabelService(db).create(user.id, payload)
 
 
 # Editar etiqueta
-@router.patch("/{label_id}", response_model=LabelRead)
+@router.patch("/{label_id}", response_model=LabelRead,
+              dependencies=[Depends(write_limit)])
 def update_label(label_id: int, payload: LabelCreate, db: DBSession, user: CurrentUser):
     return LabelService(db).update(user.id, label_id, payload)
 
@@ -4,6 +4,7 @@ from sqlmodel import Session
 
 from app.api.label.model import Label, LabelCreate
 from app.api.label.repository import LabelRepository
+from app.services.etag import ConditionalRequest, row_version
 
 
 class LabelService:
@@ -69,12 +70,21 @@ class LabelService:
     ### CRUD ###
 
     # Listar etiquetas
-    def list_labels(self, owner_id: int) -> list[Label]:
-        # Se retornan todas las etiquetas del usuario
-        return self.repo.list_by_user(owner_id)
+    def list_labels(self, owner_id: int, search: str | None = None,
+                    conditional: ConditionalRequest | None = None) -> list[Label]:
+        # Se obtienen las etiquetas del usuario (filtradas por similitud si hay búsqueda)
+        labels = self.repo.list_by_user(owner_id, search=search)
+
+        # Si la lista no cambió se responde 304
+        if conditional is not None:
+            conditional.check("labels", tuple(row_version(label) for label in labels))
+
+        # Se retornan las etiquetas
+        return labels
 
     # Obtener una etiqueta
-    def get_label(self, user_id: int, label_id: int) -> Label:
+    def get_label(self, user_id: int, label_id: int,
+                  conditional: ConditionalRequest | None = None) -> Label:
 
         # Se obtiene la etiqueta
         label = self.repo.get(label_id)
@@ -87,6 +97,10 @@ class LabelService:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail="No se posee autorización")
 
+        # Si el cliente ya tiene esta versión se responde 304
+        if conditional is not None:
+            conditional.check("label", label.id, label.version)
+
         # Se retorna la etiqueta
         return label
 
@@ -1,6 +1,7 @@
 
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Index, func, literal_column
 from sqlmodel import SQLModel, Field
 
 
@@ -11,10 +12,18 @@ class Note(SQLModel, table=True):
     content: str = ""
     color: Optional[str] = None
     created_at: datetime = Field(default=datetime.now())
+    # Versión de la fila: se incrementa en cada UPDATE (se usa para los ETag)
+    version: int = Field(default=1, sa_column_kwargs={
+        "server_default": "1", "onupdate": literal_column("version + 1")})
     # Relación con el usuario
     owner_id: int = Field(foreign_key="user.id", index=True)
 
 
+# Índice por expresión para ordenar por título sin distinguir mayúsculas
+# (el id se incluye para que la paginación por cursor también use el índice)
+Index("ix_note_lower_title_id", func.lower(Note.title), Note.id)
+
+
 ##### DTOs #####
 
 
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
 from app.services.pagination import paginate_query
+from app.services.serialization import validate_items
+from app.services.trigram import apply_trigram_search, trigram_index
 from typing import Any, Optional, Sequence
-from sqlmodel import Session, select, delete, desc
+from sqlalchemy import or_
+from sqlmodel import Session, select, delete, desc, func, update
 
+from app.core.replicas import mark_write
 from app.api.label.model import NoteLabelLink
 from app.api.note.model import Note, NoteRead
+from app.api.share.model import LabelShare, NoteShare
 
+# Índice de trigramas de los títulos (se usa solo si el motor no tiene pg_trgm)
+trigram_index(Note, "title")
 
 # Repositorio de notas
 class NoteRepository:
@@ -26,6 +33,66 @@ class NoteRepository:
         # Se retorna la lista de notas
         return self.db.exec(query).all()
 
+    # Query de las notas visibles para un usuario:
+    # propias ∪ compartidas directamente ∪ compartidas por etiqueta
+    def visible_query(self, user_id: int):
+        # Notas compartidas directamente con el usuario
+        direct = select(NoteShare.note_id).where(NoteShare.user_id == user_id)
+
+        # Notas con alguna etiqueta compartida con el usuario
+        by_label = (
+            select(NoteLabelLink.note_id)
+            .join(LabelShare, LabelShare.label_id == NoteLabelLink.label_id)
+            .where(LabelShare.user_id == user_id)
+        )
+
+        # Se retorna la query combinada (se resuelve en una sola consulta)
+        return select(Note).where(or_(
+            Note.owner_id == user_id,
+            Note.id.in_(direct),  # type: ignore
+            Note.id.in_(by_label),  # type: ignore
+        ))
+
+    # Obtiene las notas visibles para un usuario paginadas por cursor
+    def list_visible(
+            self,
+            user_id: int,
+            order_by: str = "id",
+            direction: str = "desc",
+            per_page: int = 10,
+            cursor: Optional[str] = None,
+            mode: str = "cursor",
+            page: int = 1,
+            search: Optional[str] = None
+    ):
+        # Se filtra por similitud del título (substring o parecido)
+        query, rank = apply_trigram_search(
+            self.visible_query(user_id), Note, "title", search, db=self.db)
+
+        # Se definen los ordenamientos permitidos en la paginación
+        allowed_order = {
+            "id": Note.id,
+            "title": func.lower(Note.title),
+        }
+
+        # Si hay ranking de similitud se permite ordenar por "rank"
+        if rank is not None:
+            allowed_order["rank"] = rank
+
+        # Se ejecuta la query con la paginación
+        return paginate_query(
+            db=self.db,
+            model=Note,
+            base_query=query,
+            page=page,
+            per_page=per_page,
+            order_by=order_by,
+            direction=direction,
+            allowed_order=allowed_order,
+            mode=mode,
+            cursor=cursor
+        )
+
     # Obtiene una nota por su ID
     def get(self, note_id: int) -> Note | None:
         # Se retorna la nota
@@ -38,22 +105,24 @@ class NoteRepository:
             order_by: str,
             direction: str,
             page: int,
-            per_page: int
+            per_page: int,
+            mode: str = "offset",
+            cursor: Optional[str] = None
     ):
 
-        # Se retorna la lista de notas
-        query = select(Note)
-
-        # Se retorna la lista de notas filtrada por la búsqueda
-        if search:
-            query = query.where(Note.title.startswith(search))
+        # Se retorna la lista de notas filtrada por similitud del título
+        query, rank = apply_trigram_search(select(Note), Note, "title", search)
 
         # Se definen los ordenamientos permitidos en la paginación
         allowed_order = {
             "id": Note.id,
-            "title": Note.title.lower(),
+            "title": func.lower(Note.title),
         }
 
+        # Si hay ranking de similitud se permite ordenar por "rank"
+        if rank is not None:
+            allowed_order["rank"] = rank
+
         # Se ejecuta la query con la paginación
         result = paginate_query(
             db=self.db,
@@ -63,12 +132,13 @@ class NoteRepository:
             per_page=per_page,
             order_by=order_by,
             direction=direction,
-            allowed_order=allowed_order
+            allowed_order=allowed_order,
+            mode=mode,
+            cursor=cursor
         )
 
         # Se mapea la query a NoteRead para que la respuesta sea un JSON
-        result["items"] = [NoteRead.model_validate(
-            item) for item in result["items"]]
+        result["items"] = validate_items(NoteRead, result["items"])
 
         # Se retorna el resultado
         return result
@@ -104,6 +174,12 @@ class NoteRepository:
         for label in set(label_ids or []):
             self.db.add(NoteLabelLink(note_id=note_id, label_id=label))
 
+        # Se incrementa la versión de la nota (los label_ids son parte de su ETag)
+        self.db.exec(update(Note).where(Note.id == note_id).values(
+            version=Note.version + 1))  # type: ignore
+        # El UPDATE masivo no pasa por el flush: se marca la escritura (read-your-writes)
+        mark_write(self.db)
+
         # Se commitea la transacción
         self.db.commit()
 
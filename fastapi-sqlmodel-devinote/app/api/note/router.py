@@ -1,54 +1,71 @@
-from fastapi import APIRouter, status
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, Query, status
 
-from app.core.dependencies import CurrentUser, DBSession
-from app.api.note.model import Note, NoteCreate, NoteRead, NoteUpdate
+from app.core.dependencies import Conditional, CurrentUser, DBSession, ReadDBSession
+from app.services.export import export_response
+from app.services.rate_limit import write_limit
+from app.services.serialization import page_response
+from app.api.note.model import NoteCreate, NoteRead, NoteUpdate
 from app.api.note.service import NoteService
-from app.api.label.repository import LabelRepository
 
 router = APIRouter(prefix="/notes", tags=["Notes"])
 
 
-# Helper para armar NoteRead con label_ids desde la tabla puente
-def _note_to_read(db: Session, note: Note) -> NoteRead:
-    label_repo = LabelRepository(db)
-    raw_ids = label_repo.list_label_ids_for_note(note.id)
-
-    # Por si el repo devuelve [(1,), (2,), ...]
-    label_ids = [lid[0] if isinstance(lid, tuple) else lid for lid in raw_ids]
-
-    return NoteRead.model_validate(
-        note,
-        update={"label_ids": label_ids},
+@router.get("/", response_model=dict)
+def list_notes(
+    db: ReadDBSession,
+    user: CurrentUser,
+    conditional: Conditional,
+    per_page: int = Query(10, ge=1, le=100),
+    order_by: str = Query("id", pattern="^(id|title|rank)$"),
+    direction: str = Query("desc", pattern="^(asc|desc)$"),
+    cursor: str | None = Query(None),
+    search: str | None = Query(None)
+):
+    service = NoteService(db)
+    result = service.list_notes(
+        user.id,
+        order_by=order_by,
+        direction=direction,
+        per_page=per_page,
+        cursor=cursor,
+        search=search,
+        conditional=conditional
     )
-
-
-@router.get("/", response_model=list[NoteRead])
-def list_notes(db: DBSession, user: CurrentUser):
+    # Se serializa la página directo (los items ya son NoteRead), con el ETag del listado
+    return page_response(result, NoteRead, headers=conditional.response.headers)
+
+
+@router.get("/export")
+def export_notes(
+    db: DBSession,
+    user: CurrentUser,
+    export_format: str = Query("ndjson", alias="format",
+                               pattern="^(ndjson|csv)$"),
+    search: str | None = Query(None)
+):
     service = NoteService(db)
-    notes = service.list_notes(user.id)
-    return [_note_to_read(db, note) for note in notes]
+    chunks = service.export_notes(user.id, export_format, search=search)
+    return export_response(chunks, export_format, "notes")
 
 
 @router.get("/{note_id}", response_model=NoteRead)
-def get_note(note_id: int, db: DBSession, user: CurrentUser):
+def get_note(note_id: int, db: ReadDBSession, user: CurrentUser, conditional: Conditional):
     service = NoteService(db)
-    note = service.get_note(user.id, note_id)
-    return _note_to_read(db, note)
+    return service.get_note(user.id, note_id, conditional=conditional)
 
 
-@router.post("/", response_model=NoteRead, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=NoteRead, status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(write_limit)])
 def create_note(payload: NoteCreate, db: DBSession, user: CurrentUser):
     service = NoteService(db)
-    note = service.create(user.id, payload)
-    return _note_to_read(db, note)
+    return service.create(user.id, payload)
 
 
-@router.patch("/{note_id}", response_model=NoteRead)
+@router.patch("/{note_id}", response_model=NoteRead,
+              dependencies=[Depends(write_limit)])
 def update_note(note_id: int, payload: NoteUpdate, db: DBSession, user: CurrentUser):
     service = NoteService(db)
-    note = service.update(user.id, note_id, payload)
-    return _note_to_read(db, note)
+    return service.update(user.id, note_id, payload)
 
 
 @router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
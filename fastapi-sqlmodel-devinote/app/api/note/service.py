@@ -1,14 +1,41 @@
 
 
+from functools import partial
+from typing import Iterator
 from fastapi import HTTPException, status
 from sqlmodel import Session
 
-from app.api.note.model import Note, NoteCreate, NoteUpdate
-from app.api.share.model import ShareRole
+from app.core.db import engine
+from app.services.etag import ConditionalRequest, page_version
+from app.services.export import stream_export
+from app.services.serialization import validate_items
+from app.services.trigram import apply_trigram_search
+from app.api.note.model import Note, NoteCreate, NoteRead, NoteUpdate
+from app.api.share.model import AccessLevel
 from app.api.label.repository import LabelRepository
 from app.api.note.repository import NoteRepository
 from app.api.share.repository import ShareRepository
 
+# Columnas de la exportación de notas
+EXPORT_FIELDS = ["id", "title", "content", "color",
+                 "created_at", "owner_id", "label_ids"]
+
+
+# Serializa un lote de notas para la exportación (una consulta de etiquetas por lote)
+def export_rows(db: Session, notes: list[Note]) -> list[dict]:
+    label_map = LabelRepository(db).map_label_ids_for_notes(
+        [note.id for note in notes])
+
+    return [{
+        "id": note.id,
+        "title": note.title,
+        "content": note.content,
+        "color": note.color,
+        "created_at": note.created_at,
+        "owner_id": note.owner_id,
+        "label_ids": label_map[note.id],
+    } for note in notes]
+
 
 class NoteService:
 
@@ -21,113 +48,111 @@ class NoteService:
         self.notes = NoteRepository(db)
         self.labels = LabelRepository(db)
         self.shares = ShareRepository(db)
+        # Niveles de acceso ya resueltos por (nota, usuario)
+        self._access: dict[tuple[int, int], AccessLevel] = {}
 
-    # Helper: arma el Note con los label_ids
-    def _note_to_read(self, note: Note) -> NoteCreate:
-        raw_ids = self.labels.list_label_ids_for_note(note.id)
+    # Helper: arma el NoteRead con los label_ids
+    def _note_to_read(self, note: Note, label_ids: list[int] | None = None) -> NoteRead:
+        # Si no se reciben las etiquetas, se consultan las de la nota
+        if label_ids is None:
+            label_ids = self.labels.map_label_ids_for_notes([note.id])[note.id]
 
-        # Por si el repositorio devuelve tuplas (ej: [(1,), (2,)])
-        label_ids = [lid[0] if isinstance(
-            lid, tuple) else lid for lid in raw_ids]
-
-        return NoteCreate.model_validate(
+        return NoteRead.model_validate(
             note,
             update={"label_ids": label_ids},
         )
 
-    ### Permisos ###
+    # Helper: arma varios NoteRead con una sola consulta de etiquetas
+    def _notes_to_read(self, notes: list[Note]) -> list[NoteRead]:
+        label_map = self.labels.map_label_ids_for_notes(
+            [note.id for note in notes])
 
-    # Permisos de lectura
+        # Se validan todas las notas en una sola llamada y se completan las etiquetas
+        items = validate_items(NoteRead, notes)
+        for item in items:
+            item.label_ids = label_map[item.id]
+        return items
 
-    def user_can_read(self, user_id: int, note: Note) -> bool:
+    ### Permisos ###
+
+    # Nivel de acceso del usuario sobre la nota (se resuelve una sola vez por nota)
+    def access_level(self, user_id: int, note: Note) -> AccessLevel:
 
-        # Si el usuario es el dueño de la nota
+        # Si el usuario es el dueño de la nota no hace falta consultar
         if note.owner_id == user_id:
-            return True
+            return AccessLevel.OWNER
 
-        # Si el usuario tiene permiso de lectura directo
-        if self.shares.has_note_share(note_id=note.id, user_id=user_id):
-            return True
+        # Se resuelve el acceso directo y por etiqueta en una sola consulta
+        key = (note.id, user_id)
+        if key not in self._access:
+            self._access[key] = self.shares.resolve_note_access(
+                note_id=note.id, user_id=user_id)
 
-        # Si el usuario tiene permiso de lectura por etiqueta
-        label_ids = self.labels.list_label_ids_for_note(note.id)
+        # Se retorna el nivel de acceso
+        return self._access[key]
 
-        # Se verifica que el usuario tenga permiso de lectura por etiqueta
-        return self.shares.has_any_label_share(label_ids=label_ids, user_id=user_id)
+    # Permisos de lectura
+    def user_can_read(self, user_id: int, note: Note) -> bool:
+        return self.access_level(user_id, note) >= AccessLevel.READ
 
     # Permisos de edición
     def user_can_edit(self, user_id: int, note: Note) -> bool:
-
-        # Si el usuario es el dueño de la nota
-        if note.owner_id == user_id:
-            return True
-
-        # Si el usuario tiene permiso de edición directo
-        if self.shares.has_note_share(note_id=note.id, user_id=user_id, role=ShareRole.EDIT):
-            return True
-
-        # Si el usuario tiene permiso de edición por etiqueta
-        label_ids = self.labels.list_label_ids_for_note(note.id)
-
-        # Se verifica que el usuario tenga permiso de edición por etiqueta
-        return self.shares.has_any_label_share(label_ids=label_ids, user_id=user_id, role=ShareRole.EDIT)
+        return self.access_level(user_id, note) >= AccessLevel.EDIT
 
     # Permisos de eliminación
     def user_can_delete(self, user_id: int, note: Note) -> bool:
-
-        # Si el usuario es el dueño de la nota
-        if note.owner_id == user_id:
-            return True
-
-        # Si el usuario tiene permiso de eliminación directo
-        if self.shares.has_note_share(note_id=note.id, user_id=user_id, role=ShareRole.DELETE):
-            return True
-
-        # Si el usuario tiene permiso de eliminación por etiqueta
-        label_ids = self.labels.list_label_ids_for_note(note.id)
-
-        # Se verifica que el usuario tenga permiso de eliminación por etiqueta
-        return self.shares.has_any_label_share(label_ids=label_ids, user_id=user_id, role=ShareRole.DELETE)
+        return self.access_level(user_id, note) >= AccessLevel.DELETE
 
     ### CRUD ###
 
-    # Lista de notas
-
-        # Lista de notas
-    def list_notes(self, user_id: int) -> list[NoteCreate]:
-
-        # Lista de notas propias
-        owned = self.notes.list_owned(user_id)
+    # Lista de notas visibles (propias y compartidas), paginada por cursor
+    def list_notes(
+            self,
+            user_id: int,
+            order_by: str = "id",
+            direction: str = "desc",
+            per_page: int = 10,
+            cursor: str | None = None,
+            search: str | None = None,
+            conditional: ConditionalRequest | None = None
+    ) -> dict:
+
+        # Se obtiene la página de notas con una sola consulta
+        result = self.notes.list_visible(
+            user_id,
+            order_by=order_by,
+            direction=direction,
+            per_page=per_page,
+            cursor=cursor,
+            search=search
+        )
 
-        # Lista de notas compartidas directamente
-        direct_ids = self.shares.list_note_ids_shared_directly(user_id)
+        # Si la página no cambió se responde 304 antes de consultar las etiquetas
+        if conditional is not None:
+            conditional.check("notes", page_version(result))
 
-        # Lista de notas compartidas por etiqueta
-        shared_label_ids = self.shares.list_label_ids_shared_with_user(user_id)
-        ids_by_label = self.labels.list_note_ids_by_label_ids(shared_label_ids)
+        # Devolvemos NoteRead con label_ids (una sola consulta de etiquetas)
+        result["items"] = self._notes_to_read(result["items"])
 
-        # Lista de notas compartidas
-        combined_ids = list({*direct_ids, *ids_by_label})
-        shared = self.notes.list_by_ids(combined_ids)
+        # Se retorna el resultado
+        return result
 
-        # Lista combinada sin duplicados
-        combined = {note.id: note for note in owned}
-        for note in shared:
-            combined.setdefault(note.id, note)
+    # Exporta las notas visibles (mismos permisos y filtros que el listado) en streaming
+    def export_notes(self, user_id: int, export_format: str = "ndjson",
+                     search: str | None = None) -> Iterator[str]:
+        # Se filtra por similitud del título igual que en list_notes
+        query, _ = apply_trigram_search(
+            self.notes.visible_query(user_id), Note, "title", search, db=self.db)
+        query = query.order_by(Note.id)
 
-        # Lista ordenada
-        all_notes = sorted(
-            combined.values(),
-            key=lambda note: note.id,
-            reverse=True
-        )
-
-        # Devolvemos NoteCreate con label_ids
-        return [self._note_to_read(note) for note in all_notes]
+        # Se recorre con una sesión propia porque el stream sigue después del request
+        return stream_export(partial(Session, engine), query, export_rows,
+                             export_format, EXPORT_FIELDS)
 
     # Obtener una nota
 
-    def get_note(self, user_id: int, note_id: int) -> Note:
+    def get_note(self, user_id: int, note_id: int,
+                 conditional: ConditionalRequest | None = None) -> NoteRead:
 
         # Se obtiene la nota
         note = self.notes.get(note_id)
@@ -140,11 +165,16 @@ class NoteService:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail="No se posee autorización")
 
+        # Si el cliente ya tiene esta versión se responde 304 sin consultar las etiquetas
+        # (los cambios de etiquetas incrementan la versión de la nota)
+        if conditional is not None:
+            conditional.check("note", note.id, note.version)
+
         # Se retorna la nota
         return self._note_to_read(note)
 
     # Crear una nota
-    def create(self, owner_id: int, payload: NoteCreate) -> Note:
+    def create(self, owner_id: int, payload: NoteCreate) -> NoteRead:
 
         # Se crea la nota
         note = self.notes.create(
@@ -157,10 +187,10 @@ class NoteService:
             self._set_labels(owner_id, note.id, payload.label_ids)
 
         # Se retorna la nota
-        return note
+        return self._note_to_read(note)
 
     # Actualizar una nota
-    def update(self, user_id: int, note_id: int, payload: NoteUpdate) -> Note:
+    def update(self, user_id: int, note_id: int, payload: NoteUpdate) -> NoteRead:
 
         # Se obtiene la nota
         note = self.notes.get(note_id)
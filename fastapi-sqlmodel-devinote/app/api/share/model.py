@@ -1,6 +1,6 @@
 
 from datetime import datetime
-from enum import Enum
+from enum import Enum, IntEnum
 
 from sqlalchemy import UniqueConstraint
 from sqlmodel import SQLModel, Field
@@ -13,6 +13,16 @@ class ShareRole(str, Enum):
     DELETE = "delete"
 
 
+# Nivel de acceso efectivo sobre una nota (de menor a mayor)
+# Un nivel mayor incluye los permisos de los niveles menores
+class AccessLevel(IntEnum):
+    NONE = 0
+    READ = 1
+    EDIT = 2
+    DELETE = 3
+    OWNER = 4
+
+
 # Modelo de compartir notas
 class NoteShare(SQLModel, table=True):
 
@@ -1,7 +1,20 @@
 
-from sqlmodel import Session, select, delete
+from sqlalchemy import case, literal, union_all
+from sqlmodel import Session, select, delete, func
 
-from app.api.share.model import LabelShare, NoteShare
+from app.core.replicas import mark_write
+from app.api.label.model import NoteLabelLink
+from app.api.note.model import Note
+from app.api.share.model import AccessLevel, LabelShare, NoteShare, ShareRole
+
+
+# Se traduce el rol de una compartición a su nivel de acceso
+def _role_level(role_column):
+    return case(
+        (role_column == ShareRole.DELETE, int(AccessLevel.DELETE)),
+        (role_column == ShareRole.EDIT, int(AccessLevel.EDIT)),
+        else_=int(AccessLevel.READ)
+    )
 
 
 # Repositorio de comparticiones de notas y etiquetas
@@ -37,6 +50,8 @@ class ShareRepository:
         # Elimina la compartición
         self.db.exec(delete(NoteShare).where(NoteShare.note_id ==
                      note_id, NoteShare.user_id == user_id))
+        # El DELETE masivo no pasa por el flush: se marca la escritura (read-your-writes)
+        mark_write(self.db)
         # Commit para guardar los cambios
         self.db.commit()
 
@@ -66,6 +81,8 @@ class ShareRepository:
         # Elimina la compartición
         self.db.exec(delete(LabelShare).where(LabelShare.label_id ==
                      label_id, LabelShare.user_id == user_id))
+        # El DELETE masivo no pasa por el flush: se marca la escritura (read-your-writes)
+        mark_write(self.db)
         # Commit para guardar los cambios
         self.db.commit()
 
@@ -103,6 +120,38 @@ class ShareRepository:
         # Retorna True si encuentra una compartición, False en caso contrario
         return self.db.exec(query).first() is not None
 
+    # Obtiene el nivel de acceso más alto de un usuario sobre una nota
+    # (dueño, compartición directa o compartición por etiqueta) en una sola consulta
+    def resolve_note_access(self, note_id: int, user_id: int) -> AccessLevel:
+        # Si el usuario es el dueño de la nota
+        owner = select(literal(int(AccessLevel.OWNER)).label("level")).where(
+            Note.id == note_id,
+            Note.owner_id == user_id
+        )
+
+        # Si la nota está compartida directamente con el usuario
+        direct = select(_role_level(NoteShare.role).label("level")).where(
+            NoteShare.note_id == note_id,
+            NoteShare.user_id == user_id
+        )
+
+        # Si alguna etiqueta de la nota está compartida con el usuario
+        by_label = (
+            select(_role_level(LabelShare.role).label("level"))
+            .join(NoteLabelLink, NoteLabelLink.label_id == LabelShare.label_id)
+            .where(
+                NoteLabelLink.note_id == note_id,
+                LabelShare.user_id == user_id
+            )
+        )
+
+        # Se queda con el nivel más alto de las tres fuentes
+        levels = union_all(owner, direct, by_label).subquery()
+        level = self.db.exec(select(func.max(levels.c.level))).first()
+
+        # Retorna el nivel de acceso (NONE si no tiene acceso)
+        return AccessLevel(level or AccessLevel.NONE)
+
     # Listar las notas compartidas directamente con un usuario
     def list_note_ids_shared_directly(self, user_id: int) -> list[int]:
         # Retorna las notas compartidas directamente con el usuario
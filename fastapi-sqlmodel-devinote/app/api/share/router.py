@@ -1,7 +1,8 @@
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Depends, status
 
 from app.core.dependencies import CurrentUser, DBSession
+from app.services.rate_limit import write_limit
 from app.api.share.model import ShareRequest
 from app.api.share.service import ShareService
 
@@ -10,7 +11,8 @@ router = APIRouter(prefix="/shares", tags=["Shares"])
 
 
 # Compartir nota
-@router.post("/notes/{note_id}", status_code=status.HTTP_201_CREATED)
+@router.post("/notes/{note_id}", status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(write_limit)])
 def share_note(note_id: int, payload: ShareRequest, db: DBSession, user: CurrentUser):
     share = ShareService(db).share_note(
         user.id, note_id, payload.target_user_id, payload.role)
@@ -31,7 +33,8 @@ def unshare_note(note_id: int, target_user_id: int, db: DBSession, user: Current
 
 
 # Compartir etiqueta
-@router.post("/labels/{label_id}", status_code=status.HTTP_201_CREATED)
+@router.post("/labels/{label_id}", status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(write_limit)])
 def share_label(label_id: int, payload: ShareRequest, db: DBSession, user: CurrentUser):
     share = ShareService(db).share_label(
         user.id, label_id, payload.target_user_id, payload.role)
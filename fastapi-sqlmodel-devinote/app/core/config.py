@@ -15,5 +15,71 @@ class Settings(BaseSettings):
     PROJECT_NAME: str
     ENVIRONMENT: str
 
+    # Configuración del pool de conexiones (PostgreSQL, segundos para timeout y recycle)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Configuración de las réplicas de lectura (URLs separadas por coma, segundos)
+    # Después de escribir, el usuario lee de la primaria durante REPLICA_STICKY_SECONDS
+    DATABASE_REPLICA_URLS: str = ""
+    REPLICA_HEALTH_INTERVAL: float = 10
+    REPLICA_STICKY_SECONDS: float = 5
+    REPLICA_STICKY_SIZE: int = 10000
+
+    # Configuración del seguimiento de sesiones (avisos por sesión lenta o con muchas queries)
+    SESSION_SLOW_SECONDS: float = 5
+    SESSION_QUERY_WARNING: int = 50
+
+    # Configuración del perfilador de queries por request (solo para desarrollo)
+    # Se avisa cuando un request supera SQL_QUERY_BUDGET queries o repite una sentencia
+    # SQL_DUPLICATE_THRESHOLD veces (posible N+1)
+    SQL_PROFILER: bool = False
+    SQL_QUERY_BUDGET: int = 20
+    SQL_DUPLICATE_THRESHOLD: int = 3
+    SQL_PROFILER_HISTORY: int = 100
+
+    # Métricas en formato Prometheus (GET /metrics)
+    METRICS: bool = True
+
+    # Configuración de SQLite (PRAGMA aplicados en cada conexión)
+    # busy_timeout en milisegundos, mmap_size en bytes, cache_size negativo = KiB
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_CACHE_SIZE: int = -64000
+
+    # Configuración del conteo de la paginación (exact | estimated | cached)
+    PAGINATION_COUNT_STRATEGY: str = "exact"
+    PAGINATION_COUNT_TTL: int = 30
+    PAGINATION_COUNT_CACHE_SIZE: int = 1024
+
+    # Configuración del cache de identidades (token -> usuario autenticado)
+    IDENTITY_CACHE_TTL: int = 60
+    IDENTITY_CACHE_SIZE: int = 10000
+
+    # Configuración del limitador de requests (memory | redis, límites "N/second|minute|hour|day")
+    # - RATE_LIMIT_AUTH_IP: login y registro por IP (token bucket)
+    # - RATE_LIMIT_LOGIN_USER: intentos de login por nombre de usuario (ventana deslizante)
+    # - RATE_LIMIT_WRITE: creación, edición y compartidos por usuario (token bucket)
+    RATE_LIMIT: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    RATE_LIMIT_SIZE: int = 100000
+    RATE_LIMIT_AUTH_IP: str = "20/minute"
+    RATE_LIMIT_LOGIN_USER: str = "5/minute"
+    RATE_LIMIT_WRITE: str = "60/minute"
+
+    # Configuración del pool de hashing de contraseñas (0 = según cantidad de CPUs)
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Configuración del índice de trigramas en memoria (motores sin pg_trgm)
+    TRIGRAM_INDEX_TTL: int = 300
+    TRIGRAM_MAX_RESULTS: int = 1000
+
 
 settings = Settings()  # ty:ignore[missing-argument]
@@ -1,13 +1,15 @@
 
 from typing import Iterator
-from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel import SQLModel, Session
 
 from app.core.config import settings
+from app.core.engine import create_db_engine
+from app.core.sessions import session_tracker
 
 
 # Se crea el engine de la base de datos
-engine = create_engine(settings.DATABASE_URL, echo=False, connect_args={
-    "check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {})
+# (pool según la configuración y PRAGMA de WAL/busy_timeout en SQLite)
+engine = create_db_engine(settings.DATABASE_URL, echo=False)
 
 
 def init_db() -> None:
@@ -20,6 +22,17 @@ def init_db() -> None:
 
 
 def get_session() -> Iterator[Session]:
-    """Devuelve una sesión de la base de datos gestionada como un contexto"""
-    with Session(engine) as session:
-        yield session
+    """Devuelve una sesión de la base de datos gestionada como un contexto (unidad de trabajo)"""
+    with Session(engine) as session, session_tracker.track(session) as stats:
+        try:
+            yield session
+        except Exception:
+            # Si el request falla se revierte la transacción
+            session.rollback()
+            raise
+
+        # Los repositorios confirman explícitamente; lo que quedó sin confirmar se descarta
+        # (no se hace commit implícito porque este código corre después de enviar la respuesta)
+        if session.new or session.dirty or session.deleted:
+            session_tracker.discard(stats)
+            session.rollback()
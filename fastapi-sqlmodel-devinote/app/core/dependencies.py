@@ -1,21 +1,27 @@
 
 
-from typing import Annotated
+from datetime import datetime, timezone
+from typing import Annotated, Iterator
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.exc import OperationalError
 from sqlmodel import Session
 
 from app.core.db import get_session
 from app.core.security import decode_token
-from app.api.auth.model import User
 from app.api.auth.repository import UserRepository
+from app.core.identity import UserSnapshot, identity_cache, token_expiration
+from app.core.replicas import bind_user, replica_router
+from app.core.sessions import session_tracker
+from app.services.etag import ConditionalRequest
 
 oauth2 = OAuth2PasswordBearer(tokenUrl="login")
 
 
 # Método para obtener la sesión de la base de datos
-def get_db() -> Session:
-    return next(get_session())
+# (se recorre el generador completo para que la sesión se cierre al terminar el request)
+def get_db() -> Iterator[Session]:
+    yield from get_session()
 
 
 # Se envuelve la dependencia de la sesión en un Annotated para que sea tipado
@@ -25,7 +31,7 @@ DBSession = Annotated[Session, Depends(get_db)]
 
 
 # Método para obtener el usuario actual
-def get_current_user(token: Annotated[str, Depends(oauth2)], db: DBSession) -> User:
+def get_current_user(token: Annotated[str, Depends(oauth2)], db: DBSession) -> UserSnapshot:
 
     # Excepción para cuando el token no es válido
     credentials_exc = HTTPException(
@@ -34,6 +40,14 @@ def get_current_user(token: Annotated[str, Depends(oauth2)], db: DBSession) -> U
         headers={"WWW-Authenticate": "Bearer"}
     )
 
+    # Si el token ya fue verificado, se retorna la identidad guardada en cache
+    # (evita decodificar el JWT y consultar la base de datos en cada request)
+    cached = identity_cache.get(token)
+    if cached is not None:
+        # Se asocia la sesión al usuario (si escribe, lee de la primaria por un tiempo)
+        bind_user(db, cached.user.id)
+        return cached.user
+
     # Se intenta decodificar el token
     try:
         payload = decode_token(token)
@@ -48,17 +62,52 @@ def get_current_user(token: Annotated[str, Depends(oauth2)], db: DBSession) -> U
     except Exception:
         raise credentials_exc
 
-    # Se intenta obtener el usuario
+    # Si el token está vencido (claim "expire"), se lanza la excepción
+    expire = token_expiration(payload)
+    if expire is not None and expire <= datetime.now(timezone.utc):
+        raise credentials_exc
+
+    # Se intenta obtener el usuario (la generación se lee antes para no cachear una fila vieja)
+    generation = identity_cache.generation(user_id)
     repo = UserRepository(db)
     user = repo.get_by_id(user_id)
 
-    # Si el usuario no existe, se lanza la excepción
-    if not user:
+    # Si el usuario no existe o no está activo, se lanza la excepción
+    if not user or not user.is_active:
         raise credentials_exc
 
-    # Se retorna el usuario
-    return user
+    # Se guarda la identidad en cache y se retorna el snapshot del usuario
+    snapshot = UserSnapshot.from_user(user)
+    identity_cache.set(token, payload, snapshot, generation)
+    bind_user(db, snapshot.id)
+    return snapshot
 
 
 # Se envuelve la dependencia del usuario en un Annotated para que sea tipado
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[UserSnapshot, Depends(get_current_user)]
+
+
+# Método para obtener una sesión de solo lectura para el usuario actual
+# Se usa una réplica (round-robin entre las sanas) salvo que no haya réplicas
+# o que el usuario haya escrito hace poco (read-your-writes), en ese caso la primaria
+def get_read_db(db: DBSession, user: CurrentUser) -> Iterator[Session]:
+    replica = replica_router.pick(user.id)
+    if replica is None:
+        yield db
+        return
+
+    with replica.session() as session, session_tracker.track(session, label="replica"):
+        try:
+            yield session
+        except OperationalError:
+            # Si la réplica falla se saca de la rotación hasta el próximo chequeo
+            replica.mark_down()
+            raise
+
+
+# Se envuelve la sesión de solo lectura en un Annotated para que sea tipado
+ReadDBSession = Annotated[Session, Depends(get_read_db)]
+
+
+# Se envuelve el request condicional (If-None-Match / ETag) en un Annotated
+Conditional = Annotated[ConditionalRequest, Depends()]
@@ -0,0 +1,146 @@
+
+import time
+from bisect import bisect_left
+from threading import Lock
+from typing import Any, Dict
+from sqlalchemy import Engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from sqlmodel import create_engine
+
+from app.core.config import settings
+
+# Límites (segundos) del histograma de espera al pedir una conexión al pool
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+# Métricas de las esperas al pedir conexiones al pool (checkout)
+class PoolMetrics:
+
+    # Inicialización de las métricas
+    def __init__(self, buckets=WAIT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = Lock()
+        self.reset()
+
+    # Reinicia los contadores
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            # Un contador por límite del histograma y uno final para +Inf
+            self.bucket_counts = [0] * (len(self.buckets) + 1)
+
+    # Registra una espera
+    def observe(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.bucket_counts[bisect_left(self.buckets, seconds)] += 1
+
+    # Estadísticas de las esperas
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_total": round(self.wait_total, 6),
+                "wait_avg": round(self.wait_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_max": round(self.wait_max, 6),
+                "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.bucket_counts)),
+            }
+
+
+# Métricas del pool de la aplicación
+pool_metrics = PoolMetrics()
+
+
+# Pool que mide cuánto espera cada checkout (se mantiene al recrear el pool,
+# porque SQLAlchemy lo recrea con la misma clase)
+class TimedQueuePool(QueuePool):
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.observe(time.perf_counter() - start)
+        return connection
+
+
+# Verifica si la URL es de SQLite en memoria (usa un pool de una conexión por hilo)
+def is_sqlite_memory(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+# Aplica los PRAGMA de SQLite en cada conexión nueva
+# - WAL: los lectores no bloquean al escritor (y viceversa)
+# - synchronous=NORMAL: en WAL es seguro ante caídas de la aplicación y evita un fsync por commit
+# - busy_timeout: un escritor espera el lock en vez de fallar con "database is locked"
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    pragmas = [
+        f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT}",
+        f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size = {settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size = {settings.SQLITE_CACHE_SIZE}",
+    ]
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in pragmas:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+# Arma los parámetros del engine según el motor y la configuración
+def engine_options(url: str) -> Dict[str, Any]:
+    options: Dict[str, Any] = {}
+
+    if make_url(url).get_backend_name() == "sqlite":
+        # La sesión se puede usar desde otro hilo (threadpool de FastAPI)
+        options["connect_args"] = {"check_same_thread": False}
+        if is_sqlite_memory(url):
+            return options
+    else:
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+
+    options["poolclass"] = TimedQueuePool
+    return options
+
+
+# Crea el engine de la base de datos con el pool y los eventos configurados
+def create_db_engine(url: str, **kwargs: Any) -> Engine:
+    engine = create_engine(url, **{**engine_options(url), **kwargs})
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", set_sqlite_pragmas)
+    return engine
+
+
+# Estado actual del pool del engine
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"class": type(pool).__name__}
+    return {
+        "class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
@@ -0,0 +1,144 @@
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.services.cache import TTLCache
+from app.api.auth.model import User
+
+
+# Copia liviana del usuario autenticado (no depende de la sesión)
+@dataclass(frozen=True)
+class UserSnapshot:
+    id: int
+    username: str
+    email: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            is_active=user.is_active
+        )
+
+
+# Entrada del cache: claims decodificados + snapshot del usuario
+@dataclass(frozen=True)
+class CachedIdentity:
+    claims: dict
+    user: UserSnapshot
+    generation: int
+
+
+# Obtiene el vencimiento del token (claim "expire" en formato ISO)
+def token_expiration(claims: dict) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(claims["expire"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+# Cache de identidades por hash del token (LRU con TTL)
+class IdentityCache:
+
+    # Inicialización del cache
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Generación por usuario: al invalidar se incrementa y las entradas viejas se descartan
+        self._generations: dict[int, int] = {}
+        self._lock = Lock()
+
+    # Obtiene la llave del token (no se guarda el token en memoria)
+    @staticmethod
+    def token_key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    # Obtiene una identidad del cache (None si no existe, expiró o fue invalidada)
+    def get(self, token: str) -> Optional[CachedIdentity]:
+        key = self.token_key(token)
+        entry: Optional[CachedIdentity] = self._cache.get(key)
+        if entry is None:
+            return None
+
+        if entry.generation != self.generation(entry.user.id):
+            self._cache.delete(key)
+            return None
+
+        return entry
+
+    # Obtiene la generación actual de un usuario
+    def generation(self, user_id: int) -> int:
+        return self._generations.get(user_id, 0)
+
+    # Guarda una identidad (el TTL nunca supera el vencimiento del token)
+    # generation: la generación leída antes de consultar el usuario (si el usuario se invalida
+    # mientras tanto, la entrada nace vieja y se descarta en el próximo get)
+    def set(self, token: str, claims: dict, user: UserSnapshot,
+            generation: Optional[int] = None) -> None:
+        ttl = self.ttl
+        expire = token_expiration(claims)
+        if expire is not None:
+            ttl = min(ttl, (expire - datetime.now(timezone.utc)).total_seconds())
+        if ttl <= 0:
+            return
+
+        entry = CachedIdentity(
+            claims=claims,
+            user=user,
+            generation=self.generation(user.id) if generation is None else generation
+        )
+        self._cache.set(self.token_key(token), entry, ttl=ttl)
+
+    # Invalida todas las identidades guardadas de un usuario
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    # Vacía el cache
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+# Cache de identidades de la aplicación
+identity_cache = IdentityCache(
+    maxsize=settings.IDENTITY_CACHE_SIZE,
+    ttl=settings.IDENTITY_CACHE_TTL
+)
+
+
+# Hook de invalidación: se debe llamar cuando un usuario se desactiva o cambia sus datos
+def invalidate_user(user_id: int) -> None:
+    identity_cache.invalidate_user(user_id)
+
+
+# Llave de session.info con los usuarios modificados en la transacción
+PENDING_KEY = "identity_invalidations"
+
+
+# Marca los usuarios actualizados o eliminados desde el ORM (en el flush)
+# La invalidación se hace después del commit: antes, otro request todavía lee la fila vieja
+# (por ejemplo is_active=True) y la volvería a guardar en el cache con la generación nueva
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_user_changed(mapper, connection, target: User) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDING_KEY, set()).add(target.id)
+    else:
+        invalidate_user(target.id)
+
+
+# Invalida los usuarios marcados después de cada commit de cualquier sesión
+@event.listens_for(Session, "after_commit")
+def _invalidate_users_after_commit(session: Session) -> None:
+    for user_id in session.info.pop(PENDING_KEY, ()):
+        invalidate_user(user_id)
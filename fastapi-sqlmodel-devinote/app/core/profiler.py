@@ -0,0 +1,224 @@
+
+import logging
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy import Engine, event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Llave de connection.info con los inicios de las queries en curso
+START_KEY = "profiler_query_start"
+
+# Normalización de las sentencias: listas de parámetros y espacios
+_IN_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+|\$\d+))*\s*\)")
+_POSTCOMPILE = re.compile(r"\(?__\[POSTCOMPILE_\w+\]\)?")
+_SPACES = re.compile(r"\s+")
+
+
+# Forma de una sentencia: misma query con distinta cantidad de parámetros en los IN
+def statement_shape(statement: str) -> str:
+    shape = _POSTCOMPILE.sub("(...)", statement)
+    shape = _IN_LIST.sub("(...)", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+# Perfil de las queries de un request
+class RequestProfile:
+
+    # Inicialización de la clase
+    def __init__(self, method: str, path: str, track_shapes: bool = True):
+        self.method = method
+        self.path = path
+        # Sin formas de sentencia solo se cuentan las queries y el tiempo (más liviano)
+        self.track_shapes = track_shapes
+        self.started_at = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.status: Optional[int] = None
+        self.duration: Optional[float] = None
+        # Cantidad y tiempo por forma de sentencia
+        self.shapes: Dict[str, List[float]] = {}
+        self._lock = Lock()
+
+    # Registra una query
+    def record(self, statement: str, elapsed: float) -> None:
+        shape = statement_shape(statement) if self.track_shapes else None
+        with self._lock:
+            self.queries += 1
+            self.db_time += elapsed
+            if shape is None:
+                return
+            entry = self.shapes.setdefault(shape, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+    # Obtiene las sentencias repetidas (posible N+1)
+    def duplicates(self, threshold: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            repeated = [(shape, count, total) for shape, (count, total)
+                        in self.shapes.items() if count >= threshold]
+        repeated.sort(key=lambda item: -item[1])
+        return [{"statement": shape, "count": count, "time_ms": round(total * 1000, 3)}
+                for shape, count, total in repeated]
+
+    # Verifica si el request superó el presupuesto de queries
+    def over_budget(self, budget: int) -> bool:
+        return budget > 0 and self.queries > budget
+
+    # Arma el header Server-Timing
+    def server_timing(self, budget: int) -> str:
+        elapsed = (time.perf_counter() - self.started_at) * 1000
+        entries = [
+            f'db;dur={self.db_time * 1000:.3f};desc="{self.queries} queries"',
+            f"app;dur={elapsed:.3f}",
+        ]
+        if self.over_budget(budget):
+            entries.append(f'db-budget;desc="{self.queries}/{budget}"')
+        return ", ".join(entries)
+
+    # Obtiene el resumen del request
+    def summary(self, budget: int, threshold: int) -> Dict[str, Any]:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": round((self.duration or 0.0) * 1000, 3),
+            "queries": self.queries,
+            "db_time_ms": round(self.db_time * 1000, 3),
+            "over_budget": self.over_budget(budget),
+            "duplicates": self.duplicates(threshold),
+        }
+
+
+# Perfil del request actual (se propaga al threadpool con el contexto)
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    "current_profile", default=None)
+
+
+# Usa el perfil del request actual o abre uno liviano (solo cantidad y tiempo de las queries)
+@contextmanager
+def ensure_profile(scope) -> Iterator[RequestProfile]:
+    profile = current_profile.get()
+    if profile is not None:
+        yield profile
+        return
+
+    profile = RequestProfile(scope["method"], scope["path"], track_shapes=False)
+    token = current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        current_profile.reset(token)
+
+
+# Perfilador de queries: guarda los últimos requests para el endpoint de debug
+class SQLProfiler:
+
+    # Inicialización de la clase
+    def __init__(self, budget: int, duplicate_threshold: int, history: int):
+        self.budget = budget
+        self.duplicate_threshold = duplicate_threshold
+        self._recent: deque = deque(maxlen=history)
+        self._lock = Lock()
+
+    # Registra un request terminado
+    def finish(self, profile: RequestProfile) -> None:
+        profile.duration = time.perf_counter() - profile.started_at
+        summary = profile.summary(self.budget, self.duplicate_threshold)
+        with self._lock:
+            self._recent.append(summary)
+
+        if summary["over_budget"]:
+            logger.warning("%s %s ejecutó %d queries (presupuesto %d)",
+                           profile.method, profile.path, profile.queries, self.budget)
+        for duplicate in summary["duplicates"]:
+            logger.warning("%s %s repitió %d veces: %s", profile.method, profile.path,
+                           duplicate["count"], duplicate["statement"])
+
+    # Obtiene los últimos requests (más recientes primero)
+    def recent(self, only_flagged: bool = False) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(reversed(self._recent))
+        if only_flagged:
+            items = [item for item in items if item["over_budget"] or item["duplicates"]]
+        return items
+
+    # Vacía el historial
+    def clear(self) -> None:
+        with self._lock:
+            self._recent.clear()
+
+
+# Perfilador de la aplicación
+sql_profiler = SQLProfiler(
+    budget=settings.SQL_QUERY_BUDGET,
+    duplicate_threshold=settings.SQL_DUPLICATE_THRESHOLD,
+    history=settings.SQL_PROFILER_HISTORY,
+)
+
+
+# Middleware ASGI: abre un perfil por request y agrega el header Server-Timing
+class SQLProfilerMiddleware:
+
+    # Inicialización de la clase
+    def __init__(self, app, profiler: SQLProfiler = sql_profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = current_profile.set(profile)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing",
+                                profile.server_timing(self.profiler.budget).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_profile.reset(token)
+            self.profiler.finish(profile)
+
+
+# Registra los eventos de las queries en todos los engines (solo si hay un perfil activo)
+def install_query_hooks() -> None:
+    if event.contains(Engine, "before_cursor_execute", _before_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_execute)
+    event.listen(Engine, "after_cursor_execute", _after_execute)
+    event.listen(Engine, "handle_error", _on_error)
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if current_profile.get() is not None:
+        conn.info.setdefault(START_KEY, []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    profile = current_profile.get()
+    starts = conn.info.get(START_KEY)
+    if profile is not None and starts:
+        profile.record(statement, time.perf_counter() - starts.pop())
+
+
+def _on_error(exception_context) -> None:
+    connection = exception_context.connection
+    starts = connection.info.get(START_KEY) if connection is not None else None
+    if starts:
+        starts.pop()
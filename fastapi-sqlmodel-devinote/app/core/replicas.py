@@ -0,0 +1,195 @@
+
+import itertools
+import logging
+import time
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import make_url
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.engine import create_db_engine
+from app.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Llaves de session.info: usuario dueño de la sesión y si la transacción escribió
+USER_KEY = "replica_user_id"
+WROTE_KEY = "replica_wrote"
+
+
+# Réplica de solo lectura (engine propio y estado de salud)
+class Replica:
+
+    # Inicialización de la réplica
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = create_db_engine(url)
+        # La réplica entra en la rotación recién después del primer chequeo
+        self.healthy = False
+        self.checked_at: Optional[float] = None
+
+    # Obtiene el nombre de la réplica (sin contraseña)
+    @property
+    def name(self) -> str:
+        return make_url(self.url).render_as_string(hide_password=True)
+
+    # Verifica la conexión con la réplica
+    def ping(self) -> bool:
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            healthy = True
+        except exc.SQLAlchemyError as e:
+            logger.warning("Réplica %s no disponible: %s", self.name, e)
+            healthy = False
+
+        if healthy and not self.healthy:
+            logger.info("Réplica %s disponible nuevamente", self.name)
+        self.healthy = healthy
+        self.checked_at = time.monotonic()
+        return healthy
+
+    # Marca la réplica como caída (se vuelve a verificar en el próximo chequeo)
+    def mark_down(self) -> None:
+        self.healthy = False
+
+    # Abre una sesión en la réplica
+    def session(self) -> Session:
+        return Session(self.engine)
+
+
+# Enrutador de lecturas: reparte las sesiones de solo lectura entre las réplicas sanas
+# (round-robin) y deja en la primaria a los usuarios que escribieron hace poco
+class ReplicaRouter:
+
+    # Inicialización del enrutador
+    def __init__(self, replicas: List[Replica], health_interval: float,
+                 sticky_seconds: float, sticky_size: int):
+        self.replicas = replicas
+        self.health_interval = health_interval
+        self.sticky_seconds = sticky_seconds
+        # Usuarios que escribieron dentro de la ventana de read-your-writes
+        self._recent_writers = TTLCache(maxsize=sticky_size, ttl=sticky_seconds)
+        self._counter = itertools.count()
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        # Contadores de lecturas enviadas a cada destino
+        self.reads_primary = 0
+        self.reads_replica = 0
+
+    # Elige la réplica de una lectura (None = primaria)
+    def pick(self, user_id: Optional[int] = None) -> Optional[Replica]:
+        replica = None
+        if self.replicas and not self.is_sticky(user_id):
+            with self._lock:
+                start = next(self._counter)
+            # Round-robin desde la siguiente réplica, saltando las caídas
+            for offset in range(len(self.replicas)):
+                candidate = self.replicas[(start + offset) % len(self.replicas)]
+                if candidate.healthy:
+                    replica = candidate
+                    break
+
+        with self._lock:
+            if replica is None:
+                self.reads_primary += 1
+            else:
+                self.reads_replica += 1
+        return replica
+
+    # Fija al usuario en la primaria después de escribir
+    def stick(self, user_id: int) -> None:
+        if self.sticky_seconds > 0:
+            self._recent_writers.set(user_id, True)
+
+    # Verifica si el usuario debe leer de la primaria
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        return user_id is not None and self._recent_writers.get(user_id) is not None
+
+    # Verifica todas las réplicas
+    def check_all(self) -> None:
+        for replica in self.replicas:
+            replica.ping()
+
+    def _run(self) -> None:
+        while True:
+            self.check_all()
+            if self._stop.wait(self.health_interval):
+                return
+
+    # Inicia el chequeo periódico de las réplicas
+    def start(self) -> None:
+        if not self.replicas or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    # Detiene el chequeo y cierra las conexiones
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.health_interval)
+            self._thread = None
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+    # Obtiene el estado de las réplicas
+    def status(self) -> Dict[str, Any]:
+        return {
+            "replicas": [{"name": replica.name, "healthy": replica.healthy}
+                         for replica in self.replicas],
+            "reads_primary": self.reads_primary,
+            "reads_replica": self.reads_replica,
+        }
+
+
+# Crea las réplicas configuradas (DATABASE_REPLICA_URLS separadas por coma)
+def create_replica_router() -> ReplicaRouter:
+    urls = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",")
+            if url.strip()]
+    return ReplicaRouter(
+        [Replica(url) for url in urls],
+        health_interval=settings.REPLICA_HEALTH_INTERVAL,
+        sticky_seconds=settings.REPLICA_STICKY_SECONDS,
+        sticky_size=settings.REPLICA_STICKY_SIZE,
+    )
+
+
+# Enrutador de lecturas de la aplicación
+replica_router = create_replica_router()
+
+
+# Asocia la sesión al usuario autenticado (para read-your-writes)
+def bind_user(db: Any, user_id: int) -> None:
+    db.info[USER_KEY] = user_id
+
+
+# Marca la transacción como escritura cuando el flush envía cambios
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session: Session, flush_context) -> None:
+    session.info[WROTE_KEY] = True
+
+
+# Marca la transacción como escritura (UPDATE/DELETE masivos con session.exec, que no
+# pasan por el flush)
+# No se usa do_orm_execute: un listener ahí se ejecuta en todas las queries y rompe yield_per
+def mark_write(db: Any) -> None:
+    db.info[WROTE_KEY] = True
+
+
+# Después del commit, el usuario que escribió lee de la primaria durante la ventana configurada
+@event.listens_for(Session, "after_commit")
+def _stick_writer(session: Session) -> None:
+    if session.info.pop(WROTE_KEY, False):
+        user_id = session.info.get(USER_KEY)
+        if user_id is not None:
+            replica_router.stick(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_writer(session: Session) -> None:
+    session.info.pop(WROTE_KEY, None)
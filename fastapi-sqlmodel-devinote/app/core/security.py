@@ -1,17 +1,17 @@
 
 from datetime import datetime, timedelta, timezone
-from pwdlib import PasswordHash
 import jwt
 from app.core.config import settings
+from app.services.hashing import password_hasher
 from fastapi import HTTPException, status
 
 
-pwd_context = PasswordHash.recommended()
-
-
+# El hashing se ejecuta en un pool de hilos dedicado (ver app/services/hashing.py)
 def hash_password(password: str) -> str:
     try:
-        return pwd_context.hash(password)
+        return password_hasher.hash(password)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -19,7 +19,9 @@ def hash_password(password: str) -> str:
 
 def verify_password(plain: str, hashed: str) -> bool:
     try:
-        return pwd_context.verify(plain, hashed)
+        return password_hasher.verify(plain, hashed)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -0,0 +1,165 @@
+
+import logging
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Dict, Iterator
+from sqlalchemy import Engine, event
+from sqlmodel import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Llave de session.info / connection.info con las métricas de la sesión
+STATS_KEY = "session_stats"
+
+
+# Métricas de una sesión: cuándo se abrió, cuántas queries ejecutó y qué conexiones usó
+class SessionStats:
+
+    # Inicialización de las métricas de la sesión
+    def __init__(self, label: str):
+        self.label = label
+        self.opened_at = time.monotonic()
+        self.queries = 0
+        self.connections: list = []
+
+    # Segundos que lleva abierta la sesión
+    def age(self) -> float:
+        return time.monotonic() - self.opened_at
+
+
+# Seguimiento del ciclo de vida de las sesiones de los requests
+# - tiempo abierta, queries por sesión y sesiones abiertas en este momento
+# - fugas: sesiones que se cerraron recién cuando el recolector de basura eliminó su generador
+class SessionTracker:
+
+    # Inicialización del seguimiento
+    def __init__(self, slow_seconds: float, query_warning: int):
+        self.slow_seconds = slow_seconds
+        self.query_warning = query_warning
+        self._open: Dict[int, SessionStats] = {}
+        self._lock = Lock()
+        self.opened = 0
+        self.closed = 0
+        self.leaked = 0
+        self.discarded = 0
+        self.peak_open = 0
+        self.open_time_total = 0.0
+        self.open_time_max = 0.0
+        self.queries_total = 0
+        self.queries_max = 0
+
+    # Registra una sesión abierta (se cierra al salir del contexto)
+    @contextmanager
+    def track(self, session: Session, label: str = "request") -> Iterator[SessionStats]:
+        stats = SessionStats(label)
+        session.info[STATS_KEY] = stats
+
+        with self._lock:
+            self.opened += 1
+            self._open[id(stats)] = stats
+            self.peak_open = max(self.peak_open, len(self._open))
+
+        leaked = False
+        try:
+            yield stats
+        except GeneratorExit:
+            # El generador que abrió la sesión no se terminó de recorrer: la sesión
+            # se cierra recién cuando el recolector de basura lo elimina
+            leaked = True
+            raise
+        finally:
+            # Las conexiones devueltas al pool dejan de sumar queries a esta sesión
+            release_connections(stats)
+            self._close(stats, leaked)
+
+    # Registra el cierre de una sesión
+    def _close(self, stats: SessionStats, leaked: bool = False) -> None:
+        age = stats.age()
+        with self._lock:
+            self._open.pop(id(stats), None)
+            self.closed += 1
+            self.leaked += leaked
+            self.open_time_total += age
+            self.open_time_max = max(self.open_time_max, age)
+            self.queries_total += stats.queries
+            self.queries_max = max(self.queries_max, stats.queries)
+
+        if leaked:
+            logger.error("Sesión %s cerrada por el recolector de basura después de %.2f s",
+                         stats.label, age)
+        if age > self.slow_seconds:
+            logger.warning("Sesión %s abierta %.2f s (%d queries)",
+                           stats.label, age, stats.queries)
+        if stats.queries > self.query_warning:
+            logger.warning("Sesión %s ejecutó %d queries en un solo request",
+                           stats.label, stats.queries)
+
+    # Registra cambios sin confirmar que se descartaron al cerrar la sesión
+    def discard(self, stats: SessionStats) -> None:
+        with self._lock:
+            self.discarded += 1
+        logger.warning("Sesión %s cerrada con cambios sin confirmar (se descartan)",
+                       stats.label)
+
+    # Estadísticas de las sesiones
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            ages = [stats.age() for stats in self._open.values()]
+            return {
+                "open": len(ages),
+                "peak_open": self.peak_open,
+                "oldest_open_seconds": round(max(ages), 6) if ages else 0.0,
+                "slow_open": sum(age > self.slow_seconds for age in ages),
+                "opened": self.opened,
+                "closed": self.closed,
+                "leaked": self.leaked,
+                "discarded": self.discarded,
+                "open_time_avg": round(self.open_time_total / self.closed, 6) if self.closed else 0.0,
+                "open_time_max": round(self.open_time_max, 6),
+                "queries_avg": round(self.queries_total / self.closed, 3) if self.closed else 0.0,
+                "queries_max": self.queries_max,
+            }
+
+
+# Seguimiento de las sesiones de la aplicación
+session_tracker = SessionTracker(
+    slow_seconds=settings.SESSION_SLOW_SECONDS,
+    query_warning=settings.SESSION_QUERY_WARNING,
+)
+
+
+# Libera las conexiones asociadas a la sesión
+def release_connections(stats: SessionStats) -> None:
+    for connection in stats.connections:
+        if connection.info.get(STATS_KEY) is stats:
+            connection.info.pop(STATS_KEY, None)
+    stats.connections.clear()
+
+
+# Asocia la conexión de la transacción a la sesión (una conexión la usa una sola sesión a la vez)
+@event.listens_for(Session, "after_begin")
+def _bind_connection(session: Session, transaction, connection) -> None:
+    stats = session.info.get(STATS_KEY)
+    if stats is not None:
+        connection.info[STATS_KEY] = stats
+        stats.connections.append(connection)
+
+
+# Al terminar la transacción, la conexión vuelve al pool y deja de pertenecer a la sesión
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _release_connection(session: Session) -> None:
+    stats = session.info.get(STATS_KEY)
+    if stats is not None:
+        release_connections(stats)
+
+
+# Cuenta cada query ejecutada en una conexión asociada a una sesión
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(connection, cursor, statement, parameters, context, executemany) -> None:
+    stats = connection.info.get(STATS_KEY)
+    if stats is not None:
+        stats.queries += 1
@@ -1,14 +1,23 @@
 
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
 from app.api.auth.router import router as auth_router
 from app.api.note.router import router as notes_router
 from app.api.label.router import router as labels_router
 from app.api.share.router import router as shares_router
 from app.core.config import settings
-from app.core.db import init_db
+from app.core.dependencies import get_current_user
+from app.core.db import engine, init_db
+from app.core.engine import pool_metrics, pool_status
+from app.core.replicas import replica_router
+from app.core.sessions import session_tracker
+from app.core.profiler import SQLProfilerMiddleware, install_query_hooks, sql_profiler
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from app.services.hashing import password_hasher
+from app.services.trigram import setup_trigram, trigram_refresher
 
 
 load_dotenv()
@@ -18,7 +27,15 @@ load_dotenv()
 async def lifespan(app: FastAPI):
     if settings.ENVIRONMENT == "DEV":
         init_db()
+        # Índices de trigramas (en producción los crea la migración)
+        setup_trigram(engine)
+    # Chequeo periódico de las réplicas de lectura
+    replica_router.start()
+    # Reconstrucción periódica de los índices de trigramas en memoria
+    trigram_refresher.start()
     yield
+    trigram_refresher.stop()
+    replica_router.stop()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -36,6 +53,33 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# Métricas por ruta (latencia, requests en curso, queries) y header X-Process-Time
+if settings.METRICS:
+    install_query_hooks()
+    app.add_middleware(MetricsMiddleware)
+
+    # Endpoint de métricas en formato de texto de Prometheus
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(registry.render(), media_type=CONTENT_TYPE)
+
+# Perfilador de queries por request (Server-Timing y endpoint de debug)
+if settings.SQL_PROFILER:
+    install_query_hooks()
+    app.add_middleware(SQLProfilerMiddleware)
+
+    # Endpoint para ver las queries de los últimos requests
+    # (flagged: solo los que superaron el presupuesto o repitieron sentencias)
+    # Requiere un usuario autenticado (la aplicación no tiene roles): las sentencias
+    # pueden incluir datos de otros usuarios
+    @app.get("/debug/queries", include_in_schema=False, dependencies=[Depends(get_current_user)])
+    def debug_queries(flagged: bool = False):
+        return {
+            "budget": sql_profiler.budget,
+            "duplicate_threshold": sql_profiler.duplicate_threshold,
+            "requests": sql_profiler.recent(only_flagged=flagged),
+        }
+
 app.include_router(auth_router)
 app.include_router(notes_router)
 app.include_router(labels_router)
@@ -46,3 +90,18 @@ app.include_router(shares_router)
 @app.get("/")
 def home():
     return {"message": "Hola Mundo!"}
+
+
+# Endpoint para verificar la base de datos y ver el estado del pool de conexiones
+@app.get("/health/db")
+def health_db():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return {
+        "status": "ok",
+        "pool": pool_status(engine),
+        "checkout_wait": pool_metrics.stats(),
+        "replicas": replica_router.status(),
+        "sessions": session_tracker.stats(),
+        "password_hasher": password_hasher.stats(),
+    }
@@ -0,0 +1,69 @@
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable, Optional
+
+
+# Cache en memoria con tamaño máximo (LRU) y tiempo de vida (TTL) por entrada
+class TTLCache:
+
+    # Inicialización del cache
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+
+    # Obtiene un valor (None si no existe o expiró)
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            # Se marca la entrada como la más reciente
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    # Guarda un valor
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            # Se descartan las entradas menos usadas si se supera el tamaño
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    # Elimina un valor
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    # Elimina los valores que cumplan una condición
+    def delete_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    # Vacía el cache
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    # Cantidad de entradas guardadas
+    def __len__(self) -> int:
+        return len(self._data)
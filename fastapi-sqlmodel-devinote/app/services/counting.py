@@ -0,0 +1,107 @@
+
+import json
+from typing import Callable, Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select, func
+
+from app.core.config import settings
+from app.services.cache import TTLCache
+
+# Firma de una estrategia de conteo: (sesión, modelo, query filtrada) -> total
+CountStrategy = Callable[[Session, type, object], int]
+
+# Cache de totales por (tabla, filtro)
+count_cache = TTLCache(maxsize=settings.PAGINATION_COUNT_CACHE_SIZE,
+                       ttl=settings.PAGINATION_COUNT_TTL)
+
+
+# Conteo exacto sobre la query filtrada (sin ordenamiento)
+def count_exact(db: Session, model, query) -> int:
+    subquery = query.order_by(None).subquery()
+    return db.scalar(select(func.count()).select_from(subquery)) or 0
+
+
+# Conteo estimado a partir de las estadísticas del planificador
+# Si no hay estadísticas disponibles se usa el conteo exacto
+def count_estimated(db: Session, model, query) -> int:
+    dialect = db.get_bind().dialect.name
+    table = model.__tablename__
+    filtered = query.whereclause is not None
+
+    try:
+        if dialect == "postgresql":
+            # Sin filtros alcanza con la estimación de filas de la tabla
+            if not filtered:
+                estimate = db.scalar(
+                    text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+                    {"table": table})
+                if estimate is not None and estimate >= 0:
+                    return int(estimate)
+
+            # Con filtros se usa la estimación del plan de la query
+            compiled = query.order_by(None).compile(dialect=db.get_bind().dialect)
+            plan = db.connection().exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+
+        if dialect == "sqlite" and not filtered:
+            # sqlite_stat1 existe solo después de ejecutar ANALYZE
+            stat = db.scalar(
+                text("SELECT stat FROM sqlite_stat1 WHERE tbl = :table LIMIT 1"),
+                {"table": table})
+            if stat:
+                return int(str(stat).split()[0])
+    except (SQLAlchemyError, KeyError, IndexError, TypeError, ValueError):
+        pass
+
+    return count_exact(db, model, query)
+
+
+# Se arma la llave del cache con la tabla y el SQL del filtro con sus parámetros
+def count_cache_key(db: Session, model, query) -> tuple:
+    compiled = query.order_by(None).compile(dialect=db.get_bind().dialect)
+    params = tuple(sorted((key, repr(value))
+                   for key, value in compiled.params.items()))
+    return (model.__tablename__, str(compiled), params)
+
+
+# Conteo exacto guardado en cache con TTL por (modelo, filtro)
+def count_cached(db: Session, model, query) -> int:
+    key = count_cache_key(db, model, query)
+    total = count_cache.get(key)
+    if total is None:
+        total = count_exact(db, model, query)
+        count_cache.set(key, total)
+    return total
+
+
+# Se invalidan los totales guardados de un modelo (o de todos)
+def invalidate_counts(model=None) -> None:
+    if model is None:
+        count_cache.clear()
+        return
+    table = model.__tablename__
+    count_cache.delete_where(lambda key: key[0] == table)
+
+
+# Estrategias disponibles (se pueden registrar nuevas)
+COUNT_STRATEGIES: Dict[str, CountStrategy] = {
+    "exact": count_exact,
+    "estimated": count_estimated,
+    "cached": count_cached,
+}
+
+
+# Se registra una estrategia de conteo personalizada
+def register_count_strategy(name: str, strategy: CountStrategy) -> None:
+    COUNT_STRATEGIES[name] = strategy
+
+
+# Se cuenta la query con la estrategia pedida (o la configurada por defecto)
+def count_query(db: Session, model, query, strategy: Optional[str] = None) -> int:
+    name = strategy or settings.PAGINATION_COUNT_STRATEGY
+    counter = COUNT_STRATEGIES.get(name, count_exact)
+    return counter(db, model, query)
@@ -0,0 +1,62 @@
+
+import hashlib
+from typing import Any, Callable, Optional, Tuple
+from fastapi import HTTPException, Request, Response, status
+
+# Los recursos son privados (requieren token): el cliente guarda la respuesta
+# pero debe revalidarla con If-None-Match antes de usarla
+CACHE_CONTROL = "private, no-cache"
+
+
+# Arma un ETag débil a partir de las versiones de las filas
+# (el valor es un hash corto de la llave, no expone los datos)
+def weak_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+# Compara el ETag con el header If-None-Match (comparación débil, RFC 9110)
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/")
+                  for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+# Llave de versión de un item: (id, versión)
+def row_version(item) -> Tuple[int, int]:
+    return item.id, item.version
+
+
+# Llave de versión de una página: metadatos de la paginación + versión de cada item
+def page_version(result: dict, item_version: Callable[[Any], Any] = row_version) -> tuple:
+    meta = tuple(sorted((key, value)
+                 for key, value in result.items() if key != "items"))
+    return meta, tuple(item_version(item) for item in result["items"])
+
+
+# Request condicional: se inyecta como dependencia en los endpoints de lectura
+class ConditionalRequest:
+
+    # Inicialización de la clase
+    def __init__(self, request: Request, response: Response):
+        self.request = request
+        self.response = response
+
+    # Valida el ETag del recurso: responde 304 si no cambió
+    def check(self, *parts: Any) -> str:
+        etag = weak_etag(*parts)
+
+        # Si el cliente ya tiene esta versión se responde 304 sin armar el cuerpo
+        if etag_matches(self.request.headers.get("if-none-match"), etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+        # Si cambió, se envía el ETag nuevo junto con la respuesta completa
+        self.response.headers["ETag"] = etag
+        self.response.headers["Cache-Control"] = CACHE_CONTROL
+        return etag
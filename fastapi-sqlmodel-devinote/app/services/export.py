@@ -0,0 +1,89 @@
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+
+# Formatos de exportación soportados
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Cantidad de filas que se leen por lote desde el cursor de la base de datos
+EXPORT_BATCH_SIZE = 1000
+
+# Firma del serializador: (sesión, lote de objetos) -> lista de diccionarios
+BatchSerializer = Callable[[Session, Sequence[Any]], List[Dict[str, Any]]]
+
+
+# Convierte los valores que JSON no soporta (fechas)
+def json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+# Convierte un valor a texto para una celda CSV
+def csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple, set)):
+        return "|".join(str(item) for item in value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+# Codifica un lote de filas como NDJSON
+def encode_ndjson(rows: List[Dict[str, Any]]) -> str:
+    return "".join(json.dumps(row, default=json_default, ensure_ascii=False) + "\n"
+                   for row in rows)
+
+
+# Codifica un lote de filas como CSV (sin encabezado)
+def encode_csv(rows: List[Dict[str, Any]], fields: Sequence[str]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([csv_value(row.get(field)) for field in fields]
+                     for row in rows)
+    return buffer.getvalue()
+
+
+# Generador que recorre la query por lotes con un cursor del servidor (yield_per)
+# Se abre una sesión propia porque la sesión del request se cierra antes de
+# terminar de enviar la respuesta; la memoria queda acotada a un lote porque
+# el identity map guarda referencias débiles y cada lote se descarta al enviarlo
+def stream_export(
+    session_factory: Callable[[], Session],
+    query,
+    serialize: BatchSerializer,
+    export_format: str,
+    fields: Sequence[str],
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[str]:
+    with session_factory() as db:
+        if export_format == "csv":
+            yield encode_csv([dict(zip(fields, fields))], fields)
+
+        result = db.exec(query.execution_options(yield_per=batch_size))
+        for batch in result.partitions():
+            rows = serialize(db, batch)
+            if export_format == "csv":
+                yield encode_csv(rows, fields)
+            else:
+                yield encode_ndjson(rows)
+
+
+# Crea la respuesta en streaming con el nombre de archivo correspondiente
+def export_response(chunks: Iterator[str], export_format: str, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{export_format}"'
+        }
+    )
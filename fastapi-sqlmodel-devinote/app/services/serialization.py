@@ -0,0 +1,66 @@
+
+import json
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Type
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+# orjson está en requirements.txt: si no se pudo instalar (por ejemplo en una plataforma
+# sin wheels) se usa json como respaldo
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Adaptador de una lista del schema: el validador y el serializador se compilan
+# una sola vez por schema y se reutilizan en cada request
+@lru_cache(maxsize=None)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+# Valida los objetos de la base como una lista del schema (una sola llamada al
+# validador en vez de un model_validate por item)
+def validate_items(schema: Type[BaseModel], items: Iterable[Any]) -> List[BaseModel]:
+    return list_adapter(schema).validate_python(list(items), from_attributes=True)
+
+
+# Convierte los items a tipos JSON (dict, list, str, números)
+# Si los items ya son del schema no se vuelven a validar
+def dump_items(schema: Type[BaseModel], items: List[Any]) -> List[Any]:
+    adapter = list_adapter(schema)
+    if items and not isinstance(items[0], schema):
+        items = adapter.validate_python(items, from_attributes=True)
+    return adapter.dump_python(items, mode="json", by_alias=True)
+
+
+# Serializa un contenido con tipos JSON
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":"), default=str).encode("utf-8")
+
+
+# Respuesta JSON serializada con orjson (el contenido ya tiene que tener tipos JSON,
+# no pasa por jsonable_encoder)
+class FastJSONResponse(JSONResponse):
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# Respuesta de una lista de items
+# Al retornar una Response, FastAPI no valida contra response_model ni copia los headers
+# de la respuesta inyectada: los headers (por ejemplo el ETag) se pasan acá
+def list_response(items: List[Any], schema: Type[BaseModel],
+                  headers: Optional[Mapping[str, str]] = None) -> JSONResponse:
+    return FastJSONResponse(dump_items(schema, items), headers=headers)
+
+
+# Respuesta de una página (items + datos de la paginación)
+def page_response(result: Dict[str, Any], schema: Type[BaseModel],
+                  headers: Optional[Mapping[str, str]] = None) -> JSONResponse:
+    return FastJSONResponse({**result, "items": dump_items(schema, result["items"])},
+                            headers=headers)
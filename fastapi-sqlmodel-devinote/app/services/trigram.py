@@ -0,0 +1,301 @@
+
+import logging
+import re
+import time
+from collections import Counter, defaultdict
+from threading import Event, Lock, RLock, Thread
+from typing import Callable, Iterable, Optional
+from sqlalchemy import Engine, case, event, exc, false, func, or_, select, text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+
+logger = logging.getLogger(__name__)
+
+# Umbral de similitud (el mismo que usa pg_trgm por defecto)
+SIMILARITY_THRESHOLD = 0.3
+
+# DDL de PostgreSQL: extensión pg_trgm e índices GIN sobre los textos buscados
+POSTGRES_TRGM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_note_title_trgm ON note USING gin (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_label_name_trgm ON label USING gin (name gin_trgm_ops)",
+]
+
+
+# Obtiene los trigramas de un texto (igual que pg_trgm: minúsculas, por palabra,
+# con dos espacios al inicio y uno al final)
+def trigrams(value: str) -> frozenset[str]:
+    grams = set()
+    for word in re.findall(r"\w+", value.lower(), flags=re.UNICODE):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+# Índice invertido de trigramas en memoria (para motores sin pg_trgm, como SQLite)
+# Se mantiene con los eventos del ORM y trigram_refresher lo reconstruye completo cada
+# cierto tiempo en segundo plano para recuperar cambios hechos por fuera del ORM o
+# transacciones revertidas
+class TrigramIndex:
+
+    # Inicialización del índice
+    def __init__(self, loader: Callable[[], Iterable[tuple[int, str]]], ttl: float):
+        self.loader = loader
+        self.ttl = ttl
+        self._postings: dict[str, set[int]] = defaultdict(set)
+        self._texts: dict[int, str] = {}
+        self._grams: dict[int, frozenset[str]] = {}
+        self._built_at: Optional[float] = None
+        self._lock = RLock()
+        # Una sola reconstrucción a la vez
+        self._build_lock = Lock()
+        # Cambios del ORM recibidos mientras se carga el índice nuevo (None = sin carga en curso)
+        self._changes: Optional[list[tuple[int, Optional[str]]]] = None
+
+    # Reconstruye el índice completo desde la base de datos
+    # La carga se hace sin el lock: las búsquedas siguen usando el índice anterior hasta
+    # que se reemplaza, y los cambios recibidos durante la carga se aplican sobre el nuevo
+    def rebuild(self) -> None:
+        with self._build_lock:
+            with self._lock:
+                self._changes = []
+            try:
+                rows = self.loader()
+                postings: dict[str, set[int]] = defaultdict(set)
+                texts: dict[int, str] = {}
+                grams: dict[int, frozenset[str]] = {}
+                for row_id, value in rows:
+                    self._add(row_id, value, postings, texts, grams)
+            except BaseException:
+                with self._lock:
+                    self._changes = None
+                raise
+
+            with self._lock:
+                self._postings, self._texts, self._grams = postings, texts, grams
+                for row_id, value in self._changes:
+                    self._remove(row_id)
+                    if value is not None:
+                        self._add(row_id, value)
+                self._changes = None
+                self._built_at = time.monotonic()
+
+    # Construye el índice si nunca se construyó (la actualización periódica la hace
+    # trigram_refresher en segundo plano)
+    def ensure_fresh(self) -> None:
+        if self._built_at is None:
+            with self._build_lock:
+                built = self._built_at is not None
+            if not built:
+                self.rebuild()
+
+    # Verifica si venció el TTL del índice
+    def is_stale(self) -> bool:
+        built_at = self._built_at
+        return built_at is None or time.monotonic() - built_at > self.ttl
+
+    # Invalida el índice (se reconstruye en la próxima búsqueda)
+    def invalidate(self) -> None:
+        self._built_at = None
+
+    def _add(self, row_id: int, value: Optional[str], postings=None, texts=None,
+             grams=None) -> None:
+        postings = self._postings if postings is None else postings
+        texts = self._texts if texts is None else texts
+        grams = self._grams if grams is None else grams
+        value = (value or "").lower()
+        row_grams = trigrams(value)
+        texts[row_id] = value
+        grams[row_id] = row_grams
+        for gram in row_grams:
+            postings[gram].add(row_id)
+
+    def _remove(self, row_id: int) -> None:
+        for gram in self._grams.pop(row_id, ()):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(row_id)
+                if not ids:
+                    del self._postings[gram]
+        self._texts.pop(row_id, None)
+
+    # Agrega o actualiza un registro (solo si el índice ya está construido o se está cargando)
+    def upsert(self, row_id: int, value: Optional[str]) -> None:
+        with self._lock:
+            if self._changes is not None:
+                self._changes.append((row_id, value or ""))
+            if self._built_at is None:
+                return
+            self._remove(row_id)
+            self._add(row_id, value)
+
+    # Elimina un registro
+    def remove(self, row_id: int) -> None:
+        with self._lock:
+            if self._changes is not None:
+                self._changes.append((row_id, None))
+            if self._built_at is not None:
+                self._remove(row_id)
+
+    # Busca por substring o similitud; retorna [(id, similitud)] de mayor a menor
+    # Si se pasan los IDs permitidos, los demás se descartan antes de aplicar el límite
+    def search(self, query: str, limit: int,
+               allowed: Optional[set[int]] = None) -> list[tuple[int, float]]:
+        self.ensure_fresh()
+        needle = query.strip().lower()
+        if not needle:
+            return []
+        query_grams = trigrams(needle)
+
+        with self._lock:
+            # Candidatos: registros que comparten algún trigrama con la búsqueda
+            shared = Counter()
+            for gram in query_grams:
+                for row_id in self._postings.get(gram, ()):
+                    shared[row_id] += 1
+
+            # Con menos de 3 caracteres puede no haber trigramas en común
+            candidates = set(shared)
+            if len(needle) < 3:
+                candidates.update(row_id for row_id, value in self._texts.items()
+                                  if needle in value)
+            if allowed is not None:
+                candidates &= allowed
+
+            # Similitud = trigramas compartidos / trigramas totales (como pg_trgm)
+            results = []
+            for row_id in candidates:
+                count = shared.get(row_id, 0)
+                grams = self._grams[row_id]
+                score = count / (len(query_grams) + len(grams) - count) if count else 0.0
+                if score >= SIMILARITY_THRESHOLD or needle in self._texts[row_id]:
+                    results.append((row_id, score))
+
+        # Se ordena por similitud (y por id para que el orden sea estable)
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results[:limit]
+
+
+# Índices registrados por (tabla, columna)
+_indexes: dict[tuple[str, str], TrigramIndex] = {}
+
+
+# Reconstrucción periódica de los índices en memoria en un hilo aparte
+# (la búsqueda no espera la carga de todos los textos de la tabla)
+class TrigramRefresher:
+
+    # Inicialización del hilo
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    # Reconstruye los índices vencidos
+    def refresh_all(self) -> None:
+        for (table, field), index in list(_indexes.items()):
+            if not index.is_stale():
+                continue
+            try:
+                index.rebuild()
+            except exc.SQLAlchemyError as e:
+                logger.warning("No se pudo reconstruir el índice de trigramas %s.%s: %s",
+                               table, field, e)
+
+    def _run(self) -> None:
+        while True:
+            self.refresh_all()
+            # Se revisa dos veces por TTL para que ningún índice quede vencido mucho tiempo
+            if self._stop.wait(max(self.interval / 2, 1.0)):
+                return
+
+    # Inicia la reconstrucción periódica (solo para motores sin pg_trgm)
+    def start(self) -> None:
+        if engine.dialect.name == "postgresql" or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name="trigram-refresh", daemon=True)
+        self._thread.start()
+
+    # Detiene la reconstrucción periódica
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+
+
+# Reconstrucción de los índices de la aplicación
+trigram_refresher = TrigramRefresher(interval=settings.TRIGRAM_INDEX_TTL)
+
+
+# Registra el índice en memoria de una columna de texto y lo mantiene con los eventos del ORM
+def trigram_index(model, field: str) -> TrigramIndex:
+    key = (model.__tablename__, field)
+    if key in _indexes:
+        return _indexes[key]
+
+    column = getattr(model, field)
+
+    def loader():
+        with Session(engine) as db:
+            return db.exec(select(model.id, column)).all()
+
+    index = TrigramIndex(loader, ttl=settings.TRIGRAM_INDEX_TTL)
+
+    @event.listens_for(model, "after_insert")
+    @event.listens_for(model, "after_update")
+    def _upsert(mapper, connection, target) -> None:
+        index.upsert(target.id, getattr(target, field))
+
+    @event.listens_for(model, "after_delete")
+    def _remove(mapper, connection, target) -> None:
+        index.remove(target.id)
+
+    _indexes[key] = index
+    return index
+
+
+# Crea la extensión y los índices de pg_trgm (en producción se usan las migraciones)
+def setup_trigram(bind: Engine) -> None:
+    if bind.dialect.name != "postgresql":
+        return
+    with bind.begin() as conn:
+        for statement in POSTGRES_TRGM_DDL:
+            conn.execute(text(statement))
+
+
+# Aplica la búsqueda por trigramas a una query
+# Retorna la query filtrada y la expresión de ranking ("menor es más relevante",
+# para que el orden ascendente muestre primero los resultados más parecidos)
+# Si se pasa la sesión, el índice en memoria solo considera las filas de la query
+# (por ejemplo las notas visibles del usuario): si no, las coincidencias de otros
+# usuarios podrían ocupar todo TRIGRAM_MAX_RESULTS
+def apply_trigram_search(query, model, field: str, search: Optional[str],
+                         db: Optional[Session] = None):
+    if not search or not search.strip():
+        return query, None
+
+    column = getattr(model, field)
+    search = search.strip()
+
+    # PostgreSQL: ILIKE y el operador % (similitud) usan el índice GIN de pg_trgm
+    if engine.dialect.name == "postgresql":
+        query = query.where(or_(column.icontains(search, autoescape=True),
+                                column.op("%")(search)))
+        return query, -func.similarity(column, search)
+
+    # Otros motores: se resuelve con el índice en memoria
+    allowed = None
+    if db is not None:
+        allowed = set(db.exec(query.with_only_columns(model.id)).all())
+    matches = trigram_index(model, field).search(
+        search, limit=settings.TRIGRAM_MAX_RESULTS, allowed=allowed)
+    if not matches:
+        return query.where(false()), None
+
+    ids = [row_id for row_id, _ in matches]
+    rank = case({row_id: -score for row_id, score in matches},
+                value=model.id, else_=0.0)
+    return query.where(model.id.in_(ids)), rank